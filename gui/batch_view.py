@@ -0,0 +1,471 @@
+import array
+import csv
+import json
+import queue
+import sys
+import tempfile
+import threading
+import time
+import tkinter as tk
+from tkinter import ttk, filedialog, messagebox
+
+from server.micro_batcher import QueueFull
+from server.scheduler import PRIORITY_BATCH
+from utlis.batch_pipeline import read_text_inputs, read_image_inputs, batched, count_lines
+
+ERROR_LABEL = "ERROR"
+
+
+class BatchResultStore:
+    """
+    Holds batch results in a temporary file, keeping only each row's file offset, label, confidence
+    and the first INPUT_KEY_CHARS characters of its input in memory. Rows are read back by index when
+    they are shown or exported, so tens of thousands of results cost a few bytes each.
+    """
+
+    INPUT_KEY_CHARS = 64
+
+    def __init__(self):
+        self._file = tempfile.TemporaryFile()
+        self._offsets = array.array("q")
+        self._confidences = array.array("d")
+        self._labels = []
+        self._input_keys = []
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def append(self, row):
+        """
+        It stores one result row ({"input": ..., plus the model's result fields}).
+        """
+        data = json.dumps(row, ensure_ascii=False).encode("utf-8") + b"\n"
+        with self._lock:
+            self._file.seek(0, 2)
+            self._offsets.append(self._file.tell())
+            self._file.write(data)
+        self._confidences.append(float(row.get("confidence", -1.0)))
+        # Labels repeat, so interning keeps one copy of each string.
+        self._labels.append(sys.intern(ERROR_LABEL if "error" in row else str(row.get("sentiment", "OK"))))
+        self._input_keys.append(str(row.get("input", ""))[:self.INPUT_KEY_CHARS])
+
+    def row(self, index):
+        """
+        It reads back the row stored at index.
+        """
+        with self._lock:
+            self._file.seek(self._offsets[index])
+            return json.loads(self._file.readline())
+
+    def rows(self, indices):
+        """
+        It yields the rows at indices, in that order.
+        """
+        for index in indices:
+            yield self.row(index)
+
+    def labels(self):
+        """
+        It returns the distinct labels seen so far, sorted.
+        """
+        return sorted(set(self._labels))
+
+    def select(self, label=None, min_confidence=None, contains=None, sort_by=None, descending=False):
+        """
+        It returns the indices of the rows that match the filters, in the requested order.
+        sort_by is None (arrival order), "label", "confidence" or "input". contains is matched
+        case-insensitively against the input text or path and the caption. contains reads every
+        candidate row back from the file, so it should not be called on the Tk main thread.
+        """
+        indices = array.array("q", (
+            index for index in range(len(self))
+            if (label is None or self._labels[index] == label)
+            and (min_confidence is None or self._confidences[index] >= min_confidence)
+        ))
+        if contains:
+            needle = contains.lower()
+            indices = array.array("q", (index for index in indices if needle in self._search_text(index)))
+        if sort_by == "label":
+            indices = array.array("q", sorted(indices, key=self._labels.__getitem__, reverse=descending))
+        elif sort_by == "confidence":
+            indices = array.array("q", sorted(indices, key=self._confidences.__getitem__, reverse=descending))
+        elif sort_by == "input":
+            indices = array.array("q", self._sorted_by_input(indices, descending))
+        elif descending:
+            indices.reverse()
+        return indices
+
+    def _sorted_by_input(self, indices, descending):
+        """
+        It sorts indices by input using the in-memory prefixes. Only runs of rows whose prefixes are
+        truncated and equal are read back from the file, to order them by their full input.
+        """
+        keys = self._input_keys
+        ordered = sorted(indices, key=keys.__getitem__, reverse=descending)
+        start = 0
+        while start < len(ordered):
+            key = keys[ordered[start]]
+            end = start + 1
+            while end < len(ordered) and keys[ordered[end]] == key:
+                end += 1
+            if end - start > 1 and len(key) == self.INPUT_KEY_CHARS:
+                ordered[start:end] = sorted(ordered[start:end], reverse=descending,
+                                            key=lambda index: str(self.row(index).get("input", "")))
+            start = end
+        return ordered
+
+    def _search_text(self, index):
+        row = self.row(index)
+        return f"{row.get('input', '')}\n{row.get('caption', '')}".lower()
+
+    def export(self, path, indices):
+        """
+        It writes the rows at indices to path, as CSV for .csv files and JSONL otherwise.
+        """
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            if path.lower().endswith(".csv"):
+                writer = csv.writer(f)
+                writer.writerow(["input", "label", "confidence", "caption", "error"])
+                for row in self.rows(indices):
+                    writer.writerow([row.get("input", ""), row.get("sentiment", ""), row.get("confidence", ""),
+                                     row.get("caption", ""), row.get("error", "")])
+            else:
+                for row in self.rows(indices):
+                    f.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+    def close(self):
+        """
+        It deletes the temporary file.
+        """
+        self._file.close()
+
+
+class BatchResultsTab:
+    """
+    The batch tab: runs a text file or an image folder through a model in the background and shows
+    the results in a virtualized Treeview that only ever holds the rows on screen.
+
+    Each batch is a separate low-priority scheduler job, so interactive requests from the first tab
+    still run between batches.
+    """
+
+    VISIBLE_ROWS = 20
+    POLL_INTERVAL_MS = 200
+    JOBS_IN_FLIGHT = 2
+
+    def __init__(self, frame, root, scheduler, use_model):
+        """
+        use_model(kind) is called on a scheduler thread and returns a context manager that yields the
+        loaded "text" or "image" model and keeps it loaded until the block exits.
+        """
+        self._frame = frame
+        self._root = root
+        self._scheduler = scheduler
+        self._use_model = use_model
+        self._store = BatchResultStore()
+        self._view = array.array("q")
+        self._first_row = 0
+        self._sort_by = None
+        self._descending = False
+        self._filtered = False
+
+        self._results = queue.Queue()
+        self._selections = queue.Queue()
+        self._selection_id = 0
+        self._run = None
+        self._build()
+
+    def _build(self):
+        controls = ttk.Frame(self._frame)
+        controls.pack(fill=tk.X, padx=10, pady=5)
+        self._kind_var = tk.StringVar(value="text")
+        ttk.Radiobutton(controls, text="Text file", variable=self._kind_var, value="text").pack(side=tk.LEFT)
+        ttk.Radiobutton(controls, text="Image folder", variable=self._kind_var, value="image").pack(side=tk.LEFT)
+        self._source_var = tk.StringVar()
+        ttk.Entry(controls, textvariable=self._source_var, width=45).pack(side=tk.LEFT, padx=5)
+        ttk.Button(controls, text="Browse...", command=self._browse).pack(side=tk.LEFT)
+        ttk.Label(controls, text="Batch:").pack(side=tk.LEFT, padx=(10, 2))
+        self._batch_size_var = tk.StringVar(value="16")
+        ttk.Spinbox(controls, from_=1, to=256, width=5, textvariable=self._batch_size_var).pack(side=tk.LEFT)
+        self._run_button = ttk.Button(controls, text="Run", command=self._start)
+        self._run_button.pack(side=tk.LEFT, padx=5)
+        self._stop_button = ttk.Button(controls, text="Stop", command=self._stop, state=tk.DISABLED)
+        self._stop_button.pack(side=tk.LEFT)
+
+        progress = ttk.Frame(self._frame)
+        progress.pack(fill=tk.X, padx=10)
+        self._progress = ttk.Progressbar(progress, mode="determinate")
+        self._progress.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        self._progress_var = tk.StringVar(value="No batch run yet")
+        ttk.Label(progress, textvariable=self._progress_var, width=40).pack(side=tk.LEFT, padx=5)
+
+        filters = ttk.Frame(self._frame)
+        filters.pack(fill=tk.X, padx=10, pady=5)
+        ttk.Label(filters, text="Label:").pack(side=tk.LEFT)
+        self._label_var = tk.StringVar(value="All")
+        self._label_box = ttk.Combobox(filters, textvariable=self._label_var, values=["All"],
+                                       state="readonly", width=12)
+        self._label_box.pack(side=tk.LEFT, padx=2)
+        ttk.Label(filters, text="Min confidence:").pack(side=tk.LEFT, padx=(10, 2))
+        self._min_confidence_var = tk.StringVar()
+        ttk.Entry(filters, textvariable=self._min_confidence_var, width=6).pack(side=tk.LEFT)
+        ttk.Label(filters, text="Contains:").pack(side=tk.LEFT, padx=(10, 2))
+        self._contains_var = tk.StringVar()
+        ttk.Entry(filters, textvariable=self._contains_var, width=20).pack(side=tk.LEFT)
+        ttk.Button(filters, text="Apply", command=self._apply_filters).pack(side=tk.LEFT, padx=5)
+        ttk.Button(filters, text="Export...", command=self._export).pack(side=tk.RIGHT)
+
+        table = ttk.Frame(self._frame)
+        table.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+        columns = ("row", "input", "label", "confidence", "detail")
+        headings = ("#", "Input / Path", "Label", "Confidence", "Caption / Error")
+        self._tree = ttk.Treeview(table, columns=columns, show="headings", height=self.VISIBLE_ROWS)
+        for column, heading in zip(columns, headings):
+            sort_key = {"input": "input", "label": "label", "confidence": "confidence"}.get(column)
+            self._tree.heading(column, text=heading,
+                               command=(lambda key=sort_key: self._sort(key)) if sort_key else "")
+            self._tree.column(column, width={"row": 60, "input": 300, "detail": 300}.get(column, 90), anchor=tk.W)
+        # The scrollbar stands for the whole result set; the tree is refilled with the rows in view.
+        self._scrollbar = ttk.Scrollbar(table, orient=tk.VERTICAL, command=self._on_scroll)
+        self._scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self._tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self._tree.bind("<MouseWheel>", lambda event: self._scroll_to(self._first_row - event.delta // 40))
+        self._tree.bind("<Button-4>", lambda event: self._scroll_to(self._first_row - 3))
+        self._tree.bind("<Button-5>", lambda event: self._scroll_to(self._first_row + 3))
+        self._render()
+
+    def _browse(self):
+        if self._kind_var.get() == "image":
+            source = filedialog.askdirectory(title="Select an image folder")
+        else:
+            source = filedialog.askopenfilename(title="Select a text or JSONL file",
+                                                filetypes=[("Text files", "*.txt *.jsonl"), ("All files", "*.*")])
+        if source:
+            self._source_var.set(source)
+
+    def _start(self):
+        source = self._source_var.get().strip()
+        kind = self._kind_var.get()
+        try:
+            batch_size = int(self._batch_size_var.get())
+        except ValueError:
+            messagebox.showwarning("Warning", "Batch size must be a whole number.")
+            return
+        if not source:
+            messagebox.showwarning("Warning", "Please choose an input file or folder.")
+            return
+
+        if kind == "image":
+            inputs = list(read_image_inputs(source))
+            total = len(inputs)
+        else:
+            inputs = read_text_inputs(source)
+            total = count_lines(source)
+
+        self._store.close()
+        self._store = BatchResultStore()
+        self._view = array.array("q")
+        self._first_row = 0
+        self._filtered = False
+        self._label_var.set("All")
+        self._run = {
+            "kind": kind,
+            "batches": batched(inputs, batch_size),
+            "lock": threading.Lock(),
+            "total": total,
+            "in_flight": 0,
+            "exhausted": False,
+            "stopped": False,
+            "start_time": time.perf_counter()
+        }
+        self._progress.config(maximum=max(total, 1), value=0)
+        self._run_button.config(state=tk.DISABLED)
+        self._stop_button.config(state=tk.NORMAL)
+        self._render()
+        self._poll()
+
+    def _stop(self):
+        if self._run is not None:
+            self._run["stopped"] = True
+            self._progress_var.set("Stopping after the current batch...")
+
+    def _run_next_batch(self, run):
+        """
+        It runs on a scheduler thread: it takes the next batch from the input stream and processes it.
+        """
+        try:
+            with run["lock"]:
+                batch = None if run["stopped"] else next(run["batches"], None)
+            if batch is None:
+                run["exhausted"] = True
+                return
+            with self._use_model(run["kind"]) as model:
+                results = model.process_batch(batch)
+            for item, result in zip(batch, results):
+                self._results.put((run, dict(result, input=item)))
+        except Exception as e:
+            self._results.put((run, {"error": f"Batch failed: {str(e)}"}))
+            run["exhausted"] = True
+        finally:
+            self._results.put((run, None))
+
+    def _poll(self):
+        """
+        It moves finished rows into the store, keeps the scheduler fed and updates the progress.
+        """
+        run = self._run
+        if run is None:
+            return
+        added = 0
+        try:
+            while True:
+                owner, row = self._results.get_nowait()
+                if owner is not run:
+                    continue  # From a run that was replaced
+                if row is None:
+                    run["in_flight"] -= 1
+                    continue
+                self._store.append(row)
+                if not self._filtered:
+                    self._view.append(len(self._store) - 1)
+                added += 1
+        except queue.Empty:
+            pass
+
+        while not run["exhausted"] and not run["stopped"] and run["in_flight"] < self.JOBS_IN_FLIGHT:
+            try:
+                self._scheduler.submit(run["kind"], self._run_next_batch, run, priority=PRIORITY_BATCH)
+            except QueueFull:
+                break  # Try again on the next poll
+            run["in_flight"] += 1
+
+        done = len(self._store)
+        elapsed = time.perf_counter() - run["start_time"]
+        rate = done / elapsed if elapsed > 0 else 0.0
+        self._progress.config(value=done)
+        finished = run["in_flight"] == 0 and (run["exhausted"] or run["stopped"])
+        state = "Stopped" if run["stopped"] else ("Done" if finished else "Running")
+        self._progress_var.set(f"{state}: {done}/{run['total']} items, {rate:.1f} items/sec")
+        if added:
+            self._label_box.config(values=["All"] + self._store.labels())
+            self._render()
+
+        if finished:
+            self._run_button.config(state=tk.NORMAL)
+            self._stop_button.config(state=tk.DISABLED)
+            self._run = None
+        else:
+            self._root.after(self.POLL_INTERVAL_MS, self._poll)
+
+    def _filter_options(self):
+        label = self._label_var.get()
+        try:
+            min_confidence = float(self._min_confidence_var.get()) if self._min_confidence_var.get() else None
+        except ValueError:
+            messagebox.showwarning("Warning", "Min confidence must be a number between 0 and 1.")
+            return None
+        return {
+            "label": None if label == "All" else label,
+            "min_confidence": min_confidence,
+            "contains": self._contains_var.get().strip() or None,
+            "sort_by": self._sort_by,
+            "descending": self._descending
+        }
+
+    def _apply_filters(self):
+        """
+        It starts selecting the rows that match the filters on a background thread, since filtering
+        by text and sorting by input read rows back from the store's file; _poll_selection shows them.
+        """
+        options = self._filter_options()
+        if options is None:
+            return
+        self._selection_id += 1
+        if not any(options[key] for key in ("label", "min_confidence", "contains", "sort_by")):
+            self._show_selection(array.array("q", range(len(self._store))), filtered=False)
+            return
+        threading.Thread(target=self._select_rows, args=(self._selection_id, self._store, options),
+                         daemon=True).start()
+        self._poll_selection(self._selection_id)
+
+    def _select_rows(self, selection_id, store, options):
+        try:
+            indices = store.select(**options)
+        except (OSError, ValueError):
+            indices = None  # The store was closed by a new run
+        self._selections.put((selection_id, store, indices))
+
+    def _poll_selection(self, selection_id):
+        """
+        It waits on the main thread for selection selection_id; a newer selection takes over the wait.
+        """
+        if selection_id != self._selection_id:
+            return
+        try:
+            while True:
+                finished_id, store, indices = self._selections.get_nowait()
+                if finished_id == selection_id:
+                    if store is self._store and indices is not None:
+                        self._show_selection(indices, filtered=True)
+                    return
+        except queue.Empty:
+            self._root.after(self.POLL_INTERVAL_MS // 4, self._poll_selection, selection_id)
+
+    def _show_selection(self, indices, filtered):
+        self._view = indices
+        self._filtered = filtered
+        self._first_row = 0
+        self._render()
+
+    def _sort(self, key):
+        self._descending = not self._descending if self._sort_by == key else False
+        self._sort_by = key
+        self._apply_filters()
+
+    def _on_scroll(self, *args):
+        if args[0] == "moveto":
+            self._scroll_to(int(float(args[1]) * len(self._view)))
+        elif args[0] == "scroll":
+            step = self.VISIBLE_ROWS if args[2] == "pages" else 1
+            self._scroll_to(self._first_row + int(args[1]) * step)
+
+    def _scroll_to(self, first_row):
+        self._first_row = max(0, min(first_row, len(self._view) - self.VISIBLE_ROWS))
+        self._render()
+
+    def _render(self):
+        """
+        It refills the tree with the rows in view and updates the scrollbar to match.
+        """
+        self._tree.delete(*self._tree.get_children())
+        total = len(self._view)
+        last_row = min(self._first_row + self.VISIBLE_ROWS, total)
+        for position in range(self._first_row, last_row):
+            index = self._view[position]
+            row = self._store.row(index)
+            confidence = row.get("confidence")
+            self._tree.insert("", tk.END, values=(
+                index + 1,
+                row.get("input", ""),
+                ERROR_LABEL if "error" in row else row.get("sentiment", ""),
+                f"{confidence:.4f}" if isinstance(confidence, (int, float)) else "",
+                row.get("error") or row.get("caption", "")
+            ))
+        if total:
+            self._scrollbar.set(self._first_row / total, last_row / total)
+        else:
+            self._scrollbar.set(0.0, 1.0)
+
+    def _export(self):
+        if not len(self._view):
+            messagebox.showinfo("Export", "There are no rows to export.")
+            return
+        path = filedialog.asksaveasfilename(
+            title="Export batch results",
+            defaultextension=".jsonl",
+            filetypes=[("JSON Lines", "*.jsonl"), ("CSV", "*.csv"), ("All files", "*.*")]
+        )
+        if path:
+            self._store.export(path, self._view)
+            self._progress_var.set(f"Exported {len(self._view)} rows to {path.split('/')[-1]}")
@@ -1,38 +1,179 @@
+import atexit
+import queue
+import threading
 import tkinter as tk
-from tkinter import ttk, filedialog, messagebox
-from models.text_classifier import TextClassifierModel
-from models.image_captioner import ImageCaptionerModel
+from tkinter import ttk, filedialog, messagebox, simpledialog
+from models.registry import get_default_registry
+from models.result_cache import CachedModel
+from models.results_store import ResultsStore, get_default_results_store
+from server.scheduler import ModelScheduler, PRIORITY_INTERACTIVE
+from server.micro_batcher import QueueFull
 from oop.decorators import log_method_calls
+from utlis.metrics import get_metrics_registry, STAGES
+from utlis.profiling import get_profiler, default_profile_dir
+from gui.batch_view import BatchResultsTab
 
 class MainApplication:
     """
     This is the main GUI class that implements the Tkinter interface.
     """
     
-    def __init__(self, root):
+    POLL_INTERVAL_MS = 100
+    
+    def __init__(self, root, prewarm=None, results_db=None):
         """
-   
+        prewarm lists the models ("text", "image") to load and warm up on background threads at startup.
+        results_db opts in to keeping every result in a results database: "" for the default one,
+        or a path. With None (the default) nothing is written to disk.
         """
         self._root = root
         self._root.title("AI Model Integration GUI - HIT137 Assignment 3")
         self._root.geometry("900x700")
         
-        self._text_model = TextClassifierModel()
-        self._image_model = ImageCaptionerModel()
+        # Model instances are shared through the registry, which loads them on demand
+        # and unloads least recently used ones when the memory budget is exceeded.
+        self._registry = get_default_registry()
+        self._text_model_name = self._registry.name_for("text")
+        self._image_model_name = self._registry.name_for("image")
+        # With results_db, results are also kept in the on-disk results store, which answers repeats
+        # across restarts.
+        results_store = None
+        if results_db == "":
+            results_store = get_default_results_store()
+        elif results_db is not None:
+            results_store = ResultsStore(results_db)
+            atexit.register(results_store.close)
+        self._text_model = CachedModel(self._registry.peek(self._text_model_name), store=results_store)
+        self._image_model = CachedModel(self._registry.peek(self._image_model_name), store=results_store)
+        
+        # Inference runs on one scheduler thread per model, so a slow caption does not hold up text
+        # jobs; results come back through a queue polled with root.after.
+        self._scheduler = ModelScheduler(max_queue_size=32)
+        self._result_queue = queue.Queue()
+        self._job_counter = 0
+        self._pending_job_ids = set()
+        self._cancelled_jobs = set()
+        self._jobs_lock = threading.Lock()
+        self._current_job = threading.local()  # job_id of the job running on each scheduler thread
+        self._stream_queue = queue.Queue()  # (job_id, text) pieces of captions as they are generated
+        self._streaming_job_id = None
+        
+        self._prewarm_names = []
+        for key in prewarm or []:
+            name = {"text": self._text_model_name, "image": self._image_model_name}.get(key)
+            if name and name not in self._prewarm_names:
+                self._prewarm_names.append(name)
         
         self._setup_gui()
+        self._start_prewarm()
+        self._root.after(self.POLL_INTERVAL_MS, self._poll_results)
+    
+    def _start_prewarm(self):
+        """
+        It loads and warms up each pre-warm model on its own background thread.
+        """
+        for name in self._prewarm_names:
+            thread = threading.Thread(target=self._prewarm, args=(name,), daemon=True)
+            thread.start()
+        self._refresh_model_states()
+    
+    def _prewarm(self, name):
+        """
+        It runs on a background thread, loading one model through the registry and warming it up while
+        it is pinned, so the other model loading at the same time cannot evict it mid warm-up.
+        """
+        self._registry.pin(name)
+        try:
+            self._registry.peek(name).warm_up(loader=lambda: self._registry.get(name))
+        finally:
+            self._registry.unpin(name)
+    
+    def _refresh_model_states(self):
+        """
+        It shows each model's loading state in the status bar and enables Process only when the
+        selected pre-warm model is ready.
+        """
+        states = [
+            ("Text model", self._text_model.load_state),
+            ("Image model", self._image_model.load_state)
+        ]
+        self._model_state_var.set(" | ".join(f"{label}: {state}" for label, state in states))
+        
+        selected_name = self._selected_model_name()
+        if selected_name in self._prewarm_names:
+            state = self._registry.peek(selected_name).load_state
+            waiting = state not in (self._text_model.STATE_READY, self._text_model.STATE_FAILED)
+            self._process_button.config(state=tk.DISABLED if waiting else tk.NORMAL)
+    
+    def _selected_model_name(self):
+        """
+        It returns the registry name of the model chosen in the dropdown.
+        """
+        if "Image Captioning" in self._model_type_var.get():
+            return self._image_model_name
+        return self._text_model_name
     
     def _setup_gui(self):
         """
         It sets the main GUI layout.
       
         """
+        self._create_menu()
         self._notebook = ttk.Notebook(self._root)
         self._notebook.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
         
+        # Tabs other than the first are empty frames until selected; builders fill them on first view.
+        self._deferred_tabs = {}
+        self._notebook.bind("<<NotebookTabChanged>>", self._on_tab_changed)
+        
         self._create_model_processing_tab()
         self._create_oop_explanation_tab()
         self._create_model_info_tab()
+        self._create_performance_tab()
+        self._create_batch_tab()
+    
+    def _create_menu(self):
+        """
+        It creates the menu bar with the profiling commands.
+        """
+        menubar = tk.Menu(self._root)
+        tools_menu = tk.Menu(menubar, tearoff=0)
+        tools_menu.add_command(label="Profile Next Text Calls...",
+                               command=lambda: self._arm_profiling(self._text_model_name))
+        tools_menu.add_command(label="Profile Next Image Calls...",
+                               command=lambda: self._arm_profiling(self._image_model_name))
+        menubar.add_cascade(label="Tools", menu=tools_menu)
+        self._root.config(menu=menubar)
+    
+    def _arm_profiling(self, model_name):
+        """
+        It asks how many calls to profile and arms the profiler for the model.
+        """
+        calls = simpledialog.askinteger("Profile Model Calls",
+                                        f"Profile how many calls of {model_name}?",
+                                        parent=self._root, initialvalue=1, minvalue=1, maxvalue=100)
+        if not calls:
+            return
+        get_profiler().arm(self._registry.peek(model_name), calls)
+        self._status_var.set(f"Profiling the next {calls} call(s); cached results are not profiled. "
+                             f"Profiles are written to {default_profile_dir()}")
+    
+    def _add_deferred_tab(self, text, builder):
+        """
+        It adds a notebook tab whose contents are built by builder(frame) the first time it is selected.
+        """
+        frame = ttk.Frame(self._notebook)
+        self._notebook.add(frame, text=text)
+        self._deferred_tabs[str(frame)] = (frame, builder)
+    
+    def _on_tab_changed(self, event=None):
+        """
+        It builds a deferred tab the first time the user selects it.
+        """
+        entry = self._deferred_tabs.pop(self._notebook.select(), None)
+        if entry is not None:
+            frame, builder = entry
+            builder(frame)
     
     def _create_model_processing_tab(self):
         """
@@ -79,10 +220,18 @@ class MainApplication:
                                          style='Accent.TButton')
         self._process_button.pack(side=tk.LEFT, padx=5)
         
+        self._cancel_button = ttk.Button(button_frame, text="Cancel", 
+                                        command=self._cancel_jobs,
+                                        state=tk.DISABLED)
+        self._cancel_button.pack(side=tk.LEFT, padx=5)
+        
         clear_button = ttk.Button(button_frame, text="Clear Output", 
                                  command=self._clear_output)
         clear_button.pack(side=tk.LEFT, padx=5)
         
+        self._progress_bar = ttk.Progressbar(button_frame, mode='indeterminate', length=200)
+        self._progress_bar.pack(side=tk.RIGHT, padx=5)
+        
         output_frame = ttk.LabelFrame(main_frame, text="Output")
         output_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=10)
         
@@ -95,11 +244,19 @@ class MainApplication:
         self._output_text.pack(padx=10, pady=10, fill=tk.BOTH, expand=True)
         output_scroll.config(command=self._output_text.yview)
         
+        status_frame = ttk.Frame(main_frame)
+        status_frame.pack(side=tk.BOTTOM, fill=tk.X, padx=20, pady=5)
+        
         self._status_var = tk.StringVar()
         self._status_var.set("Ready")
-        status_bar = ttk.Label(main_frame, textvariable=self._status_var, 
+        status_bar = ttk.Label(status_frame, textvariable=self._status_var, 
                               relief=tk.SUNKEN, anchor=tk.W)
-        status_bar.pack(side=tk.BOTTOM, fill=tk.X, padx=20, pady=5)
+        status_bar.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        
+        self._model_state_var = tk.StringVar()
+        model_state_label = ttk.Label(status_frame, textvariable=self._model_state_var, 
+                                     relief=tk.SUNKEN, anchor=tk.E)
+        model_state_label.pack(side=tk.RIGHT)
         
         self._show_text_input()
     
@@ -121,6 +278,7 @@ class MainApplication:
         
         self._clear_output()
         self._status_var.set(f"Selected: {selected_model}")
+        self._refresh_model_states()
     
     def _show_text_input(self):
         """
@@ -154,6 +312,30 @@ class MainApplication:
                                   command=self._browse_image)
         browse_button.pack(side=tk.LEFT, padx=5)
         
+        generation_frame = ttk.Frame(self._input_container)
+        generation_frame.pack(fill=tk.X, pady=5)
+        
+        ttk.Label(generation_frame, text="Max new tokens:").pack(side=tk.LEFT, padx=5)
+        self._max_tokens_var = tk.IntVar(value=30)
+        ttk.Spinbox(generation_frame, from_=5, to=100, width=5, 
+                   textvariable=self._max_tokens_var).pack(side=tk.LEFT, padx=5)
+        
+        ttk.Label(generation_frame, text="Beams:").pack(side=tk.LEFT, padx=5)
+        self._num_beams_var = tk.IntVar(value=1)
+        ttk.Spinbox(generation_frame, from_=1, to=8, width=3, 
+                   textvariable=self._num_beams_var).pack(side=tk.LEFT, padx=5)
+        
+        ttk.Label(generation_frame, text="(1 beam = greedy, streamed as it is generated)",
+                 font=('Arial', 9, 'italic'), foreground='gray').pack(side=tk.LEFT, padx=5)
+        
+        prompt_frame = ttk.Frame(self._input_container)
+        prompt_frame.pack(fill=tk.X, pady=5)
+        
+        ttk.Label(prompt_frame, text="Prompt (optional):").pack(side=tk.LEFT, padx=5)
+        self._prompt_var = tk.StringVar()
+        ttk.Entry(prompt_frame, textvariable=self._prompt_var, width=40,
+                  font=('Arial', 10)).pack(side=tk.LEFT, padx=5, fill=tk.X, expand=True)
+        
         info_label = ttk.Label(self._input_container, 
                               text="Supported formats: JPG, JPEG, PNG, BMP, GIF",
                               font=('Arial', 9, 'italic'),
@@ -168,13 +350,10 @@ class MainApplication:
     @log_method_calls
     def _process_input(self):
         """
-       It processes the input based on selected model type.
+       It reads the input for the selected model type and queues it for the worker thread.
         """
         selected_model = self._model_type_var.get()
         
-        self._status_var.set("Processing...")
-        self._root.update()
-        
         try:
             if "Text Classification" in selected_model:
                 self._process_text()
@@ -187,7 +366,7 @@ class MainApplication:
     
     def _process_text(self):
         """
-        It processes text input using the text classification model.
+        It queues text input for the text classification model.
         """
         input_text = self._text_input.get("1.0", tk.END).strip()
         
@@ -196,8 +375,20 @@ class MainApplication:
             self._status_var.set("Ready")
             return
         
-        result = self._text_model.process_input(input_text)
-        
+        self._submit_job("text", self._run_text_model, input_text, self._show_text_result)
+    
+    def _run_text_model(self, input_text):
+        """
+        It runs on the worker thread, making sure the shared text model is loaded through the registry
+        and pinned there until the call returns.
+        """
+        with self._registry.using(self._text_model_name):
+            return self._text_model.process_input(input_text)
+    
+    def _show_text_result(self, result):
+        """
+        It displays the text classification result in the output area.
+        """
         self._output_text.delete("1.0", tk.END)
         
         if "error" in result:
@@ -210,11 +401,115 @@ class MainApplication:
             output += f"Input Text:\n{result['text']}\n\n"
             output += f"Sentiment: {result['sentiment']}\n"
             output += f"Confidence Score: {result['confidence']:.4f} ({result['confidence']*100:.2f}%)\n"
+            if "num_windows" in result:
+                output += f"Long document scored over {result['num_windows']} overlapping windows\n"
             output += "\n" + "=" * 60 + "\n"
             
             self._output_text.insert(tk.END, output)
             self._status_var.set("Processing complete")
     
+    def _submit_job(self, lane, func, input_data, on_result):
+        """
+        It queues a model call on the lane's scheduler thread so inference runs off the Tk main thread.
+        """
+        with self._jobs_lock:
+            self._job_counter += 1
+            job_id = self._job_counter
+        
+        try:
+            self._scheduler.submit(lane, self._run_job, (job_id, func, input_data, on_result),
+                                   priority=PRIORITY_INTERACTIVE)
+        except QueueFull:
+            messagebox.showwarning("Busy", "Too many jobs are queued. Please wait for some to finish.")
+            return
+        
+        with self._jobs_lock:
+            self._pending_job_ids.add(job_id)
+            pending = len(self._pending_job_ids)
+        self._progress_bar.start(10)
+        self._cancel_button.config(state=tk.NORMAL)
+        self._status_var.set(f"Processing... ({pending} job(s) queued)")
+    
+    def _run_job(self, job):
+        """
+        It runs one queued model call on a scheduler thread, skipping it if it was cancelled.
+        """
+        job_id, func, input_data, on_result = job
+        with self._jobs_lock:
+            if job_id in self._cancelled_jobs:
+                self._cancelled_jobs.discard(job_id)
+                return
+        self._current_job.job_id = job_id
+        try:
+            result = func(input_data)
+        except Exception as e:
+            result = {"error": str(e)}
+        self._result_queue.put((job_id, on_result, result))
+    
+    def _poll_results(self):
+        """
+        It moves finished results from the worker thread onto the GUI and reschedules itself.
+        """
+        self._drain_stream_queue()
+        try:
+            while True:
+                job_id, on_result, result = self._result_queue.get_nowait()
+                with self._jobs_lock:
+                    cancelled = job_id in self._cancelled_jobs
+                    self._cancelled_jobs.discard(job_id)
+                    self._pending_job_ids.discard(job_id)
+                    pending = len(self._pending_job_ids)
+                if not cancelled:
+                    on_result(result)
+                    if pending:
+                        self._status_var.set(f"Processing... ({pending} job(s) queued)")
+                self._update_job_controls(pending)
+        except queue.Empty:
+            pass
+        
+        self._refresh_model_states()
+        self._root.after(self.POLL_INTERVAL_MS, self._poll_results)
+    
+    def _drain_stream_queue(self):
+        """
+        It appends caption pieces streamed by the worker thread to the output area.
+        """
+        try:
+            while True:
+                job_id, text = self._stream_queue.get_nowait()
+                with self._jobs_lock:
+                    if job_id in self._cancelled_jobs:
+                        continue
+                if job_id != self._streaming_job_id:
+                    self._streaming_job_id = job_id
+                    self._output_text.delete("1.0", tk.END)
+                    self._output_text.insert(tk.END, "Generating caption: ")
+                self._output_text.insert(tk.END, text)
+                self._output_text.see(tk.END)
+        except queue.Empty:
+            pass
+    
+    def _update_job_controls(self, pending):
+        """
+        It stops the progress bar and disables Cancel once no jobs are left.
+        """
+        if pending <= 0:
+            self._progress_bar.stop()
+            self._cancel_button.config(state=tk.DISABLED)
+    
+    @log_method_calls
+    def _cancel_jobs(self):
+        """
+        It cancels every queued job and discards the result of the one currently running.
+        """
+        with self._jobs_lock:
+            cancelled = set(self._pending_job_ids)
+            self._cancelled_jobs.update(cancelled)
+            self._pending_job_ids.clear()
+        
+        self._update_job_controls(0)
+        self._status_var.set(f"Cancelled {len(cancelled)} job(s)")
+    
     @log_method_calls
     def _browse_image(self):
       
@@ -239,8 +534,39 @@ class MainApplication:
             self._status_var.set("Ready")
             return
         
-        result = self._image_model.process_input(image_path)
+        try:
+            options = {
+                "max_new_tokens": int(self._max_tokens_var.get()),
+                "num_beams": int(self._num_beams_var.get())
+            }
+        except (tk.TclError, ValueError):
+            messagebox.showwarning("Warning", "Max new tokens and beams must be whole numbers.")
+            return
+        prompt = self._prompt_var.get().strip()
+        if prompt:
+            options["prompt"] = prompt
         
+        self._submit_job("image", self._run_image_model, (image_path, options), self._show_image_result)
+    
+    def _run_image_model(self, request):
+        """
+        It runs on the worker thread, making sure the shared image model is loaded through the registry
+        and pinned there until the call returns.
+        Caption pieces are streamed back through the stream queue as they are generated.
+        """
+        image_path, options = request
+        job_id = self._current_job.job_id
+        with self._registry.using(self._image_model_name):
+            return self._image_model.process_input(
+                image_path,
+                on_token=lambda text: self._stream_queue.put((job_id, text)),
+                **options
+            )
+    
+    def _show_image_result(self, result):
+        """
+        It displays the image captioning result in the output area.
+        """
         self._output_text.delete("1.0", tk.END)
         
         if "error" in result:
@@ -253,6 +579,13 @@ class MainApplication:
             output += f"Image File: {result['image_path'].split('/')[-1]}\n"
             output += f"Full Path: {result['image_path']}\n\n"
             output += f"Generated Caption:\n\"{result['caption']}\"\n"
+            if "latency_ms" in result:
+                output += f"\nTime to first token: {result['time_to_first_token_ms']:.0f} ms\n"
+                output += f"Total latency: {result['latency_ms']:.0f} ms\n"
+            if "vision_cache_hit" in result:
+                stats = self._image_model.get_vision_cache_stats()
+                output += (f"Vision features: {'cached' if result['vision_cache_hit'] else 'computed'} "
+                           f"(cache hit rate {stats['hit_rate']:.0%}, {stats['entries']} images)\n")
             output += "\n" + "=" * 60 + "\n"
             
             self._output_text.insert(tk.END, output)
@@ -266,9 +599,12 @@ class MainApplication:
         self._status_var.set("Output cleared")
     
     def _create_oop_explanation_tab(self):
-       
-        oop_frame = ttk.Frame(self._notebook)
-        self._notebook.add(oop_frame, text="OOP Concepts Explanation")
+        """
+        It adds the OOP explanation tab, built on first selection.
+        """
+        self._add_deferred_tab("OOP Concepts Explanation", self._build_oop_explanation_tab)
+    
+    def _build_oop_explanation_tab(self, oop_frame):
         
       
         title_label = ttk.Label(oop_frame, 
@@ -384,14 +720,96 @@ It provides for consistency across types of models.
         explanation_area.config(state=tk.DISABLED)  # Make read-only
         scroll.config(command=explanation_area.yview)
     
-    def _create_model_info_tab(self):
+    def _create_batch_tab(self):
         """
-        It creates the tab to display the information about the AI models used.
+        It adds the batch results tab, built on first selection.
+        """
+        self._add_deferred_tab("Batch Results", self._build_batch_tab)
+    
+    def _build_batch_tab(self, batch_frame):
+        """
+        It fills in the batch tab, which runs its batches through the same scheduler as the first tab.
+        """
+        model_names = {"text": self._text_model_name, "image": self._image_model_name}
+        self._batch_tab = BatchResultsTab(batch_frame, self._root, self._scheduler,
+                                          lambda kind: self._registry.using(model_names[kind]))
+    
+    def _create_performance_tab(self):
+        """
+        It adds the live performance tab, built on first selection.
+        """
+        self._add_deferred_tab("Performance", self._build_performance_tab)
+    
+    def _build_performance_tab(self, perf_frame):
+        """
+        It fills in the performance tab: a per-model, per-stage latency table refreshed every second.
+        """
+        title_label = ttk.Label(perf_frame, 
+                               text="Per-Stage Latency Metrics",
+                               font=('Arial', 14, 'bold'))
+        title_label.pack(pady=10)
         
+        columns = ("model", "stage", "count", "errors", "p50", "p95", "p99", "throughput")
+        headings = ("Model", "Stage", "Calls", "Errors", "p50 (ms)", "p95 (ms)", "p99 (ms)", "Items/sec")
+        self._metrics_tree = ttk.Treeview(perf_frame, columns=columns, show="headings", height=15)
+        for column, heading in zip(columns, headings):
+            self._metrics_tree.heading(column, text=heading)
+            self._metrics_tree.column(column, width=260 if column == "model" else 80, anchor=tk.W)
+        self._metrics_tree.pack(padx=20, pady=10, fill=tk.BOTH, expand=True)
+        
+        button_frame = ttk.Frame(perf_frame)
+        button_frame.pack(fill=tk.X, padx=20, pady=5)
+        ttk.Button(button_frame, text="Export JSON...", 
+                  command=lambda: self._export_metrics(".json")).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Export Prometheus...", 
+                  command=lambda: self._export_metrics(".prom")).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Reset", 
+                  command=get_metrics_registry().reset).pack(side=tk.LEFT, padx=5)
+        
+        self._refresh_metrics_view()
+    
+    def _refresh_metrics_view(self):
         """
-        info_frame = ttk.Frame(self._notebook)
-        self._notebook.add(info_frame, text="AI Model Information")
+        It redraws the metrics table while the performance tab is visible and reschedules itself.
+        """
+        if self._notebook.tab(self._notebook.select(), "text") == "Performance":
+            self._metrics_tree.delete(*self._metrics_tree.get_children())
+            for model_name, stages in get_metrics_registry().snapshot().items():
+                for stage in STAGES:
+                    if stage not in stages:
+                        continue
+                    stats = stages[stage]
+                    self._metrics_tree.insert("", tk.END, values=(
+                        model_name, stage, stats["count"], stats["errors"],
+                        stats["p50_ms"], stats["p95_ms"], stats["p99_ms"], stats["items_per_sec"]
+                    ))
+        self._root.after(1000, self._refresh_metrics_view)
+    
+    @log_method_calls
+    def _export_metrics(self, extension):
+        """
+        It saves the current metrics as a JSON snapshot or a Prometheus text file.
+        """
+        file_path = filedialog.asksaveasfilename(
+            title="Export metrics",
+            defaultextension=extension,
+            filetypes=[("JSON snapshot", "*.json"), ("Prometheus text", "*.prom"), ("All files", "*.*")]
+        )
+        if file_path:
+            get_metrics_registry().export(file_path)
+            self._status_var.set(f"Metrics exported to {file_path.split('/')[-1]}")
+    
+    def _create_model_info_tab(self):
+        """
+        It adds the tab to display the information about the AI models used, built on first selection.
+        """
+        self._add_deferred_tab("AI Model Information", self._build_model_info_tab)
+    
+    def _build_model_info_tab(self, info_frame):
+        """
+        It fills in the model information tab.
         
+        """
        
         title_label = ttk.Label(info_frame, 
                                text="Hugging Face AI Models Information",
@@ -1,13 +1,651 @@
-import tkinter as tk
-from gui.main_window import MainApplication
+import time
 
-def main():
+_PROCESS_START = time.perf_counter()
+
+import argparse
+import contextlib
+import json
+import sys
+
+
+def main(argv=None):
     """
     This is the main entry point for the application.
+    With no arguments it starts the GUI; a subcommand runs headless instead.
     """
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        run_gui()
+        return 0
+    if argv[0] in ("--prewarm", "--results-db"):
+        argv = ["gui"] + list(argv)
+
+    args = build_parser().parse_args(argv)
+    return args.handler(args)
+
+
+def run_gui(args=None):
+    """
+    It starts the Tkinter GUI.
+    """
+    import tkinter as tk
+    from gui.main_window import MainApplication
+
+    from models.text_classifier import TextClassifierModel
+    from models.image_captioner import ImageCaptionerModel
+    from utlis.profiling import arm_from_environment
+
+    arm_from_environment({"text": TextClassifierModel, "image": ImageCaptionerModel})
+    prewarm = getattr(args, "prewarm", None)
     root = tk.Tk()
-    app = MainApplication(root)
+    app = MainApplication(root, prewarm=prewarm, results_db=getattr(args, "results_db", None))
     root.mainloop()
+    return 0
+
+
+def build_parser():
+    """
+    It builds the command line parser for the headless subcommands.
+    """
+    parser = argparse.ArgumentParser(description="AI Model Integration - headless batch mode")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    gui = subparsers.add_parser("gui", help="Start the GUI (the default with no arguments)")
+    gui.add_argument("--prewarm", nargs="*", choices=["text", "image"], default=None,
+                     help="Load and warm up these models in the background at startup (default: both)")
+    gui.add_argument("--results-db", nargs="?", const="", default=None, metavar="PATH",
+                     help="Keep every result in this results database and answer repeats from it "
+                          "(no PATH: HIT137_RESULTS_DB or ~/.cache/hit137/results.db; default: off)")
+    gui.set_defaults(handler=_run_gui_command)
+
+    classify = subparsers.add_parser("classify", help="Sentiment analysis over a JSONL or text file")
+    classify.add_argument("--input", required=True, help="JSONL or text file, one input per line ('-' for stdin)")
+    classify.add_argument("--format", choices=["auto", "jsonl", "text"], default="auto",
+                          help="Input line format (default: auto)")
+    classify.add_argument("--document", action="store_true",
+                          help="Score each input as a whole document with overlapping 512-token windows")
+    classify.add_argument("--windows", action="store_true",
+                          help="With --document, include per-window scores in the output")
+    classify.add_argument("--backend", choices=["eager", "torchscript", "onnx"], default="eager",
+                          help="Inference backend; falls back to eager if it cannot load")
+    classify.add_argument("--cascade", metavar="PATH",
+                          help="First-stage n-gram model from cascade-train; only texts it is unsure of "
+                               "go to DistilBERT")
+    classify.add_argument("--cascade-threshold", type=float, default=0.9,
+                          help="First-stage confidence needed to skip DistilBERT (default: 0.9)")
+    classify.add_argument("--cascade-audit", type=float, default=0.02,
+                          help="Share of first-stage answers also checked with DistilBERT (default: 0.02)")
+    classify.set_defaults(handler=run_classify)
+
+    cascade = subparsers.add_parser("cascade-train",
+                                    help="Distil a fast n-gram first stage from DistilBERT's labels")
+    cascade.add_argument("--input", required=True, help="JSONL or text file of training texts, one per line")
+    cascade.add_argument("--format", choices=["auto", "jsonl", "text"], default="auto",
+                         help="Input line format (default: auto)")
+    cascade.add_argument("--output", required=True, help="Where to write the first-stage model (JSON)")
+    cascade.add_argument("--epochs", type=int, default=5, help="Training passes over the texts")
+    cascade.add_argument("--holdout", type=float, default=0.1,
+                         help="Share of texts kept out of training for the threshold report")
+    cascade.add_argument("--limit", type=int, default=None, help="Use at most this many texts")
+    cascade.set_defaults(handler=run_cascade_train)
+
+    caption = subparsers.add_parser("caption", help="Image captioning over a directory or glob pattern")
+    caption.add_argument("--input", required=True, help="Directory tree or glob pattern of image files")
+    caption.add_argument("--max-new-tokens", type=int, default=None, help="Longest caption to generate")
+    caption.add_argument("--num-beams", type=int, default=1, help="Beam search width (1 = greedy)")
+    caption.add_argument("--prompt", default=None, help="Text every caption continues from (conditional captioning)")
+    caption.add_argument("--stream", action="store_true",
+                         help="Caption one image at a time and print tokens to stderr as they are generated")
+    caption.add_argument("--workers", type=int, default=1,
+                         help="Caption on this many worker processes sharing one copy of the weights")
+    caption.add_argument("--torch-threads", type=int, default=None,
+                         help="Torch threads per worker (default: cores divided by workers)")
+    caption.set_defaults(handler=run_caption)
+
+    sync = subparsers.add_parser("caption-sync",
+                                 help="Caption only the new or changed images in a directory, tracked by a manifest")
+    sync.add_argument("--input", required=True, help="Image directory tree to keep in sync")
+    sync.add_argument("--manifest", help="Manifest database (default: .captions-manifest.db inside --input)")
+    sync.add_argument("--output", default="-", help="Write new caption results as JSONL here ('-' for stdout)")
+    sync.add_argument("--batch-size", type=int, default=16, help="Images per model batch")
+    sync.add_argument("--scan-workers", type=int, default=8, help="Threads listing, validating and hashing files")
+    sync.add_argument("--workers", type=int, default=1, help="Caption worker processes sharing the model weights")
+    sync.add_argument("--max-new-tokens", type=int, default=None, help="Longest caption to generate")
+    sync.add_argument("--num-beams", type=int, default=1, help="Beam search width (1 = greedy)")
+    sync.add_argument("--prompt", default=None,
+                      help="Text every caption continues from (conditional captioning); images captioned "
+                           "with another prompt or settings are captioned again")
+    sync.set_defaults(handler=run_caption_sync)
+
+    scaling = subparsers.add_parser("caption-scaling", help="Report captioning images/sec against worker count")
+    scaling.add_argument("--input", required=True, help="Directory tree or glob pattern of image files")
+    scaling.add_argument("--workers", type=int, nargs="+", help="Worker counts to try (default: 1, 2, 4, ...)")
+    scaling.add_argument("--torch-threads", type=int, default=None, help="Torch threads per worker")
+    scaling.add_argument("--limit", type=int, default=64, help="Number of images to caption per run")
+    scaling.set_defaults(handler=run_caption_scaling)
+
+    serve = subparsers.add_parser("serve", help="Local HTTP inference server with micro-batching")
+    serve.add_argument("--host", default="127.0.0.1", help="Address to bind (default: localhost only)")
+    serve.add_argument("--port", type=int, default=8000, help="Port to listen on")
+    serve.add_argument("--max-batch-size", type=int, default=16, help="Largest batch sent to a model")
+    serve.add_argument("--max-wait-ms", type=float, default=10.0,
+                       help="How long to wait for more requests before running a batch")
+    serve.add_argument("--deadline-ms", type=float, default=30000.0,
+                       help="Default per-request deadline when a request does not set one")
+    serve.add_argument("--max-queue", type=int, default=256,
+                       help="Requests a model may have queued before new ones get 503")
+    serve.add_argument("--thread-budget", type=int, default=None,
+                       help="Torch threads shared by the two models (default: all cores)")
+    serve.add_argument("--text-model-path", default=None,
+                       help="Local DistilBERT checkpoint directory to serve instead of the hub model")
+    serve.add_argument("--image-model-path", default=None,
+                       help="Local BLIP checkpoint directory to serve instead of the hub model")
+    serve.add_argument("--tiny", action="store_true",
+                       help="Serve the tiny stand-in checkpoints the benchmarks use (offline smoke tests)")
+    serve.set_defaults(handler=run_serve)
+
+    precision = subparsers.add_parser("precision-report",
+                                      help="Compare accuracy, memory and latency of fp32/int8/bf16")
+    precision.add_argument("--model", choices=["text", "image"], default="text", help="Model to evaluate")
+    precision.add_argument("--samples", help="Text file (one input per line) or image directory/glob; "
+                                             "the text model has a built-in fixed sample")
+    precision.add_argument("--modes", nargs="+", choices=["fp32", "int8", "bf16"],
+                           default=["fp32", "int8", "bf16"], help="Precision modes to compare")
+    precision.add_argument("--output", help="Write the report as JSON to this file")
+    precision.set_defaults(handler=run_precision_report)
+
+    parity = subparsers.add_parser("backend-parity",
+                                   help="Check exported text classifier backends against eager outputs")
+    parity.add_argument("--samples", help="Text file with one input per line (default: built-in sample)")
+    parity.add_argument("--backends", nargs="+", choices=["torchscript", "onnx"],
+                        default=["torchscript", "onnx"], help="Backends to check")
+    parity.add_argument("--tolerance", type=float, default=1e-3, help="Largest allowed confidence difference")
+    parity.set_defaults(handler=run_backend_parity)
+
+    startup = subparsers.add_parser("startup-time", help="Measure GUI import time and time to first paint")
+    startup.add_argument("--label", default="", help="Version label stored with the measurement")
+    startup.add_argument("--output", help="Append the measurement as a JSON line to this file")
+    startup.set_defaults(handler=run_startup_time)
+
+    snapshot = subparsers.add_parser("snapshot",
+                                     help="Download models once and pin them as local safetensors snapshots")
+    snapshot.add_argument("--models", nargs="+", choices=["text", "image"], default=["text", "image"],
+                          help="Models to pin (default: both)")
+    snapshot.add_argument("--root", help="Snapshot directory (default: HIT137_MODEL_DIR or ~/.cache/hit137/models)")
+    snapshot.set_defaults(handler=run_snapshot)
+
+    load_time = subparsers.add_parser("load-time", help="Load each model once and report load time and RSS")
+    load_time.add_argument("--models", nargs="+", choices=["text", "image"], default=["text", "image"],
+                           help="Models to load (default: both)")
+    load_time.set_defaults(handler=run_load_time)
+
+    export = subparsers.add_parser("export-results", help="Stream stored results to CSV or JSONL")
+    export.add_argument("--db", default=None, help="Results database (default: HIT137_RESULTS_DB or "
+                                                    "~/.cache/hit137/results.db)")
+    export.add_argument("--output", required=True, help="Destination file; .csv for CSV, anything else for JSONL")
+    export.add_argument("--model", help="Only rows from this model name")
+    export.add_argument("--label", help="Only rows with this label (e.g. POSITIVE)")
+    export.add_argument("--since", type=float, help="Only rows created at or after this Unix timestamp")
+    export.set_defaults(handler=run_export_results)
+
+    benchmark = subparsers.add_parser("benchmark",
+                                      help="Offline latency/throughput benchmark on tiny stand-in models")
+    benchmark.add_argument("--models", nargs="+", choices=["text", "image"], default=["text", "image"],
+                           help="Models to benchmark (default: both)")
+    benchmark.add_argument("--threads", type=int, nargs="+", help="Torch thread counts (default: 1 and all cores)")
+    benchmark.add_argument("--repeats", type=int, default=None, help="Timed single-item calls per thread count")
+    benchmark.add_argument("--output", default="-", help="Write the results as JSON here ('-' for stdout)")
+    benchmark.add_argument("--baseline", help="Results JSON to compare against; exits 1 on a regression")
+    benchmark.add_argument("--threshold", type=float, default=0.2,
+                           help="Allowed slowdown against the baseline as a fraction (default: 0.2)")
+    benchmark.add_argument("--update-baseline", action="store_true",
+                           help="Write the results to --baseline instead of comparing with it")
+    benchmark.set_defaults(handler=run_benchmark)
+
+    for subparser in (classify, caption):
+        subparser.add_argument("--output", default="-", help="JSONL output file ('-' for stdout)")
+        subparser.add_argument("--batch-size", type=int, default=16, help="Inputs per model batch")
+        subparser.add_argument("--offset", type=int, default=0, help="Skip this many inputs before starting")
+        subparser.add_argument("--resume", action="store_true",
+                               help="Continue after the lines already in --output and append to it")
+        subparser.add_argument("--metrics-out",
+                               help="Write per-stage latency metrics here at the end "
+                                    "(.prom/.txt for Prometheus text, anything else for JSON)")
+        subparser.add_argument("--results-db", nargs="?", const="", default=None, metavar="PATH",
+                               help="Answer inputs already in this results database from it and record new "
+                                    "results there (no PATH: HIT137_RESULTS_DB or ~/.cache/hit137/results.db)")
+        subparser.add_argument("--profile", type=int, default=0, metavar="N",
+                               help="Profile the first N model calls with cProfile and torch.profiler "
+                                    "(also settable with HIT137_PROFILE=text:N or image:N)")
+        subparser.add_argument("--profile-dir", default=None,
+                               help="Directory for .pstats and Chrome trace files (default: ./profiles)")
+
+    return parser
+
+
+def _run_gui_command(args):
+    if args.prewarm == []:
+        args.prewarm = ["text", "image"]
+    return run_gui(args)
+
+
+def run_classify(args):
+    """
+    It streams text inputs through the text classification model and writes JSONL results.
+    """
+    from models.text_classifier import TextClassifierModel
+    from utlis.batch_pipeline import read_text_inputs
+
+    offset = _resolve_offset(args)
+    inputs = read_text_inputs(args.input, args.format, offset)
+    model = TextClassifierModel(backend=args.backend)
+    _arm_profiling(args, "text", TextClassifierModel, "process_document" if args.document else "process_batch")
+    if args.document:
+        return _run_documents(model, inputs, args, offset)
+    if args.cascade:
+        from models.cascade import CascadeModel, HashedNgramClassifier
+
+        model = CascadeModel(model, HashedNgramClassifier.load(args.cascade),
+                             args.cascade_threshold, args.cascade_audit)
+        status = _run_pipeline(model, inputs, args, offset)
+        print(f"Cascade: {json.dumps(model.get_cascade_stats())}", file=sys.stderr)
+        return status
+    return _run_pipeline(model, inputs, args, offset)
+
+
+def run_cascade_train(args):
+    """
+    It labels the training texts with DistilBERT, trains the n-gram first stage on those labels,
+    saves it and prints how much traffic it would answer, and how accurately, at several thresholds.
+    """
+    from itertools import islice
+    from models.cascade import distill_first_stage
+    from models.text_classifier import TextClassifierModel
+    from utlis.batch_pipeline import read_text_inputs
+
+    texts = list(islice(read_text_inputs(args.input, args.format), args.limit))
+    with contextlib.redirect_stdout(sys.stderr):
+        classifier, report = distill_first_stage(TextClassifierModel(), texts, epochs=args.epochs,
+                                                 holdout=args.holdout)
+    classifier.save(args.output)
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+def run_caption(args):
+    """
+    It streams image paths through the image captioning model and writes JSONL results.
+    """
+    from models.image_captioner import ImageCaptionerModel
+    from utlis.batch_pipeline import read_image_inputs
+
+    offset = _resolve_offset(args)
+    inputs = read_image_inputs(args.input, offset)
+    options = {"max_new_tokens": args.max_new_tokens, "num_beams": args.num_beams}
+    if args.prompt:
+        options["prompt"] = args.prompt
+    _arm_profiling(args, "image", ImageCaptionerModel, "process_input" if args.stream else "process_batch")
+    if args.stream:
+        return _run_streaming(ImageCaptionerModel(), inputs, args, offset, options)
+    if args.workers > 1:
+        from models.caption_pool import CaptionProcessPool
+
+        with contextlib.redirect_stdout(sys.stderr):
+            pool = CaptionProcessPool(args.workers, args.torch_threads)
+        with pool:
+            return _run_pipeline(pool, inputs, args, offset, options)
+    return _run_pipeline(ImageCaptionerModel(), inputs, args, offset, options)
+
+
+def _run_documents(model, inputs, args, offset):
+    from utlis.batch_pipeline import run_each, write_jsonl, ThroughputStats
+
+    stats = ThroughputStats()
+    with contextlib.redirect_stdout(sys.stderr):
+        results = run_each(model.process_document, inputs, return_windows=args.windows)
+        write_jsonl(results, args.output, append=args.resume, stats=stats)
+
+    print(f"Started at input offset {offset}. {stats.summary()}", file=sys.stderr)
+    _export_metrics(args)
+    return 0
+
+
+def _run_streaming(model, inputs, args, offset, options):
+    from utlis.batch_pipeline import run_streaming, write_jsonl, ThroughputStats
+
+    def print_token(text):
+        sys.__stderr__.write(text)
+        sys.__stderr__.flush()
+
+    def with_newline(results):
+        for result in results:
+            sys.__stderr__.write("\n")
+            yield result
+
+    stats = ThroughputStats()
+    with contextlib.redirect_stdout(sys.stderr):
+        results = run_streaming(model, inputs, print_token, **options)
+        write_jsonl(with_newline(results), args.output, append=args.resume, stats=stats)
+
+    print(f"Started at input offset {offset}. {stats.summary()}", file=sys.stderr)
+    _export_metrics(args)
+    return 0
+
+
+def run_caption_sync(args):
+    """
+    It brings a directory's caption manifest up to date, captioning only new or changed images.
+    """
+    import os
+    from models.caption_sync import CaptionManifest, sync_directory, MANIFEST_NAME
+    from models.image_captioner import ImageCaptionerModel
+    from utlis.batch_pipeline import write_jsonl
+
+    manifest = CaptionManifest(args.manifest or os.path.join(args.input, MANIFEST_NAME))
+    options = {"max_new_tokens": args.max_new_tokens, "num_beams": args.num_beams}
+    if args.prompt:
+        options["prompt"] = args.prompt
+    new_results = []
+
+    def collect(result):
+        new_results.append(result)
+        if len(new_results) >= args.batch_size:
+            write_jsonl(new_results, args.output, append=True)
+            new_results.clear()
+
+    if args.output != "-" and os.path.exists(args.output):
+        os.remove(args.output)  # collect() appends, so start from an empty file
+    start_time = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(sys.stderr):
+            if args.workers > 1:
+                from models.caption_pool import CaptionProcessPool
+
+                with CaptionProcessPool(args.workers) as pool:
+                    stats = sync_directory(pool, args.input, manifest, args.batch_size, args.scan_workers,
+                                           on_result=collect, **options)
+            else:
+                stats = sync_directory(ImageCaptionerModel(), args.input, manifest, args.batch_size,
+                                       args.scan_workers, on_result=collect, **options)
+        write_jsonl(new_results, args.output, append=True)
+    finally:
+        manifest.close()
+
+    print(f"Synced {args.input} in {time.perf_counter() - start_time:.2f} seconds: "
+          + ", ".join(f"{count} {name}" for name, count in stats.items()), file=sys.stderr)
+    return 0
+
+
+def run_caption_scaling(args):
+    """
+    It captions the same images with each worker count and prints images/sec for each.
+    """
+    from itertools import islice
+    from models.caption_pool import scaling_report
+    from utlis.batch_pipeline import read_image_inputs
+
+    image_paths = list(islice(read_image_inputs(args.input), args.limit))
+    with contextlib.redirect_stdout(sys.stderr):
+        report = scaling_report(image_paths, args.workers, args.torch_threads)
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+def run_serve(args):
+    """
+    It starts the local HTTP inference server and serves until interrupted.
+    """
+    from models.text_classifier import TextClassifierModel
+    from models.image_captioner import ImageCaptionerModel
+    from server.inference_server import InferenceServer
+
+    text_model_path, image_model_path = args.text_model_path, args.image_model_path
+    if args.tiny:
+        import os
+        import tempfile
+        from models.tiny_models import build_tiny_text_model, build_tiny_caption_model
+
+        work_dir = tempfile.mkdtemp(prefix="hit137-serve-")
+        text_model_path = text_model_path or build_tiny_text_model(os.path.join(work_dir, "tiny-distilbert"))
+        image_model_path = image_model_path or build_tiny_caption_model(os.path.join(work_dir, "tiny-blip"))
+
+    server = InferenceServer(TextClassifierModel(model_path=text_model_path),
+                             ImageCaptionerModel(model_path=image_model_path),
+                             host=args.host, port=args.port,
+                             max_batch_size=args.max_batch_size,
+                             max_wait_ms=args.max_wait_ms,
+                             default_deadline_ms=args.deadline_ms,
+                             max_queue_size=args.max_queue,
+                             thread_budget=args.thread_budget)
+    host, port = server.address
+    print(f"Serving on http://{host}:{port}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+    return 0
+
+
+def run_precision_report(args):
+    """
+    It runs the fixed sample through each precision mode and prints the comparison report.
+    """
+    from models.precision import evaluate_precision_modes, DEFAULT_TEXT_SAMPLES
+    from utlis.batch_pipeline import read_text_inputs, read_image_inputs
+
+    if args.model == "text":
+        from models.text_classifier import TextClassifierModel as model_class
+        samples = list(read_text_inputs(args.samples)) if args.samples else DEFAULT_TEXT_SAMPLES
+        compare_key = "sentiment"
+    else:
+        from models.image_captioner import ImageCaptionerModel as model_class
+        if not args.samples:
+            print("--samples is required for the image model", file=sys.stderr)
+            return 2
+        samples = list(read_image_inputs(args.samples))
+        compare_key = "caption"
+
+    with contextlib.redirect_stdout(sys.stderr):
+        report = evaluate_precision_modes(model_class, samples, args.modes, compare_key)
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+def run_backend_parity(args):
+    """
+    It compares each exported backend with eager PyTorch and exits non-zero if any check fails.
+    """
+    from models.backends import check_backend_parity
+    from models.precision import DEFAULT_TEXT_SAMPLES
+    from models.text_classifier import TextClassifierModel
+    from utlis.batch_pipeline import read_text_inputs
+
+    samples = list(read_text_inputs(args.samples)) if args.samples else DEFAULT_TEXT_SAMPLES
+    with contextlib.redirect_stdout(sys.stderr):
+        report = check_backend_parity(TextClassifierModel, samples, args.backends, args.tolerance)
+
+    print(json.dumps(report, indent=2))
+    return 0 if all(entry["passed"] for entry in report.values()) else 1
+
+
+def run_startup_time(args):
+    """
+    It opens the GUI once, records how long the imports and the first paint took, then closes it.
+    """
+    import_start = time.perf_counter()
+    import tkinter as tk
+    from gui.main_window import MainApplication
+    import_seconds = time.perf_counter() - import_start
+
+    root = tk.Tk()
+    app = MainApplication(root)
+    root.update()
+    first_paint_seconds = time.perf_counter() - _PROCESS_START
+    root.destroy()
+
+    record = {
+        "label": args.label,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": sys.version.split()[0],
+        "import_seconds": round(import_seconds, 4),
+        "first_paint_seconds": round(first_paint_seconds, 4),
+        "torch_imported": "torch" in sys.modules,
+        "transformers_imported": "transformers" in sys.modules
+    }
+    print(json.dumps(record))
+    if args.output:
+        with open(args.output, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+    return 0
+
+
+def _model_classes():
+    from models.text_classifier import TextClassifierModel
+    from models.image_captioner import ImageCaptionerModel
+
+    return {"text": TextClassifierModel, "image": ImageCaptionerModel}
+
+
+def run_snapshot(args):
+    """
+    It pins a local snapshot of each model, so later loads need no network.
+    """
+    from models.snapshots import pin_snapshot
+
+    classes = _model_classes()
+    for key in args.models:
+        with contextlib.redirect_stdout(sys.stderr):
+            directory = pin_snapshot(classes[key](), args.root)
+        print(f"Pinned {key} model to {directory}")
+    return 0
+
+
+def run_load_time(args):
+    """
+    It loads each model in turn and prints where it loaded from, how long it took and the RSS change.
+    Each model is loaded in the same process, so run one model at a time for a cold-start figure.
+    """
+    classes = _model_classes()
+    report = {}
+    for key in args.models:
+        model = classes[key]()
+        with contextlib.redirect_stdout(sys.stderr):
+            model.load_model()
+        report[key] = model.load_report if model.is_loaded else {"error": "Model failed to load"}
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+def run_export_results(args):
+    """
+    It streams rows from the results database to a CSV or JSONL file.
+    """
+    from models.results_store import ResultsStore
+
+    store = ResultsStore(args.db)
+    try:
+        written = store.export(args.output, model_name=args.model, label=args.label, since=args.since)
+    finally:
+        store.close()
+    print(f"Exported {written} results to {args.output}", file=sys.stderr)
+    return 0
+
+
+def run_benchmark(args):
+    """
+    It runs the offline benchmark suite, writes the results and checks them against a baseline.
+    """
+    from models.benchmark import run_benchmarks, compare_to_baseline, load_results
+
+    try:
+        with contextlib.redirect_stdout(sys.stderr):
+            results = run_benchmarks(args.models, thread_counts=args.threads, repeats=args.repeats)
+    except RuntimeError as e:
+        # A model that fails to load or returns errors has no meaningful timings to report.
+        print(f"Benchmark run invalid: {str(e)}", file=sys.stderr)
+        return 2
+
+    text = json.dumps(results, indent=2)
+    if args.output == "-":
+        print(text)
+    else:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+
+    if not args.baseline:
+        return 0
+    if args.update_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+        print(f"Baseline written to {args.baseline}", file=sys.stderr)
+        return 0
+
+    regressions = compare_to_baseline(results, load_results(args.baseline), args.threshold)
+    for regression in regressions:
+        print(f"REGRESSION {regression['metric']}: {regression['baseline']} -> {regression['current']} "
+              f"({regression['change']:+.1%})", file=sys.stderr)
+    if regressions:
+        return 1
+    print(f"No metric regressed by more than {args.threshold:.0%}", file=sys.stderr)
+    return 0
+
+
+def _export_metrics(args):
+    if getattr(args, "metrics_out", None):
+        from utlis.metrics import get_metrics_registry
+
+        get_metrics_registry().export(args.metrics_out)
+
+
+def _arm_profiling(args, key, model_class, method):
+    """
+    It arms profiling of the method the subcommand calls, from --profile and HIT137_PROFILE.
+    With --workers the profiles are written by the worker processes.
+    """
+    from utlis.profiling import arm_from_environment, get_profiler
+
+    with contextlib.redirect_stdout(sys.stderr):
+        arm_from_environment({key: model_class}, method=method)
+        if args.profile > 0:
+            get_profiler().arm(model_class, args.profile, args.profile_dir, method)
+
+
+def _resolve_offset(args):
+    from utlis.batch_pipeline import count_lines
+
+    if args.resume:
+        return args.offset + count_lines(args.output)
+    return args.offset
+
+
+def _run_pipeline(model, inputs, args, offset, options=None):
+    from utlis.batch_pipeline import batched, run_inference, write_jsonl, ThroughputStats
+
+    stats = ThroughputStats()
+    store = None
+    if args.results_db is not None:
+        from models.results_store import ResultsStore
+
+        store = ResultsStore(args.results_db or None)
+    # Model log lines go to stderr so stdout carries only JSONL results.
+    try:
+        with contextlib.redirect_stdout(sys.stderr):
+            results = run_inference(model, batched(inputs, args.batch_size), store=store, **(options or {}))
+            write_jsonl(results, args.output, append=args.resume, stats=stats)
+    finally:
+        if store is not None:
+            store.close()
+
+    print(f"Started at input offset {offset}. {stats.summary()}", file=sys.stderr)
+    _export_metrics(args)
+    return 0
+
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
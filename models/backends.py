@@ -0,0 +1,160 @@
+import os
+import re
+
+BACKENDS = ("eager", "torchscript", "onnx")
+
+
+def default_cache_dir():
+    """
+    It returns the directory exported graphs are cached in (HIT137_BACKEND_CACHE or ~/.cache/hit137/backends).
+    """
+    return os.environ.get("HIT137_BACKEND_CACHE",
+                          os.path.join(os.path.expanduser("~"), ".cache", "hit137", "backends"))
+
+
+def graph_path(cache_dir, fingerprint, extension):
+    """
+    It returns the cache file path for an exported graph of the model with this fingerprint.
+    """
+    safe_name = re.sub(r"[^A-Za-z0-9_.-]+", "_", fingerprint)
+    return os.path.join(cache_dir, f"{safe_name}.{extension}")
+
+
+def _logits_only(model):
+    """
+    It wraps a sequence classification model so it takes positional tensors and returns only logits,
+    which is the form tracing and ONNX export need.
+    """
+    import torch
+
+    class LogitsOnly(torch.nn.Module):
+        def __init__(self, wrapped):
+            super().__init__()
+            self.wrapped = wrapped
+
+        def forward(self, input_ids, attention_mask):
+            return self.wrapped(input_ids=input_ids, attention_mask=attention_mask, return_dict=False)[0]
+
+    return LogitsOnly(model).eval()
+
+
+def _example_inputs(tokenizer):
+    encoded = tokenizer(["An example sentence used to export the graph.", "Short one."],
+                        padding=True, return_tensors="pt")
+    return encoded["input_ids"], encoded["attention_mask"]
+
+
+def load_torchscript_runner(model, tokenizer, path):
+    """
+    It loads a traced TorchScript graph from path, tracing and saving it first if it is not cached.
+    Returns a callable mapping tokenizer output to float logits.
+    """
+    import torch
+
+    if os.path.exists(path):
+        traced = torch.jit.load(path)
+    else:
+        with torch.no_grad():
+            traced = torch.jit.trace(_logits_only(model), _example_inputs(tokenizer), strict=False)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        torch.jit.save(traced, path)
+
+    traced.eval()
+    try:
+        traced = torch.jit.optimize_for_inference(torch.jit.freeze(traced))
+    except RuntimeError:
+        pass  # Some graphs (e.g. quantized ones) cannot be frozen; run them as traced
+
+    def run(inputs):
+        with torch.no_grad():
+            return traced(inputs["input_ids"], inputs["attention_mask"]).float()
+
+    return run
+
+
+def load_onnx_runner(model, tokenizer, path):
+    """
+    It loads an ONNX graph from path with ONNX Runtime, exporting it first if it is not cached.
+    Returns a callable mapping tokenizer output to float logits.
+    """
+    import torch
+    import onnxruntime
+
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with torch.no_grad():
+            torch.onnx.export(
+                _logits_only(model), _example_inputs(tokenizer), tmp_path,
+                input_names=["input_ids", "attention_mask"],
+                output_names=["logits"],
+                dynamic_axes={
+                    "input_ids": {0: "batch", 1: "sequence"},
+                    "attention_mask": {0: "batch", 1: "sequence"},
+                    "logits": {0: "batch"}
+                },
+                opset_version=14
+            )
+        os.replace(tmp_path, path)
+
+    options = onnxruntime.SessionOptions()
+    options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+    session = onnxruntime.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+
+    def run(inputs):
+        feeds = {
+            "input_ids": inputs["input_ids"].numpy(),
+            "attention_mask": inputs["attention_mask"].numpy()
+        }
+        return torch.from_numpy(session.run(["logits"], feeds)[0]).float()
+
+    return run
+
+
+def load_runner(backend, model, tokenizer, fingerprint, cache_dir=None):
+    """
+    It returns a logits runner for a non-eager backend, exporting and caching the graph if needed.
+    Raises on failure so the caller can fall back to eager.
+    """
+    cache_dir = cache_dir or default_cache_dir()
+    if backend == "torchscript":
+        return load_torchscript_runner(model, tokenizer, graph_path(cache_dir, fingerprint, "pt"))
+    if backend == "onnx":
+        return load_onnx_runner(model, tokenizer, graph_path(cache_dir, fingerprint, "onnx"))
+    raise ValueError(f"Unknown backend '{backend}'")
+
+
+def check_backend_parity(model_class, samples, backends=("torchscript", "onnx"), tolerance=1e-3):
+    """
+    It runs the samples through the eager model and through each backend and compares the outputs.
+    A backend passes when every label matches and confidences differ by at most tolerance.
+    """
+    eager_model = model_class(backend="eager")
+    reference = eager_model.process_batch(list(samples))
+    eager_model.unload_model()
+
+    report = {}
+    for backend in backends:
+        model = model_class(backend=backend)
+        model.load_model()
+        if model.active_backend != backend:
+            report[backend] = {"passed": False, "error": f"Backend unavailable, fell back to {model.active_backend}"}
+            model.unload_model()
+            continue
+
+        outputs = model.process_batch(list(samples))
+        label_mismatches = 0
+        max_delta = 0.0
+        for expected, actual in zip(reference, outputs):
+            if expected.get("sentiment") != actual.get("sentiment"):
+                label_mismatches += 1
+            if "confidence" in expected and "confidence" in actual:
+                max_delta = max(max_delta, abs(expected["confidence"] - actual["confidence"]))
+
+        report[backend] = {
+            "passed": label_mismatches == 0 and max_delta <= tolerance,
+            "label_mismatches": label_mismatches,
+            "max_confidence_delta": max_delta
+        }
+        model.unload_model()
+    return report
@@ -1,20 +1,38 @@
 
 
+import gc
+import hashlib
+import time
 from abc import ABC, abstractmethod
+from utlis.memory import current_rss_bytes
+from .snapshots import find_snapshot, pretrained_options
 
 class BaseModel(ABC):
     """
     This is the abstract base class for AI models.
     """
     
-    def __init__(self, model_name, model_description):
+    STATE_NOT_LOADED = "not loaded"
+    STATE_LOADING = "loading"
+    STATE_WARMING = "warming"
+    STATE_READY = "ready"
+    STATE_FAILED = "failed"
+    
+    def __init__(self, model_name, model_description, revision="main", model_path=None):
         """
-        It initializes the base model with name and description.
+        It initializes the base model with name, description and hub revision.
+        model_path is a local directory to load the weights from instead of the hub checkpoint.
           """
         super().__init__() 
         self._model_name = model_name  
         self._model_description = model_description  
+        self._revision = revision
+        self._model_path = model_path
         self._is_loaded = False  
+        self._load_state = None
+        self._load_report = None
+        self._backend = "eager"
+        self._active_backend = "eager"
     
     @property
     def model_name(self):
@@ -31,6 +49,87 @@ class BaseModel(ABC):
         """
         return self._model_description
     
+    @property
+    def revision(self):
+        """
+        This is the getter for the model revision attribute.
+        """
+        return self._revision
+    
+    @property
+    def model_path(self):
+        """
+        This is the getter for the local weights directory, or None to load from the hub.
+        """
+        return self._model_path
+    
+    @property
+    def model_source(self):
+        """
+        This is the getter for what from_pretrained loads: the local directory if set, else the pinned
+        snapshot of this revision if there is one, else the hub name.
+        """
+        return self._model_path or find_snapshot(self._model_name, self._revision) or self._model_name
+    
+    @property
+    def load_report(self):
+        """
+        This is the getter for how the last load went: source, seconds and RSS before and after.
+        """
+        return self._load_report
+    
+    def pretrained_options(self, source):
+        """
+        It returns the from_pretrained keyword arguments for loading from source (see snapshots).
+        """
+        return pretrained_options(source, self._revision)
+    
+    def _start_load_report(self, source):
+        """
+        It notes the time and RSS at the start of a load; _finish_load_report completes the report.
+        """
+        self._load_report = {
+            "source": source,
+            "options": self.pretrained_options(source),
+            "rss_before_mb": round(current_rss_bytes() / (1024 * 1024), 1),
+            "_start": time.perf_counter()
+        }
+    
+    def _finish_load_report(self):
+        report = self._load_report
+        report["seconds"] = round(time.perf_counter() - report.pop("_start"), 3)
+        report["rss_after_mb"] = round(current_rss_bytes() / (1024 * 1024), 1)
+        return report
+    
+    @property
+    def backend(self):
+        """
+        This is the getter for the requested inference backend.
+        """
+        return self._backend
+    
+    @property
+    def active_backend(self):
+        """
+        This is the getter for the backend actually in use, which is eager after a fallback.
+        """
+        return self._active_backend
+    
+    def supported_backends(self):
+        """
+        It returns the backends this model can run on. Subclasses that can export graphs extend it.
+        """
+        return ("eager",)
+    
+    def _select_backend(self, backend):
+        """
+        It validates and stores the requested backend.
+        """
+        if backend not in self.supported_backends():
+            raise ValueError(f"{self._model_name} does not support the '{backend}' backend, "
+                             f"expected one of {', '.join(self.supported_backends())}")
+        self._backend = backend
+    
     @property
     def is_loaded(self):
         """
@@ -39,6 +138,15 @@ class BaseModel(ABC):
         """
         return self._is_loaded
     
+    @property
+    def load_state(self):
+        """
+        This is the getter for the loading state: not loaded, loading, warming, ready or failed.
+        """
+        if self._load_state is not None:
+            return self._load_state
+        return self.STATE_READY if self._is_loaded else self.STATE_NOT_LOADED
+    
     @abstractmethod
     def load_model(self):
         """
@@ -47,10 +155,67 @@ class BaseModel(ABC):
         """
         pass
     
+    def unload_model(self):
+        """
+        It releases the loaded weights so their memory can be reclaimed.
+        Subclasses drop their own references and then call this.
+        """
+        self._is_loaded = False
+        self._load_state = None
+        gc.collect()
+    
+    def warm_up(self, loader=None):
+        """
+        It loads the model and runs a dummy input through it so the first real call is not slow.
+        loader replaces load_model, for example to load through a ModelRegistry.
+        The load_state property reports progress while this runs on a background thread.
+        """
+        self._load_state = self.STATE_LOADING
+        if not self._is_loaded:
+            (loader or self.load_model)()
+        if not self._is_loaded:
+            self._load_state = self.STATE_FAILED
+            return False
+        
+        self._load_state = self.STATE_WARMING
+        try:
+            self._run_warm_up()
+        except Exception as e:
+            self.log_error(f"Warm-up failed for {self._model_name}: {str(e)}")
+        self._load_state = self.STATE_READY
+        return True
+    
+    def _run_warm_up(self):
+        """
+        It runs one dummy forward pass. Subclasses override this; the default does nothing.
+        """
+        pass
+    
+    def memory_footprint(self):
+        """
+        It returns the number of bytes held by the loaded weights, or 0 when unknown or not loaded.
+        """
+        return 0
+    
     @abstractmethod
     def process_input(self, input_data):
         """
         Abstract method that should be implemented by subclasses to process the input.
         
         """
-        pass
\ No newline at end of file
+        pass
+    
+    def cache_fingerprint(self):
+        """
+        It returns a string that changes whenever cached results of this model stop being valid.
+        Subclasses add any configuration that changes their output.
+        """
+        if self._model_path:
+            return f"{self._model_name}@{self._model_path}"
+        return f"{self._model_name}@{self._revision}"
+    
+    def content_hash(self, input_data):
+        """
+        It returns a hash of the input content used to key cached results.
+        """
+        return hashlib.sha256(repr(input_data).encode("utf-8")).hexdigest()
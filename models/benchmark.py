@@ -0,0 +1,199 @@
+import json
+import os
+import platform
+import tempfile
+import time
+
+from utlis.memory import current_rss_bytes, peak_rss_bytes
+from .precision import DEFAULT_TEXT_SAMPLES
+from .tiny_models import build_tiny_text_model, build_tiny_caption_model
+
+# A metric regresses when it is this much worse than the baseline (0.2 = 20%).
+DEFAULT_THRESHOLD = 0.2
+
+# Metrics where a larger value is better; every other metric is a time or a size.
+HIGHER_IS_BETTER_SUFFIXES = ("_per_sec",)
+
+
+def _thread_counts():
+    cpu_count = os.cpu_count() or 1
+    return sorted({1, cpu_count})
+
+
+def _median(values):
+    ordered = sorted(values)
+    return ordered[len(ordered) // 2]
+
+
+def _benchmark_model(model, single_input, make_batch, batch_sizes, thread_counts, repeats, **options):
+    """
+    It measures load time, single-item latency and batched throughput for one model.
+    Returns a flat {metric_name: value} dict.
+    """
+    import torch
+
+    metrics = {}
+    rss_before = current_rss_bytes()
+    load_start = time.perf_counter()
+    model.load_model()
+    metrics["load_seconds"] = round(time.perf_counter() - load_start, 4)
+    if not model.is_loaded:
+        raise RuntimeError(f"{model.model_name} failed to load from {model.model_source}")
+    metrics["load_rss_delta_mb"] = round((current_rss_bytes() - rss_before) / (1024 * 1024), 2)
+
+    default_threads = torch.get_num_threads()
+    try:
+        for threads in thread_counts:
+            torch.set_num_threads(threads)
+            _check_results(model, [model.process_input(single_input, **options)])  # Warm-up call, not timed
+            latencies = []
+            for _ in range(repeats):
+                start_time = time.perf_counter()
+                result = model.process_input(single_input, **options)
+                latencies.append(time.perf_counter() - start_time)
+                _check_results(model, [result])
+            metrics[f"single_latency_ms.threads{threads}"] = round(_median(latencies) * 1000.0, 3)
+
+            for batch_size in batch_sizes:
+                batch = make_batch(batch_size)
+                start_time = time.perf_counter()
+                results = model.process_batch(batch, **options)
+                elapsed = time.perf_counter() - start_time
+                _check_results(model, results)
+                metrics[f"items_per_sec.batch{batch_size}.threads{threads}"] = (
+                    round(len(batch) / elapsed, 3) if elapsed > 0 else 0.0)
+    finally:
+        torch.set_num_threads(default_threads)
+        model.unload_model()
+    return metrics
+
+
+def _check_results(model, results):
+    """
+    It raises if any result is an error, so timings of failed calls are never reported as throughput.
+    """
+    for result in results:
+        if "error" in result:
+            raise RuntimeError(f"{model.model_name} benchmark call failed: {result['error']}")
+
+
+def benchmark_text_model(model_dir, batch_sizes=(1, 8, 32), thread_counts=None, repeats=20):
+    """
+    It benchmarks TextClassifierModel on the checkpoint in model_dir.
+    """
+    from .text_classifier import TextClassifierModel
+
+    samples = DEFAULT_TEXT_SAMPLES
+
+    def make_batch(batch_size):
+        # Two batches' worth of inputs, so each timing includes more than one forward pass.
+        return [samples[i % len(samples)] for i in range(batch_size * 2)]
+
+    return _benchmark_model(
+        TextClassifierModel(model_path=model_dir), samples[0], make_batch,
+        batch_sizes, thread_counts or _thread_counts(), repeats
+    )
+
+
+def benchmark_caption_model(model_dir, image_dir, batch_sizes=(1, 4), thread_counts=None, repeats=5,
+                            max_new_tokens=8):
+    """
+    It benchmarks ImageCaptionerModel on the checkpoint in model_dir, using images in image_dir.
+    """
+    from .image_captioner import ImageCaptionerModel
+
+    image_paths = _write_sample_images(image_dir, max(batch_sizes) * 2)
+
+    def make_batch(batch_size):
+        return image_paths[:batch_size * 2]
+
+    return _benchmark_model(
+        # The vision cache is off so repeated runs over the same images measure the full pipeline.
+        ImageCaptionerModel(model_path=model_dir, vision_cache_size=0), image_paths[0], make_batch,
+        batch_sizes, thread_counts or _thread_counts(), repeats,
+        max_new_tokens=max_new_tokens
+    )
+
+
+def _write_sample_images(directory, count):
+    """
+    It writes count small generated JPEG images to directory and returns their paths.
+    """
+    from PIL import Image
+
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for index in range(count):
+        path = os.path.join(directory, f"sample_{index}.jpg")
+        color = ((index * 53) % 256, (index * 97) % 256, (index * 151) % 256)
+        Image.new("RGB", (640, 480), color=color).save(path, "JPEG")
+        paths.append(path)
+    return paths
+
+
+def run_benchmarks(models=("text", "image"), work_dir=None, thread_counts=None, repeats=None):
+    """
+    It builds the tiny stand-in checkpoints and benchmarks each requested model, offline.
+    Returns {"environment": {...}, "metrics": {"text.load_seconds": ..., ...}}.
+    """
+    # The checkpoints are local directories, which the models load with local_files_only (see
+    # snapshots.pretrained_options), so a run never reaches the hub.
+    import torch
+    import transformers
+
+    work_dir = work_dir or tempfile.mkdtemp(prefix="hit137-bench-")
+    metrics = {}
+    options = {"repeats": repeats} if repeats else {}
+    if "text" in models:
+        model_dir = build_tiny_text_model(os.path.join(work_dir, "tiny-distilbert"))
+        for name, value in benchmark_text_model(model_dir, thread_counts=thread_counts, **options).items():
+            metrics[f"text.{name}"] = value
+    if "image" in models:
+        model_dir = build_tiny_caption_model(os.path.join(work_dir, "tiny-blip"))
+        for name, value in benchmark_caption_model(model_dir, os.path.join(work_dir, "images"),
+                                                   thread_counts=thread_counts, **options).items():
+            metrics[f"image.{name}"] = value
+    metrics["process.peak_rss_mb"] = round(peak_rss_bytes() / (1024 * 1024), 2)
+
+    return {
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "torch": torch.__version__,
+            "transformers": transformers.__version__
+        },
+        "metrics": metrics
+    }
+
+
+def compare_to_baseline(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    It compares each metric with the baseline and returns the ones that got worse by more than
+    threshold, as a list of {"metric", "baseline", "current", "change"} dicts. Metrics missing from
+    either side are ignored.
+    """
+    regressions = []
+    current = results.get("metrics", {})
+    for name, expected in sorted(baseline.get("metrics", {}).items()):
+        actual = current.get(name)
+        if actual is None or not expected:
+            continue
+        change = (actual - expected) / expected
+        higher_is_better = any(part.endswith(HIGHER_IS_BETTER_SUFFIXES) for part in name.split("."))
+        if (higher_is_better and change < -threshold) or (not higher_is_better and change > threshold):
+            regressions.append({
+                "metric": name,
+                "baseline": expected,
+                "current": actual,
+                "change": round(change, 4)
+            })
+    return regressions
+
+
+def load_results(path):
+    """
+    It reads a benchmark results JSON file.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
@@ -0,0 +1,181 @@
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+from oop.mixins import LoggingMixin
+from .image_captioner import ImageCaptionerModel
+
+# Set in each worker process by _init_worker.
+_worker_model = None
+
+
+def _init_worker(model, torch_threads):
+    """
+    It runs once per worker process: it pins the torch thread count and keeps the shared model.
+    """
+    global _worker_model
+    import torch
+
+    torch.set_num_threads(torch_threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        pass  # Already set in this process
+    _worker_model = model
+    if not _worker_model.is_loaded:
+        _worker_model.load_model()
+
+
+def _caption_chunk(task):
+    start, image_paths, options = task
+    # Decoding threads are capped at one per worker so workers do not oversubscribe the cores.
+    return start, _worker_model.process_batch(list(image_paths), max_workers=1, **options)
+
+
+class CaptionProcessPool(LoggingMixin):
+    """
+    Captions large sets of images on several processes that share one copy of the BLIP weights.
+
+    The weights are loaded once in the parent and moved to shared memory before the workers start.
+    Workers are started with forkserver (spawn where it is not available) rather than fork, since
+    forking a process that has already started torch's OpenMP and intra-op thread pools can deadlock
+    the children. Paths are handed out in small chunks that idle workers pull from a shared queue, so
+    fast workers take over work from slow ones, and results are put back in input order.
+
+    A worker that dies breaks the pool; process_batch then returns errors for the images it did not
+    get back instead of waiting for them, and the pool refuses further batches.
+    """
+
+    def __init__(self, num_workers=None, torch_threads=None, chunk_size=4, precision="fp32",
+                 chunk_timeout=300):
+        """
+        It loads the model and starts the workers. torch_threads defaults to the number of cores
+        divided by num_workers, so the workers together do not use more threads than there are cores.
+        chunk_timeout is how many seconds one chunk may take; a batch waits at most that long per
+        round of chunks across the workers (None waits without a limit).
+        """
+        import torch.multiprocessing as mp
+
+        cpu_count = os.cpu_count() or 1
+        self._num_workers = num_workers or cpu_count
+        self._torch_threads = torch_threads or max(1, cpu_count // self._num_workers)
+        self._chunk_size = chunk_size
+        self._chunk_timeout = chunk_timeout
+        self._broken = False
+
+        self._model = ImageCaptionerModel(precision=precision)
+        self._model.load_model()
+        if not self._model.is_loaded:
+            raise RuntimeError("Image captioning model failed to load")
+
+        start_method = "forkserver" if "forkserver" in mp.get_all_start_methods() else "spawn"
+        self._model.share_memory()
+        context = mp.get_context(start_method)
+        self.log_info(f"Starting {self._num_workers} caption workers ({start_method}, "
+                      f"{self._torch_threads} torch threads each)")
+        self._pool = ProcessPoolExecutor(self._num_workers, mp_context=context, initializer=_init_worker,
+                                         initargs=(self._model, self._torch_threads))
+
+    @property
+    def model_name(self):
+        """
+        This is the getter for the name of the pooled model.
+        """
+        return self._model.model_name
+
+    @property
+    def torch_threads(self):
+        """
+        This is the getter for the torch thread count of each worker.
+        """
+        return self._torch_threads
+
+    def cache_fingerprint(self):
+        """
+        It returns the pooled model's cache fingerprint, so pool results can be stored and looked up.
+        """
+        return self._model.cache_fingerprint()
+
+    def content_hash(self, image_path):
+        """
+        It returns the pooled model's content hash for an image.
+        """
+        return self._model.content_hash(image_path)
+
+    def process_batch(self, image_paths, **options):
+        """
+        It captions the paths across the workers and returns results in input order.
+        options (max_new_tokens, num_beams) are passed on to each worker's process_batch.
+        Images whose chunk was lost to a dead worker or ran past the timeout get an error result.
+        """
+        if self._broken:
+            raise RuntimeError("Caption pool is broken after a worker failure; start a new pool")
+        chunks = [(start, image_paths[start:start + self._chunk_size], options)
+                  for start in range(0, len(image_paths), self._chunk_size)]
+        timeout = None
+        if self._chunk_timeout is not None:
+            timeout = self._chunk_timeout * math.ceil(len(chunks) / self._num_workers)
+
+        results = [None] * len(image_paths)
+        futures = [self._pool.submit(_caption_chunk, chunk) for chunk in chunks]
+        error = None
+        try:
+            for future in as_completed(futures, timeout=timeout):
+                start, chunk_results = future.result()
+                results[start:start + len(chunk_results)] = chunk_results
+        except BrokenProcessPool:
+            error = "Caption worker process died"
+        except FuturesTimeoutError:
+            error = f"Caption worker did not finish within {timeout} seconds"
+        if error is not None:
+            self._broken = True
+            for future in futures:
+                if future.cancel() or not future.done() or future.exception() is not None:
+                    continue
+                # Chunks that finished before the failure but were not yet collected keep their results.
+                start, chunk_results = future.result()
+                results[start:start + len(chunk_results)] = chunk_results
+            self.log_error(f"{error}; {results.count(None)} of {len(results)} images were not captioned")
+            results = [result if result is not None else {"error": error} for result in results]
+        return results
+
+    def close(self):
+        """
+        It stops the worker processes. After a worker failure it does not wait for hung workers.
+        """
+        self._pool.shutdown(wait=not self._broken, cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def scaling_report(image_paths, worker_counts=None, torch_threads=None, chunk_size=4):
+    """
+    It captions the same images with each worker count and reports images/sec for each.
+    """
+    cpu_count = os.cpu_count() or 1
+    if worker_counts is None:
+        worker_counts = sorted({1, 2, 4, cpu_count // 2, cpu_count} - {0})
+
+    report = []
+    for workers in worker_counts:
+        with CaptionProcessPool(workers, torch_threads, chunk_size) as pool:
+            pool.process_batch(image_paths[:workers * chunk_size])  # Warm-up pass, not timed
+            start_time = time.perf_counter()
+            results = pool.process_batch(image_paths)
+            elapsed = time.perf_counter() - start_time
+            report.append({
+                "workers": workers,
+                "torch_threads_per_worker": pool.torch_threads,
+                "images": len(image_paths),
+                "errors": sum(1 for result in results if "error" in result),
+                "seconds": round(elapsed, 3),
+                "images_per_sec": round(len(image_paths) / elapsed, 3) if elapsed > 0 else 0.0
+            })
+    return report
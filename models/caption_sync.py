@@ -0,0 +1,233 @@
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from utlis.batch_pipeline import IMAGE_EXTENSIONS, batched
+from utlis.helpers import validate_image_file
+from .results_store import revision_key
+
+MANIFEST_NAME = ".captions-manifest.db"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    content_hash TEXT,
+    caption TEXT,
+    error TEXT,
+    revision TEXT,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS files_content_hash ON files (content_hash);
+"""
+
+
+class CaptionManifest:
+    """
+    The record of one image directory's last sync: path, size, mtime, content hash and caption (or
+    the reason the file was rejected) for every image, kept in SQLite. Each caption also records the
+    revision it was made with (model fingerprint plus generation options), so a new checkpoint or
+    different settings caption the image again instead of keeping the old caption.
+
+    Writes are grouped into transactions of commit_every rows, so an interrupted sync keeps most of
+    its progress and the next run picks up from there.
+    """
+
+    def __init__(self, path, commit_every=500):
+        """
+        It opens (creating if needed) the manifest database at path.
+        """
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.executescript(_SCHEMA)
+        columns = [row[1] for row in self._connection.execute("PRAGMA table_info(files)")]
+        if "revision" not in columns:
+            # Manifests from before revisions were tracked; their captions count as out of date.
+            self._connection.execute("ALTER TABLE files ADD COLUMN revision TEXT")
+        self._commit_every = commit_every
+        self._uncommitted = 0
+        self._lock = threading.Lock()
+
+    def entries(self):
+        """
+        It returns {path: (size, mtime_ns, content_hash, settled, revision)} for every file in the
+        manifest. settled is False for files the model failed on, so they are tried again; files that
+        were captioned or rejected as invalid images are settled.
+        """
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT path, size, mtime_ns, content_hash, caption IS NOT NULL OR content_hash IS NULL, "
+                "revision FROM files"
+            )
+            return {row[0]: (row[1], row[2], row[3], bool(row[4]), row[5]) for row in rows}
+
+    def caption_for_hash(self, content_hash, revision):
+        """
+        It returns a caption stored for an image with this content at this revision, e.g. for an
+        image that was moved or copied.
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT caption FROM files WHERE content_hash = ? AND revision = ? AND caption IS NOT NULL "
+                "LIMIT 1",
+                (content_hash, revision)
+            ).fetchone()
+        return row[0] if row else None
+
+    def update(self, path, size, mtime_ns, content_hash=None, caption=None, error=None, revision=None):
+        """
+        It inserts or replaces the entry for path.
+        """
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO files (path, size, mtime_ns, content_hash, caption, error, revision, "
+                "updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (path, size, mtime_ns, content_hash, caption, error, revision, time.time())
+            )
+            self._count_write()
+
+    def touch(self, path, size, mtime_ns):
+        """
+        It records a new size and mtime for a file whose content did not change.
+        """
+        with self._lock:
+            self._connection.execute("UPDATE files SET size = ?, mtime_ns = ?, updated_at = ? WHERE path = ?",
+                                     (size, mtime_ns, time.time(), path))
+            self._count_write()
+
+    def remove(self, paths):
+        """
+        It deletes the entries for paths.
+        """
+        with self._lock:
+            self._connection.executemany("DELETE FROM files WHERE path = ?", ((path,) for path in paths))
+            self._connection.commit()
+
+    def _count_write(self):
+        self._uncommitted += 1
+        if self._uncommitted >= self._commit_every:
+            self._connection.commit()
+            self._uncommitted = 0
+
+    def close(self):
+        """
+        It commits pending writes and closes the manifest.
+        """
+        with self._lock:
+            self._connection.commit()
+            self._connection.close()
+
+
+def scan_tree(root, workers=8):
+    """
+    It lists every image under root as (path, size, mtime_ns), listing directories on several
+    threads at once, which matters most on network shares where each listing waits on the server.
+    """
+    def list_directory(directory):
+        files, subdirs = [], []
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry.path)
+                        elif entry.is_file() and entry.name.lower().endswith(IMAGE_EXTENSIONS):
+                            stat = entry.stat()
+                            files.append((entry.path, stat.st_size, stat.st_mtime_ns))
+                    except OSError:
+                        continue
+        except OSError:
+            pass
+        return files, subdirs
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = [executor.submit(list_directory, os.path.abspath(root))]
+        while pending:
+            files, subdirs = pending.pop().result()
+            pending.extend(executor.submit(list_directory, subdir) for subdir in subdirs)
+            yield from files
+
+
+def _inspect(model, candidate):
+    path, size, mtime_ns = candidate
+    valid, message = validate_image_file(path)
+    if not valid:
+        return candidate, None, message
+    try:
+        return candidate, model.content_hash(path), None
+    except OSError as e:
+        return candidate, None, f"Could not read file: {str(e)}"
+
+
+def _is_current(entry, revision):
+    """
+    It returns True when a manifest entry needs no new caption: it is settled, and either it was
+    captioned at this revision or it is not a valid image at all.
+    """
+    return entry[3] and (entry[2] is None or entry[4] == revision)
+
+
+def sync_directory(model, root, manifest, batch_size=16, scan_workers=8, on_result=None, **options):
+    """
+    It brings manifest up to date with the images under root, captioning only what is new or changed.
+
+    Files whose size, mtime and caption revision (model fingerprint plus options, as in
+    results_store.revision_key) match the manifest are skipped without being read. The rest are
+    validated with validate_image_file and hashed in parallel; a file whose content hash is unchanged,
+    or matches another file captioned at the same revision (a move or copy), reuses the stored caption.
+    Only the remaining images go to model.process_batch. Entries for files that no longer exist are
+    removed. on_result is called with each new caption result. options go to process_batch.
+    Returns counts of what happened to each file.
+    """
+    stats = {"scanned": 0, "unchanged": 0, "reused": 0, "captioned": 0, "invalid": 0, "errors": 0, "deleted": 0}
+    revision = revision_key(model, options)
+    known = manifest.entries()
+    seen = set()
+    candidates = []
+    for path, size, mtime_ns in scan_tree(root, scan_workers):
+        stats["scanned"] += 1
+        seen.add(path)
+        entry = known.get(path)
+        if entry is not None and entry[0] == size and entry[1] == mtime_ns and _is_current(entry, revision):
+            stats["unchanged"] += 1
+        else:
+            candidates.append((path, size, mtime_ns))
+
+    deleted = [path for path in known if path not in seen]
+    manifest.remove(deleted)
+    stats["deleted"] = len(deleted)
+
+    to_caption = []
+    with ThreadPoolExecutor(max_workers=scan_workers) as executor:
+        for (path, size, mtime_ns), content_hash, error in executor.map(lambda c: _inspect(model, c), candidates):
+            if error is not None:
+                manifest.update(path, size, mtime_ns, error=error)
+                stats["invalid"] += 1
+                continue
+            previous = known.get(path)
+            if previous is not None and previous[2] == content_hash and _is_current(previous, revision):
+                manifest.touch(path, size, mtime_ns)
+                stats["unchanged"] += 1
+                continue
+            caption = manifest.caption_for_hash(content_hash, revision)
+            if caption is not None:
+                manifest.update(path, size, mtime_ns, content_hash, caption, revision=revision)
+                stats["reused"] += 1
+                continue
+            to_caption.append((path, size, mtime_ns, content_hash))
+
+    for batch in batched(to_caption, batch_size):
+        results = model.process_batch([path for path, _, _, _ in batch], **options)
+        for (path, size, mtime_ns, content_hash), result in zip(batch, results):
+            if "error" in result:
+                manifest.update(path, size, mtime_ns, content_hash, error=result["error"], revision=revision)
+                stats["errors"] += 1
+            else:
+                manifest.update(path, size, mtime_ns, content_hash, result.get("caption"), revision=revision)
+                stats["captioned"] += 1
+            if on_result is not None:
+                on_result(dict(result, image_path=path))
+    return stats
@@ -0,0 +1,347 @@
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import zlib
+from array import array
+
+# The first stage of the text cascade is a logistic regression over hashed word n-grams, distilled
+# from the full model's own labels. It needs no tokenizer or torch, so confident inputs cost
+# microseconds; only the uncertain ones go on to the full model.
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9']+|[!?]")
+
+STAGE_FAST = "fast"
+STAGE_FULL = "full"
+
+
+class HashedNgramClassifier:
+    """
+    A binary linear classifier over hashed word n-grams (the hashing trick), with a signed hash to
+    cancel out collisions on average.
+
+    Weights live in a flat float array of num_features entries, so prediction is a handful of array
+    lookups per token. fit() trains it with SGD on soft targets, the probability the teacher model
+    gave labels[1].
+    """
+
+    def __init__(self, labels, num_features=1 << 18, max_ngram=2):
+        """
+        It creates an untrained classifier for the two labels (e.g. ["NEGATIVE", "POSITIVE"]).
+        """
+        if len(labels) != 2:
+            raise ValueError(f"Expected exactly two labels, got {list(labels)}")
+        self._labels = list(labels)
+        self._num_features = num_features
+        self._max_ngram = max_ngram
+        self._weights = array("f", bytes(4 * num_features))
+        self._bias = 0.0
+
+    @property
+    def labels(self):
+        """
+        This is the getter for the two labels, in [negative class, positive class] order.
+        """
+        return list(self._labels)
+
+    def features(self, text):
+        """
+        It returns the (index, value) pairs for the text's hashed n-grams, scaled to unit length.
+        """
+        tokens = _TOKEN_PATTERN.findall(text.lower())
+        counts = {}
+        for n in range(1, self._max_ngram + 1):
+            for start in range(len(tokens) - n + 1):
+                digest = zlib.crc32(" ".join(tokens[start:start + n]).encode("utf-8"))
+                index = digest % self._num_features
+                sign = -1.0 if digest & 0x80000000 else 1.0
+                counts[index] = counts.get(index, 0.0) + sign
+        norm = math.sqrt(sum(value * value for value in counts.values())) or 1.0
+        return [(index, value / norm) for index, value in counts.items() if value]
+
+    def _score(self, features):
+        weights = self._weights
+        return self._bias + sum(weights[index] * value for index, value in features)
+
+    def predict(self, text):
+        """
+        It returns (label, confidence) for one text.
+        """
+        probability = _sigmoid(self._score(self.features(text)))
+        if probability >= 0.5:
+            return self._labels[1], probability
+        return self._labels[0], 1.0 - probability
+
+    def fit(self, texts, targets, epochs=5, learning_rate=0.5, l2=1e-6, seed=0):
+        """
+        It trains on texts with soft targets (the probability of labels[1], between 0 and 1)
+        and returns the mean log loss of the last epoch.
+        """
+        samples = [(self.features(text), target) for text, target in zip(texts, targets)]
+        order = list(range(len(samples)))
+        rng = random.Random(seed)
+        weights = self._weights
+        loss = 0.0
+        for epoch in range(epochs):
+            rng.shuffle(order)
+            rate = learning_rate / (1.0 + epoch)
+            loss = 0.0
+            for position in order:
+                features, target = samples[position]
+                probability = _sigmoid(self._score(features))
+                loss -= target * math.log(max(probability, 1e-12)) + (1 - target) * math.log(max(1 - probability, 1e-12))
+                gradient = probability - target
+                for index, value in features:
+                    weights[index] -= rate * (gradient * value + l2 * weights[index])
+                self._bias -= rate * gradient
+        return loss / len(samples) if samples else 0.0
+
+    def fingerprint(self):
+        """
+        It returns a short hash of the weights, so results from different first stages are not mixed up.
+        """
+        digest = hashlib.sha256(self._weights.tobytes())
+        digest.update(repr((self._labels, self._max_ngram, self._bias)).encode("utf-8"))
+        return digest.hexdigest()[:12]
+
+    def save(self, path):
+        """
+        It writes the classifier to path as JSON, keeping only the non-zero weights.
+        """
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({
+                "labels": self._labels,
+                "num_features": self._num_features,
+                "max_ngram": self._max_ngram,
+                "bias": self._bias,
+                "weights": {str(index): weight for index, weight in enumerate(self._weights) if weight}
+            }, f)
+
+    @classmethod
+    def load(cls, path):
+        """
+        It reads a classifier written by save().
+        """
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        classifier = cls(data["labels"], data["num_features"], data["max_ngram"])
+        classifier._bias = data["bias"]
+        for index, weight in data["weights"].items():
+            classifier._weights[int(index)] = weight
+        return classifier
+
+
+def _sigmoid(score):
+    if score >= 0:
+        return 1.0 / (1.0 + math.exp(-score))
+    exp_score = math.exp(score)
+    return exp_score / (1.0 + exp_score)
+
+
+def teacher_targets(results, labels):
+    """
+    It turns the full model's results into soft targets for labels[1]; error results give None.
+    """
+    targets = []
+    for result in results:
+        if "error" in result:
+            targets.append(None)
+        elif result["sentiment"] == labels[1]:
+            targets.append(result["confidence"])
+        else:
+            targets.append(1.0 - result["confidence"])
+    return targets
+
+
+def threshold_report(classifier, texts, teacher_results, thresholds=(0.7, 0.8, 0.9, 0.95, 0.99)):
+    """
+    It reports, for each confidence threshold, the share of texts the first stage would answer
+    (coverage) and how often its label matches the full model's on those texts (agreement).
+    """
+    predictions = [(classifier.predict(text), result["sentiment"])
+                   for text, result in zip(texts, teacher_results) if "error" not in result]
+    report = []
+    for threshold in thresholds:
+        answered = [label == teacher_label for (label, confidence), teacher_label in predictions
+                    if confidence >= threshold]
+        report.append({
+            "threshold": threshold,
+            "coverage": round(len(answered) / len(predictions), 4) if predictions else 0.0,
+            "agreement": round(sum(answered) / len(answered), 4) if answered else None
+        })
+    return report
+
+
+def distill_first_stage(model, texts, epochs=5, holdout=0.1, batch_size=32, seed=0, num_features=1 << 18):
+    """
+    It labels texts with the full model and trains a HashedNgramClassifier on those labels.
+
+    A holdout share of the texts is kept out of training and used for the threshold report.
+    Returns the classifier and a report with the training loss and per-threshold coverage and agreement.
+    """
+    texts = [text for text in texts if isinstance(text, str) and text.strip()]
+    teacher_results = []
+    for start in range(0, len(texts), batch_size):
+        teacher_results.extend(model.process_batch(texts[start:start + batch_size], batch_size=batch_size))
+
+    labelled = [(text, result) for text, result in zip(texts, teacher_results) if "error" not in result]
+    if not labelled:
+        raise ValueError("The full model did not label any of the training texts")
+    labels = sorted(set(result["sentiment"] for _, result in labelled))
+    if len(labels) != 2:
+        raise ValueError(f"The training texts must cover both labels; the full model only gave {labels}")
+    classifier = HashedNgramClassifier(labels, num_features=num_features)
+
+    random.Random(seed).shuffle(labelled)
+    split = len(labelled) - int(len(labelled) * holdout)
+    train, held_out = labelled[:split], labelled[split:]
+    loss = classifier.fit([text for text, _ in train],
+                          teacher_targets([result for _, result in train], classifier.labels),
+                          epochs=epochs, seed=seed)
+    evaluated = held_out or train
+    return classifier, {
+        "train_texts": len(train),
+        "holdout_texts": len(held_out),
+        "labels": classifier.labels,
+        "train_log_loss": round(loss, 4),
+        "thresholds": threshold_report(classifier, [text for text, _ in evaluated],
+                                       [result for _, result in evaluated])
+    }
+
+
+class CascadeModel:
+    """
+    A wrapper that answers confident texts with a cheap first stage and sends the rest to the model.
+
+    A text goes to the full model when the first stage's confidence is below threshold. A random
+    audit_rate share of the texts the first stage answered is also run through the full model, to
+    measure how often the cascade disagrees with it. Every result records the stage that answered it.
+    Calls not handled here are passed through to the wrapped model, so it can be used in its place.
+    """
+
+    def __init__(self, model, first_stage, threshold=0.9, audit_rate=0.02, seed=None):
+        """
+        It wraps model with first_stage (a HashedNgramClassifier) in front of it.
+        """
+        if not 0.5 <= threshold <= 1.0:
+            raise ValueError("threshold must be between 0.5 and 1.0")
+        if not 0.0 <= audit_rate <= 1.0:
+            raise ValueError("audit_rate must be between 0.0 and 1.0")
+        self._wrapped = model
+        self._first_stage = first_stage
+        self._threshold = threshold
+        self._audit_rate = audit_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._counts = {STAGE_FAST: 0, STAGE_FULL: 0, "audited": 0, "disagreements": 0}
+
+    @property
+    def threshold(self):
+        """
+        This is the getter for the first-stage confidence needed to skip the full model.
+        """
+        return self._threshold
+
+    def cache_fingerprint(self):
+        """
+        It adds the first stage and threshold, since they decide which answers the cascade gives.
+        """
+        return (f"{self._wrapped.cache_fingerprint()}:cascade-{self._first_stage.fingerprint()}"
+                f"@{self._threshold}")
+
+    def _route(self, text):
+        """
+        It returns the first-stage result for text, whether it needs the full model, and whether to audit it.
+        """
+        if not isinstance(text, str) or not text.strip():
+            return None, True, False  # the full model reports the error
+        label, confidence = self._first_stage.predict(text)
+        fast = {"text": text, "sentiment": label, "confidence": confidence, "stage": STAGE_FAST}
+        if confidence < self._threshold:
+            return fast, True, False
+        with self._lock:
+            audit = self._rng.random() < self._audit_rate
+        return fast, False, audit
+
+    def process_input(self, input_text, *args, **kwargs):
+        """
+        It classifies one text, with the full model only when the first stage is not confident.
+        """
+        fast, escalate, audit = self._route(input_text)
+        if not escalate and not audit:
+            self._count(STAGE_FAST)
+            return fast
+        full = self._wrapped.process_input(input_text, *args, **kwargs)
+        return self._combine(fast, full, escalate)
+
+    def process_batch(self, texts, *args, **kwargs):
+        """
+        It classifies a list of texts, sending the uncertain and audited ones to the full model in one batch.
+        """
+        routed = [self._route(text) for text in texts]
+        needs_full = [index for index, (_, escalate, audit) in enumerate(routed) if escalate or audit]
+        full_results = {}
+        if needs_full:
+            computed = self._wrapped.process_batch([texts[index] for index in needs_full], *args, **kwargs)
+            full_results = dict(zip(needs_full, computed))
+
+        results = []
+        for index, (fast, escalate, audit) in enumerate(routed):
+            if index in full_results:
+                results.append(self._combine(fast, full_results[index], escalate))
+            else:
+                self._count(STAGE_FAST)
+                results.append(fast)
+        return results
+
+    def _combine(self, fast, full, escalated):
+        """
+        It returns the answer for a text the full model also ran on, counting the stage and any audit.
+        """
+        if escalated:
+            if "error" not in full:
+                self._count(STAGE_FULL)
+                full = dict(full, stage=STAGE_FULL)
+                if fast is not None:
+                    full["fast_confidence"] = fast["confidence"]
+            return full
+        self._count(STAGE_FAST)
+        if "error" in full:
+            return fast
+        agrees = full["sentiment"] == fast["sentiment"]
+        self._count("audited")
+        if not agrees:
+            self._count("disagreements")
+        return dict(fast, audit={"sentiment": full["sentiment"], "confidence": full["confidence"],
+                                 "agrees": agrees})
+
+    def _count(self, key):
+        with self._lock:
+            self._counts[key] += 1
+
+    def get_cascade_stats(self):
+        """
+        It returns how many texts each stage answered and, from the audited sample, how often the
+        first stage disagreed with the full model, plus that rate scaled to all cascade answers.
+        """
+        with self._lock:
+            counts = dict(self._counts)
+        answered = counts[STAGE_FAST] + counts[STAGE_FULL]
+        fast_share = counts[STAGE_FAST] / answered if answered else 0.0
+        disagreement_rate = counts["disagreements"] / counts["audited"] if counts["audited"] else None
+        return {
+            "threshold": self._threshold,
+            "fast_answers": counts[STAGE_FAST],
+            "full_answers": counts[STAGE_FULL],
+            "fast_share": round(fast_share, 4),
+            "audited": counts["audited"],
+            "disagreements": counts["disagreements"],
+            "fast_disagreement_rate": round(disagreement_rate, 4) if disagreement_rate is not None else None,
+            "estimated_disagreement_rate": (round(disagreement_rate * fast_share, 4)
+                                            if disagreement_rate is not None else None)
+        }
+
+    def __getattr__(self, name):
+        return getattr(self._wrapped, name)
@@ -1,9 +1,17 @@
 from .base_model import BaseModel
 from oop.mixins import LoggingMixin, PerformanceMixin
 from oop.decorators import execution_timer, validate_input_type
-from transformers import BlipProcessor, BlipForConditionalGeneration
+from utlis.helpers import load_image
+from utlis.memory import module_size_bytes
+from utlis.metrics import get_metrics_registry
+from .precision import validate_precision, resolve_precision, apply_precision, input_dtype
+from .vision_cache import VisionFeatureCache
 from PIL import Image
-import torch
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import time
+
+# torch and transformers are imported when the model is loaded or run, not at import time.
 
 
 class ImageCaptionerModel(LoggingMixin, PerformanceMixin, BaseModel):
@@ -11,56 +19,402 @@ class ImageCaptionerModel(LoggingMixin, PerformanceMixin, BaseModel):
     Implementation of BaseModel for image captioning using Hugging Face BLIP.
     """
 
-    def __init__(self):
+    def __init__(self, precision="fp32", model_path=None, vision_cache_size=64):
         """
         Initialize the image captioning model with its name and description.
+        precision is "fp32", "int8" (dynamic quantization of Linear layers) or "bf16".
+        model_path is a local directory with a BLIP checkpoint to use instead of the hub one.
+        vision_cache_size is how many images' vision-encoder outputs are kept (0 disables the cache).
         """
         super().__init__(
             "Salesforce/blip-image-captioning-base",   # ✅ Hugging Face model name
-            "Image captioning model using BLIP"
+            "Image captioning model using BLIP",
+            model_path=model_path
         )
         self._processor = None
         self._model = None
+        self._precision = validate_precision(precision)
+        self._vision_cache = VisionFeatureCache(max_entries=vision_cache_size)
+
+    @property
+    def precision(self):
+        """
+        Getter for the precision mode applied when the model is loaded.
+        """
+        return self._precision
 
     def load_model(self):
         """
-        Load the image captioning model and processor.
+        Load the image captioning model and processor, from a local directory or pinned snapshot
+        without touching the network when there is one.
         """
         try:
-            self.log_info(f"Loading model: {self._model_name}")
-            self._processor = BlipProcessor.from_pretrained(self._model_name)
-            self._model = BlipForConditionalGeneration.from_pretrained(self._model_name)
+            from transformers import BlipProcessor, BlipForConditionalGeneration
+
+            source = self.model_source
+            self.log_info(f"Loading model: {source}")
+            self._start_load_report(source)
+            options = self.pretrained_options(source)
+            processor_options = {name: value for name, value in options.items()
+                                 if name in ("revision", "local_files_only")}
+            self._processor = BlipProcessor.from_pretrained(source, **processor_options)
+            self._model = BlipForConditionalGeneration.from_pretrained(source, **options)
+            self._precision, fallback_reason = resolve_precision(self._precision)
+            if fallback_reason:
+                self.log_info(fallback_reason)
+            self._model = apply_precision(self._model, self._precision)
             self._is_loaded = True
-            self.log_info("Image captioning model loaded successfully")
+            report = self._finish_load_report()
+            self.log_info(f"Image captioning model loaded successfully in {report['seconds']}s "
+                          f"(RSS {report['rss_before_mb']} -> {report['rss_after_mb']} MB)")
         except Exception as e:
             self.log_error(f"Failed to load image captioning model: {str(e)}")
             self._is_loaded = False
 
+    def save_pretrained(self, directory):
+        """
+        Save the loaded model (as safetensors) and processor to directory.
+        """
+        self._model.save_pretrained(directory, safe_serialization=True)
+        self._processor.save_pretrained(directory)
+
+    def unload_model(self):
+        """
+        Drop the model and processor so their memory can be freed.
+        """
+        self._processor = None
+        self._model = None
+        self._vision_cache.clear()
+        super().unload_model()
+        self.log_info("Image captioning model unloaded")
+
+    def _run_warm_up(self):
+        """
+        Caption a blank image once to warm up the vision encoder and the decoder.
+        """
+        import torch
+
+        blank = Image.new("RGB", (384, 384), color=(127, 127, 127))
+        inputs = self._processor(blank, return_tensors="pt").to(input_dtype(self._precision))
+        with torch.no_grad():
+            self._model.generate(**inputs, max_new_tokens=5)
+
+    def share_memory(self):
+        """
+        Move the loaded weights into shared memory so worker processes can use them without copying.
+        """
+        if self._model is not None:
+            self._model.share_memory()
+
+    def memory_footprint(self):
+        """
+        Return the size in bytes of the loaded model parameters and buffers.
+        """
+        if self._model is None:
+            return 0
+        return module_size_bytes(self._model)
+
+    @staticmethod
+    def _generation_kwargs(max_new_tokens=None, num_beams=1):
+        """
+        Build generate() arguments. num_beams=1 is greedy search; more beams trade latency for quality.
+        """
+        if num_beams < 1:
+            raise ValueError("num_beams must be at least 1")
+        kwargs = {"num_beams": num_beams}
+        if max_new_tokens is not None:
+            kwargs["max_new_tokens"] = max_new_tokens
+        return kwargs
+
+    def _make_streamer(self, on_token, timing):
+        """
+        Create a streamer that passes each newly decoded piece of the caption to on_token
+        and records when the first token arrived in timing["first_token"].
+        """
+        from transformers import TextStreamer
+
+        class CallbackStreamer(TextStreamer):
+            def put(self, value):
+                if not self.next_tokens_are_prompt and "first_token" not in timing:
+                    timing["first_token"] = time.perf_counter()
+                super().put(value)
+
+            def on_finalized_text(self, text, stream_end=False):
+                if text:
+                    on_token(text)
+
+        return CallbackStreamer(self._processor.tokenizer, skip_prompt=True, skip_special_tokens=True)
+
     @execution_timer
-    @validate_input_type(str)  # Validates file path
-    def process_input(self, image_path):
+    @validate_input_type((str, bytes))  # Validates file path or raw image bytes
+    def process_input(self, image_path, max_new_tokens=None, num_beams=1, on_token=None, prompt=None):
         """
-        Process an input image file and return a generated caption.
+        Process an input image file (a path or the raw bytes) and return a generated caption.
+
+        prompt is optional text the caption continues from (conditional captioning). The image's
+        vision-encoder output is cached by content, so captioning the same image again, with another
+        prompt or other settings, only runs the text decoder.
+        max_new_tokens and num_beams control generation. With greedy search (num_beams=1) and an
+        on_token callback, the caption is streamed to on_token piece by piece as it is generated;
+        beam search cannot stream, so on_token then receives the whole caption at the end.
+        The result records time-to-first-token and total latency in milliseconds.
         """
         if not self._is_loaded:
             self.load_model()
 
         self.track_call()
 
+        if not self._is_loaded:
+            return {"error": "Image captioning model is not loaded"}
+
         try:
-            raw_image = Image.open(image_path).convert("RGB")
-            inputs = self._processor(raw_image, return_tensors="pt")
-            out = self._model.generate(**inputs)
-            caption = self._processor.decode(out[0], skip_special_tokens=True)
+            import torch
+
+            start_time = time.perf_counter()
+            timing = {}
+            generate_kwargs = self._generation_kwargs(max_new_tokens, num_beams)
+            streaming = on_token is not None and num_beams == 1
+            if streaming:
+                generate_kwargs["streamer"] = self._make_streamer(on_token, timing)
+
+            metrics = get_metrics_registry()
+            with metrics.stage_timer(self._model_name, "preprocess"):
+                key = self._vision_key(image_path)
+                image_embeds = self._vision_cache.get(key)
+                cache_hit = image_embeds is not None
+                if not cache_hit:
+                    raw_image, message = load_image(image_path, self._input_size())
+                    if raw_image is None:
+                        raise ValueError(message)
+                    inputs = self._processor(raw_image, return_tensors="pt").to(input_dtype(self._precision))
+            with metrics.stage_timer(self._model_name, "forward"), torch.no_grad():
+                if not cache_hit:
+                    image_embeds = self._encode_image(inputs["pixel_values"])
+                    self._vision_cache.put(key, image_embeds)
+                out = self._generate_from_embeds(image_embeds, prompt, generate_kwargs)
+            with metrics.stage_timer(self._model_name, "decode"):
+                caption = self._processor.decode(out[0], skip_special_tokens=True)
+            end_time = time.perf_counter()
+
+            if on_token is not None and not streaming:
+                on_token(caption)
 
             return {
-                "image_path": image_path,
-                "caption": caption
+                "image_path": image_path if isinstance(image_path, str) else None,
+                "caption": caption,
+                "vision_cache_hit": cache_hit,
+                "time_to_first_token_ms": round((timing.get("first_token", end_time) - start_time) * 1000.0, 2),
+                "latency_ms": round((end_time - start_time) * 1000.0, 2)
             }
         except Exception as e:
             self.log_error(f"Error processing image input: {str(e)}")
             return {"error": f"Processing failed: {str(e)}"}
 
+    def _vision_key(self, image_path):
+        """
+        Return the vision cache key for an image, or None when it cannot be read (loading reports why).
+        """
+        if not self._vision_cache.enabled:
+            return None
+        try:
+            return self.content_hash(image_path)
+        except OSError:
+            return None
+
+    def _encode_image(self, pixel_values):
+        """
+        Run the BLIP vision encoder and return its patch embeddings (batch, patches, hidden).
+        """
+        return self._model.vision_model(pixel_values=pixel_values)[0]
+
+    def _prompt_ids(self, prompt, batch_size):
+        """
+        Return the decoder input ids and attention mask for an optional text prompt, one row per image.
+        Like BlipForConditionalGeneration.generate, the last token of each is a separator that is dropped.
+        """
+        import torch
+
+        if prompt:
+            encoded = self._processor.tokenizer(prompt, return_tensors="pt")
+            return encoded["input_ids"].repeat(batch_size, 1), encoded["attention_mask"].repeat(batch_size, 1)
+        text_config = self._model.config.text_config
+        start_id = getattr(self._model, "decoder_input_ids", text_config.bos_token_id)
+        return torch.LongTensor([[start_id, text_config.eos_token_id]]).repeat(batch_size, 1), None
+
+    def _generate_from_embeds(self, image_embeds, prompt, generate_kwargs):
+        """
+        Generate captions with the text decoder from already computed vision embeddings.
+        This mirrors BlipForConditionalGeneration.generate after its vision encoder call.
+        """
+        import torch
+
+        text_config = self._model.config.text_config
+        input_ids, attention_mask = self._prompt_ids(prompt, image_embeds.shape[0])
+        input_ids[:, 0] = text_config.bos_token_id
+        image_attention_mask = torch.ones(image_embeds.size()[:-1], dtype=torch.long)
+        return self._model.text_decoder.generate(
+            input_ids=input_ids[:, :-1],
+            attention_mask=attention_mask[:, :-1] if attention_mask is not None else None,
+            eos_token_id=text_config.sep_token_id,
+            pad_token_id=text_config.pad_token_id,
+            encoder_hidden_states=image_embeds,
+            encoder_attention_mask=image_attention_mask,
+            **generate_kwargs
+        )
+
+    def get_vision_cache_stats(self):
+        """
+        Return the vision-feature cache hit, miss and eviction counters, hit rate and current size.
+        """
+        return self._vision_cache.get_stats()
+
+    def _input_size(self):
+        """
+        Return the side length BLIP resizes images to, so decoding can stop near that size.
+        """
+        size = getattr(self._processor.image_processor, "size", None) or {}
+        return size.get("height", 384) if isinstance(size, dict) else 384
+
+    def _decode_image(self, image_path):
+        """
+        Validate and decode one image near the model input size, returning the image or the error.
+        """
+        image, message = load_image(image_path, self._input_size())
+        if image is None:
+            return None, ValueError(message)
+        return image, None
+
+    def _prepare_image(self, image_path):
+        """
+        Return (cache key, cached embeddings, decoded image, error) for one batch item.
+        Images whose embeddings are cached are not decoded.
+        """
+        key = self._vision_key(image_path)
+        image_embeds = self._vision_cache.get(key)
+        if image_embeds is not None:
+            return key, image_embeds, None, None
+        image, error = self._decode_image(image_path)
+        return key, None, image, error
+
+    @execution_timer
+    @validate_input_type(list)  # Validates list of file paths
+    def process_batch(self, image_paths, max_workers=4, max_new_tokens=None, num_beams=1, prompt=None,
+                      batch_size=8):
+        """
+        Process a list of image files and return one caption result per path, in input order.
+
+        The list is split into chunks of batch_size, so a large directory never becomes one huge
+        pixel tensor. Each chunk's images are decoded on a thread pool, stacked into a single
+        BlipProcessor call and captioned with one generate call. A bad image only produces an error
+        for that item.
+        Images whose vision embeddings are cached skip decoding and the vision encoder.
+        prompt is an optional text prompt shared by every image.
+        """
+        if not self._is_loaded:
+            self.load_model()
+
+        for _ in image_paths:
+            self.track_call()
+
+        if not self._is_loaded:
+            # _decode_image needs the processor, so a failed load must not reach the thread pool.
+            return [{"error": "Image captioning model is not loaded"} for _ in image_paths]
+
+        try:
+            generate_kwargs = self._generation_kwargs(max_new_tokens, num_beams)
+        except ValueError as e:
+            return [{"error": f"Processing failed: {str(e)}"} for _ in image_paths]
+
+        results = []
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for start in range(0, len(image_paths), batch_size):
+                results.extend(self._caption_chunk(image_paths[start:start + batch_size], executor,
+                                                   generate_kwargs, prompt))
+        return results
+
+    def _caption_chunk(self, image_paths, executor, generate_kwargs, prompt):
+        """
+        Caption one chunk of process_batch with a single processor call and a single generate call.
+        """
+        metrics = get_metrics_registry()
+        preprocess_start = time.perf_counter()
+        prepared = list(executor.map(self._prepare_image, image_paths))  # PIL releases the GIL while decoding
+        results = [None] * len(image_paths)
+
+        indices = []
+        missing = []
+        for index, (_, image_embeds, _, error) in enumerate(prepared):
+            if error is not None:
+                self.log_error(f"Error processing image input: {str(error)}")
+                results[index] = {"error": f"Processing failed: {str(error)}"}
+                continue
+            indices.append(index)
+            if image_embeds is None:
+                missing.append(index)
+
+        if not indices:
+            metrics.observe(self._model_name, "preprocess", time.perf_counter() - preprocess_start,
+                            len(image_paths), error=True)
+            return results
+
+        import torch
+
+        try:
+            start_time = time.perf_counter()
+            if missing:
+                inputs = self._processor(images=[prepared[index][2] for index in missing],
+                                         return_tensors="pt").to(input_dtype(self._precision))
+            # Preprocess covers both the threaded decoding and the processor call.
+            metrics.observe(self._model_name, "preprocess", time.perf_counter() - preprocess_start, len(image_paths))
+            with metrics.stage_timer(self._model_name, "forward", items=len(indices)), torch.no_grad():
+                embeds_by_index = {index: prepared[index][1] for index in indices if index not in missing}
+                if missing:
+                    encoded = self._encode_image(inputs["pixel_values"])
+                    for row, index in enumerate(missing):
+                        embeds_by_index[index] = encoded[row:row + 1]
+                        if self._vision_cache.enabled:
+                            # Clone so the cache does not keep the whole batch tensor alive.
+                            self._vision_cache.put(prepared[index][0], encoded[row:row + 1].clone())
+                image_embeds = torch.cat([embeds_by_index[index] for index in indices])
+                out = self._generate_from_embeds(image_embeds, prompt,
+                                                 generate_kwargs)
+            with metrics.stage_timer(self._model_name, "decode", items=len(indices)):
+                captions = self._processor.batch_decode(out, skip_special_tokens=True)
+            # Batched captions all finish together, so first token and total latency are the same.
+            latency_ms = round((time.perf_counter() - start_time) * 1000.0, 2)
+            for index, caption in zip(indices, captions):
+                results[index] = {
+                    "image_path": image_paths[index] if isinstance(image_paths[index], str) else None,
+                    "caption": caption,
+                    "vision_cache_hit": index not in missing,
+                    "time_to_first_token_ms": latency_ms,
+                    "latency_ms": latency_ms
+                }
+        except Exception as e:
+            self.log_error(f"Error processing image batch: {str(e)}")
+            for index in indices:
+                results[index] = {"error": f"Processing failed: {str(e)}"}
+
+        return results
+
+    def cache_fingerprint(self):
+        """
+        Add the precision mode, since quantized captions can differ from fp32.
+        """
+        return f"{super().cache_fingerprint()}:{self._precision}"
+
+    def content_hash(self, image_path):
+        """
+        Hash the image file bytes, so a moved or renamed copy of the same image shares a key.
+        """
+        if isinstance(image_path, (bytes, bytearray)):
+            return hashlib.sha256(image_path).hexdigest()
+        digest = hashlib.sha256()
+        with open(image_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
     def get_model_info(self):
         """
         Return metadata about the model.
@@ -0,0 +1,131 @@
+import time
+
+from utlis.memory import current_rss_bytes
+
+PRECISION_MODES = ("fp32", "int8", "bf16")
+
+# Fixed sample used by the precision accuracy check for the text model.
+DEFAULT_TEXT_SAMPLES = [
+    "I absolutely loved this film, the acting was superb.",
+    "The service was slow and the food arrived cold.",
+    "It was fine, nothing special but not bad either.",
+    "Worst purchase I have ever made, it broke after a day.",
+    "The update made the app faster and easier to use.",
+    "I'm not sure the sequel lives up to the original.",
+    "Fantastic battery life and a gorgeous screen.",
+    "The instructions were confusing and half the parts were missing."
+]
+
+
+def validate_precision(precision):
+    """
+    It checks that precision is one of the supported modes and returns it.
+    """
+    if precision not in PRECISION_MODES:
+        raise ValueError(f"Unsupported precision '{precision}', expected one of {', '.join(PRECISION_MODES)}")
+    return precision
+
+
+def bf16_supported():
+    """
+    It returns True when this CPU has native bfloat16 support (AVX512-BF16 or AMX).
+    """
+    import torch
+
+    try:
+        return bool(torch.ops.mkldnn._is_mkldnn_bf16_supported())
+    except (AttributeError, RuntimeError):
+        return False
+
+
+def resolve_precision(precision):
+    """
+    It returns (precision, reason): the precision that will actually be used, falling back to fp32
+    when bf16 is unsupported, and why it fell back (None when it did not), for the caller to log.
+    """
+    validate_precision(precision)
+    if precision == "bf16" and not bf16_supported():
+        return "fp32", "bf16 is not supported on this CPU, using fp32 instead"
+    return precision, None
+
+
+def apply_precision(module, precision):
+    """
+    It converts a loaded torch module to the given precision and returns it.
+    int8 applies dynamic quantization to the Linear layers; bf16 casts the weights to bfloat16.
+    """
+    import torch
+
+    if precision == "int8":
+        module = torch.ao.quantization.quantize_dynamic(module, {torch.nn.Linear}, dtype=torch.qint8)
+    elif precision == "bf16":
+        module = module.to(torch.bfloat16)
+    return module.eval()
+
+
+def input_dtype(precision):
+    """
+    It returns the dtype floating point model inputs must be cast to for a precision mode.
+    """
+    import torch
+
+    return torch.bfloat16 if precision == "bf16" else torch.float32
+
+
+def evaluate_precision_modes(model_class, samples, modes=PRECISION_MODES, compare_key="sentiment"):
+    """
+    It loads model_class once per precision mode, runs the samples through process_batch and reports
+    load time, memory, latency and agreement with the fp32 outputs.
+    compare_key is the result field that must match fp32 ("sentiment" or "caption").
+    """
+    report = {}
+    reference = None
+    for mode in ["fp32"] + [m for m in modes if m != "fp32"]:
+        model = model_class(precision=mode)
+
+        rss_before = current_rss_bytes()
+        load_start = time.perf_counter()
+        model.load_model()
+        load_seconds = time.perf_counter() - load_start
+        if not model.is_loaded:
+            report[mode] = {"error": "Model failed to load"}
+            continue
+
+        model.process_batch(samples[:1])  # Warm-up call, not timed
+        run_start = time.perf_counter()
+        outputs = model.process_batch(list(samples))
+        run_seconds = time.perf_counter() - run_start
+
+        entry = {
+            "effective_precision": model.precision,
+            "load_seconds": round(load_seconds, 4),
+            "weights_mb": round(model.memory_footprint() / (1024 * 1024), 2),
+            "rss_delta_mb": round((current_rss_bytes() - rss_before) / (1024 * 1024), 2),
+            "latency_ms_per_item": round(run_seconds * 1000.0 / max(len(samples), 1), 3),
+            "errors": sum(1 for result in outputs if "error" in result)
+        }
+
+        if reference is None:
+            reference = outputs
+            entry["agreement_with_fp32"] = 1.0
+        else:
+            entry.update(_compare_outputs(reference, outputs, compare_key))
+
+        report[mode] = entry
+        model.unload_model()
+    return report
+
+
+def _compare_outputs(reference, outputs, compare_key):
+    matches = 0
+    confidence_deltas = []
+    for expected, actual in zip(reference, outputs):
+        if expected.get(compare_key) == actual.get(compare_key):
+            matches += 1
+        if "confidence" in expected and "confidence" in actual:
+            confidence_deltas.append(abs(expected["confidence"] - actual["confidence"]))
+
+    comparison = {"agreement_with_fp32": round(matches / max(len(reference), 1), 4)}
+    if confidence_deltas:
+        comparison["max_confidence_delta"] = round(max(confidence_deltas), 6)
+    return comparison
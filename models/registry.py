@@ -0,0 +1,225 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from oop.mixins import LoggingMixin
+from utlis.memory import current_rss_bytes
+
+
+class ModelRegistry(LoggingMixin):
+    """
+    Hands out one shared instance per BaseModel.model_name and keeps loaded weights within a RAM budget.
+    When loading a model would exceed the budget, the least recently used loaded models are unloaded first.
+    Models idle for longer than idle_timeout seconds can also be unloaded with evict_idle().
+    A model pinned with pin() or using() is never unloaded, so a job running on one thread cannot
+    lose its weights because another thread loaded a different model.
+    """
+
+    def __init__(self, memory_budget_bytes=None, idle_timeout=None):
+        """
+        It creates an empty registry. A budget of None means no limit.
+        """
+        self._memory_budget = memory_budget_bytes
+        self._idle_timeout = idle_timeout
+        self._models = {}
+        self._roles = {}  # role (e.g. "text") -> model_name
+        self._loaded = OrderedDict()  # model_name -> resident bytes, least recently used first
+        self._last_used = {}
+        self._sizes_seen = {}  # last measured size, used to make room before reloading
+        self._load_locks = {}
+        self._pins = {}  # model_name -> number of jobs currently using it
+        self._lock = threading.RLock()
+
+    def register(self, factory, role=None):
+        """
+        It registers a model factory and returns the model name it is keyed on.
+        The factory is called once here; constructing a model must not load its weights.
+        role (e.g. "text") lets callers find the model with name_for() without knowing its name.
+        """
+        model = factory()
+        with self._lock:
+            self._models.setdefault(model.model_name, model)
+            self._load_locks.setdefault(model.model_name, threading.Lock())
+            if role is not None:
+                self._roles[role] = model.model_name
+        return model.model_name
+
+    def model_names(self):
+        """
+        It returns the names of all registered models.
+        """
+        return list(self._models)
+
+    def name_for(self, role):
+        """
+        It returns the name of the model registered for role.
+        """
+        with self._lock:
+            if role not in self._roles:
+                raise KeyError(f"No model registered for role '{role}'")
+            return self._roles[role]
+
+    def get(self, model_name):
+        """
+        It returns the shared instance for model_name, loading it and evicting others if needed.
+        """
+        with self._lock:
+            if model_name not in self._models:
+                raise KeyError(f"No model registered under '{model_name}'")
+            model = self._models[model_name]
+            load_lock = self._load_locks[model_name]
+
+        # Loading runs under a per-model lock only, so different models can load in parallel.
+        with load_lock:
+            with self._lock:
+                if model_name in self._loaded and not model.is_loaded:
+                    # Unloaded behind our back; forget the stale size.
+                    del self._loaded[model_name]
+                needs_load = model_name not in self._loaded
+                if needs_load:
+                    self._make_room(self._sizes_seen.get(model_name, 0), exclude=model_name)
+            if needs_load:
+                self._load(model_name, model)
+
+        with self._lock:
+            if model_name in self._loaded:
+                self._loaded.move_to_end(model_name)
+            self._last_used[model_name] = time.monotonic()
+        return model
+
+    def pin(self, model_name):
+        """
+        It marks model_name as in use, so eviction skips it until a matching unpin().
+        """
+        with self._lock:
+            if model_name not in self._models:
+                raise KeyError(f"No model registered under '{model_name}'")
+            self._pins[model_name] = self._pins.get(model_name, 0) + 1
+
+    def unpin(self, model_name):
+        """
+        It releases one pin() on model_name.
+        """
+        with self._lock:
+            count = self._pins.get(model_name, 0) - 1
+            if count > 0:
+                self._pins[model_name] = count
+            else:
+                self._pins.pop(model_name, None)
+
+    @contextmanager
+    def using(self, model_name):
+        """
+        A context manager that loads model_name through get() and keeps it pinned while the block runs.
+        """
+        self.pin(model_name)  # Pinned before loading, so nothing can evict it between get() and use
+        try:
+            yield self.get(model_name)
+        finally:
+            self.unpin(model_name)
+
+    def peek(self, model_name):
+        """
+        It returns the shared instance without loading it or touching its LRU position.
+        """
+        return self._models[model_name]
+
+    def unload(self, model_name):
+        """
+        It unloads one model if it is loaded and not pinned. Returns True if it was unloaded.
+        """
+        with self._lock:
+            if model_name not in self._loaded or self._pins.get(model_name):
+                return False
+            del self._loaded[model_name]
+            self._models[model_name].unload_model()
+            return True
+
+    def evict_idle(self, idle_timeout=None):
+        """
+        It unloads every model not used within idle_timeout seconds and returns their names.
+        """
+        idle_timeout = self._idle_timeout if idle_timeout is None else idle_timeout
+        if idle_timeout is None:
+            return []
+        now = time.monotonic()
+        with self._lock:
+            idle = [name for name in self._loaded
+                    if now - self._last_used.get(name, now) > idle_timeout and not self._pins.get(name)]
+            for name in idle:
+                self.log_info(f"Unloading idle model: {name}")
+                self.unload(name)
+        return idle
+
+    def resident_bytes(self):
+        """
+        It returns the tracked resident size of each loaded model.
+        """
+        with self._lock:
+            return dict(self._loaded)
+
+    def get_stats(self):
+        """
+        It returns the budget, total tracked usage and per-model sizes.
+        """
+        with self._lock:
+            return {
+                "memory_budget_bytes": self._memory_budget,
+                "resident_bytes": sum(self._loaded.values()),
+                "models": dict(self._loaded),
+                "pinned": dict(self._pins)
+            }
+
+    def _load(self, model_name, model):
+        rss_before = current_rss_bytes()
+        if not model.is_loaded:
+            model.load_model()
+        rss_delta = max(current_rss_bytes() - rss_before, 0)
+        if not model.is_loaded:
+            return
+
+        size = model.memory_footprint() or rss_delta
+        with self._lock:
+            self._loaded[model_name] = size
+            self._sizes_seen[model_name] = size
+            self._make_room(0, exclude=model_name)
+
+    def _make_room(self, needed, exclude):
+        if self._memory_budget is None:
+            return
+        while sum(self._loaded.values()) + needed > self._memory_budget:
+            victim = next((name for name in self._loaded
+                           if name != exclude and not self._pins.get(name)), None)
+            if victim is None:
+                # Everything else is in use; go over budget rather than pull weights out from under a job.
+                break
+            self.log_info(f"Unloading {victim} to stay within the model memory budget")
+            self.unload(victim)
+
+
+def _budget_from_environment():
+    megabytes = os.environ.get("HIT137_MODEL_MEMORY_MB")
+    return int(megabytes) * 1024 * 1024 if megabytes else None
+
+
+_default_registry = None
+_default_registry_lock = threading.Lock()
+
+
+def get_default_registry():
+    """
+    It returns the process-wide registry with both models registered.
+    The RAM budget comes from the HIT137_MODEL_MEMORY_MB environment variable (unset means no limit).
+    """
+    global _default_registry
+    with _default_registry_lock:
+        if _default_registry is None:
+            from models.text_classifier import TextClassifierModel
+            from models.image_captioner import ImageCaptionerModel
+
+            _default_registry = ModelRegistry(memory_budget_bytes=_budget_from_environment())
+            _default_registry.register(TextClassifierModel, role="text")
+            _default_registry.register(ImageCaptionerModel, role="image")
+        return _default_registry
@@ -0,0 +1,222 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from .results_store import input_reference, revision_key, with_input
+
+
+class ResultCache:
+    """
+    A bounded LRU cache of model results held in memory, optionally backed by a directory on disk.
+    The disk store keeps one JSON file per key and evicts the oldest files once it grows past max_disk_bytes.
+    Its size is counted once when the cache is created and kept up to date on each write, so the
+    directory is only scanned again when it has to evict.
+    """
+
+    def __init__(self, max_entries=1024, disk_dir=None, max_disk_bytes=256 * 1024 * 1024, on_evict=None):
+        """
+        It sets up the in-memory LRU and, if disk_dir is given, the on-disk store.
+        on_evict is called with the number of entries dropped whenever the cache evicts.
+        """
+        self._max_entries = max_entries
+        self._disk_dir = disk_dir
+        self._max_disk_bytes = max_disk_bytes
+        self._on_evict = on_evict
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_bytes = 0
+        if self._disk_dir:
+            os.makedirs(self._disk_dir, exist_ok=True)
+            self._disk_bytes = sum(size for _, size, _ in self._disk_files())
+
+    @staticmethod
+    def make_key(model_name, fingerprint, content_hash):
+        """
+        It combines the model name, configuration fingerprint and content hash into one cache key.
+        """
+        raw = f"{model_name}\0{fingerprint}\0{content_hash}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """
+        It returns the cached result for key, or None when it is in neither memory nor disk.
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return dict(self._entries[key])
+
+        value = self._read_disk(key)
+        if value is not None:
+            self._store_memory(key, value)
+        return value
+
+    def put(self, key, value):
+        """
+        It stores a result in memory and, when configured, on disk.
+        """
+        self._store_memory(key, value)
+        self._write_disk(key, value)
+
+    def clear(self):
+        """
+        It empties the in-memory cache. Files on disk are kept.
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _store_memory(self, key, value):
+        evicted = 0
+        with self._lock:
+            self._entries[key] = dict(value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+                evicted += 1
+        self._report_evictions(evicted)
+
+    def _disk_path(self, key):
+        return os.path.join(self._disk_dir, f"{key}.json")
+
+    def _read_disk(self, key):
+        if not self._disk_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                value = json.load(f)
+            os.utime(path)  # Refresh mtime so disk eviction is least-recently-used
+            return value
+        except (OSError, ValueError):
+            return None
+
+    def _write_disk(self, key, value):
+        if not self._disk_dir:
+            return
+        path = self._disk_path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(value, f)
+            size = os.path.getsize(tmp_path)
+            replaced = os.path.getsize(path) if os.path.exists(path) else 0
+            os.replace(tmp_path, path)
+        except (OSError, TypeError, ValueError):
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        with self._lock:
+            self._disk_bytes += size - replaced
+            over_budget = self._disk_bytes > self._max_disk_bytes
+        if over_budget:
+            self._enforce_disk_limit()
+
+    def _disk_files(self):
+        files = []
+        for entry in os.scandir(self._disk_dir):
+            if entry.is_file() and entry.name.endswith(".json"):
+                stat = entry.stat()
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+        return files
+
+    def _enforce_disk_limit(self):
+        files = self._disk_files()
+        total = sum(size for _, size, _ in files)
+
+        evicted = 0
+        for _, size, path in sorted(files):
+            if total <= self._max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+                evicted += 1
+            except OSError:
+                pass
+        with self._lock:
+            self._disk_bytes = total
+        self._report_evictions(evicted)
+
+    def _report_evictions(self, count):
+        if count and self._on_evict is not None:
+            self._on_evict(count)
+
+
+class CachedModel:
+    """
+    A wrapper that puts a ResultCache in front of any BaseModel subclass.
+    Calls not handled here are passed through to the wrapped model, so it can be used in its place.
+    With a ResultsStore, every new result is also recorded there, and the store is consulted when
+    the cache misses, so results survive restarts.
+    """
+
+    def __init__(self, model, cache=None, store=None):
+        """
+        It wraps the model and reports cache hits and misses to its PerformanceMixin counters.
+        A cache built here also reports its evictions; pass on_evict yourself when supplying one.
+        """
+        self._wrapped = model
+        self._cache = cache if cache is not None else ResultCache(on_evict=model.track_cache_eviction)
+        self._store = store
+
+    @property
+    def cache(self):
+        """
+        This is the getter for the underlying result cache.
+        """
+        return self._cache
+
+    def cache_key(self, input_data, options=None):
+        """
+        It builds the cache key for an input from the model name, fingerprint and content hash.
+        Per-call options that change the output (e.g. generation settings) are part of the fingerprint.
+        """
+        return ResultCache.make_key(self._wrapped.model_name, *self._key_parts(input_data, options))
+
+    def _key_parts(self, input_data, options):
+        return revision_key(self._wrapped, options), self._wrapped.content_hash(input_data)
+
+    def process_input(self, input_data, *args, **kwargs):
+        """
+        It returns the cached result for the input, running the wrapped model only on a miss.
+        Error results are never cached, and a cached result is returned without streaming callbacks.
+        """
+        if args:
+            # Positional options are not part of the key, so skip the cache rather than guess.
+            return self._wrapped.process_input(input_data, *args, **kwargs)
+
+        options = {name: value for name, value in kwargs.items() if not callable(value)}
+        try:
+            fingerprint, content_hash = self._key_parts(input_data, options)
+        except Exception:
+            return self._wrapped.process_input(input_data, *args, **kwargs)
+        key = ResultCache.make_key(self._wrapped.model_name, fingerprint, content_hash)
+
+        cached = self._cache.get(key)
+        if cached is None and self._store is not None:
+            cached = self._store.lookup(self._wrapped.model_name, fingerprint, content_hash)
+            if cached is not None:
+                self._cache.put(key, cached)
+        if cached is not None:
+            self._wrapped.track_cache_hit()
+            return with_input(cached, input_data)
+
+        self._wrapped.track_cache_miss()
+        start_time = time.perf_counter()
+        result = self._wrapped.process_input(input_data, *args, **kwargs)
+        if "error" not in result:
+            self._cache.put(key, result)
+            if self._store is not None:
+                self._store.record(self._wrapped.model_name, fingerprint, content_hash,
+                                   input_reference(input_data), result,
+                                   round((time.perf_counter() - start_time) * 1000.0, 3))
+        return result
+
+    def __getattr__(self, name):
+        return getattr(self._wrapped, name)
@@ -0,0 +1,248 @@
+import atexit
+import csv
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# Columns written by export, in order. The full model output is kept as JSON in "output".
+EXPORT_COLUMNS = ("id", "model_name", "revision", "input_hash", "input_ref", "label", "confidence",
+                  "latency_ms", "created_at", "output")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY,
+    model_name TEXT NOT NULL,
+    revision TEXT NOT NULL,
+    input_hash TEXT NOT NULL,
+    input_ref TEXT,
+    label TEXT,
+    confidence REAL,
+    output TEXT NOT NULL,
+    latency_ms REAL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_input_hash ON results (input_hash, model_name, revision);
+CREATE INDEX IF NOT EXISTS results_label ON results (label);
+CREATE INDEX IF NOT EXISTS results_created_at ON results (created_at);
+"""
+
+
+def default_results_path():
+    """
+    It returns the results database path (HIT137_RESULTS_DB or ~/.cache/hit137/results.db).
+    """
+    return os.environ.get("HIT137_RESULTS_DB",
+                          os.path.join(os.path.expanduser("~"), ".cache", "hit137", "results.db"))
+
+
+def revision_key(model, options=None):
+    """
+    It returns the revision string results are stored under: the model's cache fingerprint plus any
+    per-call options that change the output (e.g. generation settings).
+    """
+    fingerprint = model.cache_fingerprint()
+    if options:
+        fingerprint += repr(sorted(options.items()))
+    return fingerprint
+
+
+def input_reference(input_data, max_chars=500):
+    """
+    It returns what a result row keeps of its input: the image path, or the start of the text.
+    Raw bytes are not kept.
+    """
+    if isinstance(input_data, str):
+        return input_data if len(input_data) <= max_chars else input_data[:max_chars] + "..."
+    return None
+
+
+def with_input(result, input_data):
+    """
+    It returns a copy of a cached or stored result that names input_data. Results are shared by
+    content, so a hit may come from a copy of the image at another path or from the same text with
+    other spacing.
+    """
+    result = dict(result)
+    if "image_path" in result:
+        result["image_path"] = input_data if isinstance(input_data, str) else None
+    elif "text" in result:
+        result["text"] = input_data
+    return result
+
+
+class ResultsStore:
+    """
+    An append-only SQLite store of model results, in WAL mode so readers do not block the writer.
+
+    Rows are buffered and inserted in one transaction per batch_size rows (or once flush_seconds have
+    passed since the oldest buffered row), which keeps per-result overhead low. Each row holds the
+    model name and revision fingerprint, the input hash and reference, the label and confidence, the
+    full output as JSON, the latency and a timestamp. lookup() makes it usable as a cache, and
+    export() streams rows to CSV or JSONL in chunks.
+    """
+
+    def __init__(self, path=None, batch_size=128, flush_seconds=1.0):
+        """
+        It opens (creating if needed) the database at path, by default default_results_path().
+        """
+        self._path = path or default_results_path()
+        if self._path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self._path)), exist_ok=True)
+        self._batch_size = batch_size
+        self._flush_seconds = flush_seconds
+        self._pending = []
+        self._oldest_pending = None
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self._path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(_SCHEMA)
+
+    @property
+    def path(self):
+        """
+        This is the getter for the database file path.
+        """
+        return self._path
+
+    def record(self, model_name, revision, input_hash, input_ref, output, latency_ms=None):
+        """
+        It buffers one result row, writing the buffer out once it is full or old enough.
+        """
+        row = (model_name, revision, input_hash, input_ref,
+               output.get("sentiment"), output.get("confidence"),
+               json.dumps(output, ensure_ascii=False), latency_ms, time.time())
+        with self._lock:
+            self._pending.append(row)
+            if self._oldest_pending is None:
+                self._oldest_pending = time.monotonic()
+            if (len(self._pending) >= self._batch_size
+                    or time.monotonic() - self._oldest_pending >= self._flush_seconds):
+                self._flush_locked()
+
+    def flush(self):
+        """
+        It writes all buffered rows in one transaction.
+        """
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if not self._pending:
+            return
+        with self._connection:
+            self._connection.executemany(
+                "INSERT INTO results (model_name, revision, input_hash, input_ref, label, confidence, "
+                "output, latency_ms, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                self._pending
+            )
+        self._pending = []
+        self._oldest_pending = None
+
+    def lookup(self, model_name, revision, input_hash):
+        """
+        It returns the most recent stored output for this model revision and input, or None.
+        """
+        with self._lock:
+            for row in reversed(self._pending):
+                if row[0] == model_name and row[1] == revision and row[2] == input_hash:
+                    return json.loads(row[6])
+            found = self._connection.execute(
+                "SELECT output FROM results WHERE input_hash = ? AND model_name = ? AND revision = ? "
+                "ORDER BY id DESC LIMIT 1",
+                (input_hash, model_name, revision)
+            ).fetchone()
+        return json.loads(found[0]) if found else None
+
+    def count(self, model_name=None, label=None):
+        """
+        It returns the number of stored rows, optionally for one model and/or label.
+        """
+        self.flush()
+        where, params = self._where(model_name, label, None)
+        with self._lock:
+            return self._connection.execute(f"SELECT COUNT(*) FROM results{where}", params).fetchone()[0]
+
+    def iter_rows(self, model_name=None, label=None, since=None, chunk_size=1000):
+        """
+        It yields stored rows as dicts, oldest first, fetching chunk_size rows at a time.
+        since is a Unix timestamp; only rows created at or after it are returned.
+        """
+        self.flush()
+        where, params = self._where(model_name, label, since)
+        last_id = 0
+        while True:
+            with self._lock:
+                chunk = self._connection.execute(
+                    f"SELECT {', '.join(EXPORT_COLUMNS)} FROM results"
+                    f"{where}{' AND' if where else ' WHERE'} id > ? ORDER BY id LIMIT ?",
+                    params + [last_id, chunk_size]
+                ).fetchall()
+            if not chunk:
+                return
+            for values in chunk:
+                yield dict(zip(EXPORT_COLUMNS, values))
+            last_id = chunk[-1][0]
+
+    def export(self, path, model_name=None, label=None, since=None, chunk_size=1000):
+        """
+        It streams the matching rows to path, as CSV for .csv files and JSONL otherwise.
+        Returns the number of rows written.
+        """
+        written = 0
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            writer = None
+            if path.lower().endswith(".csv"):
+                writer = csv.writer(f)
+                writer.writerow(EXPORT_COLUMNS)
+            for row in self.iter_rows(model_name, label, since, chunk_size):
+                if writer is not None:
+                    writer.writerow([row[column] for column in EXPORT_COLUMNS])
+                else:
+                    row["output"] = json.loads(row["output"])
+                    f.write(json.dumps(row, ensure_ascii=False) + "\n")
+                written += 1
+        return written
+
+    @staticmethod
+    def _where(model_name, label, since):
+        clauses, params = [], []
+        if model_name is not None:
+            clauses.append("model_name = ?")
+            params.append(model_name)
+        if label is not None:
+            clauses.append("label = ?")
+            params.append(label)
+        if since is not None:
+            clauses.append("created_at >= ?")
+            params.append(since)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def close(self):
+        """
+        It writes any buffered rows and closes the database.
+        """
+        with self._lock:
+            if self._connection is None:
+                return
+            self._flush_locked()
+            self._connection.close()
+            self._connection = None
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def get_default_results_store():
+    """
+    It returns the process-wide results store, opened on first use and flushed at exit.
+    """
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = ResultsStore()
+            atexit.register(_default_store.close)
+        return _default_store
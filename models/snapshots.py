@@ -0,0 +1,95 @@
+import importlib.util
+import json
+import os
+import re
+import time
+
+# Pinned snapshots are complete local copies of a model (weights as safetensors, config, tokenizer or
+# processor) that load without touching the network. A model uses its snapshot whenever one exists.
+
+SNAPSHOT_MARKER = "snapshot.json"
+
+
+def default_snapshot_root():
+    """
+    It returns the directory pinned snapshots live in (HIT137_MODEL_DIR or ~/.cache/hit137/models).
+    """
+    return os.environ.get("HIT137_MODEL_DIR",
+                          os.path.join(os.path.expanduser("~"), ".cache", "hit137", "models"))
+
+
+def offline_mode():
+    """
+    It returns True when HIT137_OFFLINE or HF_HUB_OFFLINE is set, so hub models load from the local
+    cache only instead of checking the network first.
+    """
+    return any(os.environ.get(name, "").lower() in ("1", "true", "yes") for name in ("HIT137_OFFLINE", "HF_HUB_OFFLINE"))
+
+
+def snapshot_dir(model_name, revision, root=None):
+    """
+    It returns the directory the snapshot of model_name at revision is pinned to.
+    """
+    safe_name = re.sub(r"[^A-Za-z0-9_.-]+", "_", f"{model_name}@{revision}")
+    return os.path.join(root or default_snapshot_root(), safe_name)
+
+
+def find_snapshot(model_name, revision, root=None):
+    """
+    It returns the pinned snapshot directory for model_name at revision, or None if there is none.
+    """
+    directory = snapshot_dir(model_name, revision, root)
+    return directory if os.path.isfile(os.path.join(directory, SNAPSHOT_MARKER)) else None
+
+
+def has_safetensors(directory):
+    """
+    It returns True when directory holds safetensors weights.
+    """
+    return any(name.endswith(".safetensors") for name in os.listdir(directory))
+
+
+def pretrained_options(source, revision):
+    """
+    It returns the from_pretrained keyword arguments for loading from source.
+
+    Local directories load with local_files_only, and with use_safetensors when the weights are
+    safetensors, which are memory-mapped rather than unpickled. When accelerate is installed,
+    low_cpu_mem_usage builds the model without random init so the weights are not held twice while
+    loading; older transformers releases refuse that flag without accelerate. Hub names pass the
+    revision, plus local_files_only in offline mode.
+    """
+    options = {}
+    if importlib.util.find_spec("accelerate") is not None:
+        options["low_cpu_mem_usage"] = True
+    if os.path.isdir(source):
+        options["local_files_only"] = True
+        if has_safetensors(source):
+            options["use_safetensors"] = True
+    else:
+        options["revision"] = revision
+        if offline_mode():
+            options["local_files_only"] = True
+    return options
+
+
+def pin_snapshot(model, root=None):
+    """
+    It loads model from the hub and saves a pinned local snapshot with safetensors weights.
+    Returns the snapshot directory.
+    """
+    directory = snapshot_dir(model.model_name, model.revision, root)
+    if not model.is_loaded:
+        model.load_model()
+    if not model.is_loaded:
+        raise RuntimeError(f"Could not load {model.model_name} to pin it")
+    tmp_directory = f"{directory}.tmp"
+    model.save_pretrained(tmp_directory)
+    with open(os.path.join(tmp_directory, SNAPSHOT_MARKER), "w", encoding="utf-8") as f:
+        json.dump({"model_name": model.model_name, "revision": model.revision, "pinned_at": time.time()}, f)
+    if os.path.exists(directory):
+        import shutil
+
+        shutil.rmtree(directory)
+    os.replace(tmp_directory, directory)
+    return directory
@@ -3,8 +3,14 @@
 from .base_model import BaseModel
 from oop.mixins import LoggingMixin, PerformanceMixin
 from oop.decorators import execution_timer, validate_input_type
-import torch
-from transformers import pipeline, AutoTokenizer, AutoModelForSequenceClassification
+from utlis.memory import module_size_bytes
+from utlis.metrics import get_metrics_registry
+from .precision import validate_precision, resolve_precision, apply_precision
+from .backends import BACKENDS, load_runner
+import hashlib
+
+# torch and transformers are imported inside the methods that need them, so importing
+# this module (and starting the GUI) does not pay for them until a model is loaded.
 
 
 class TextClassifierModel(LoggingMixin, PerformanceMixin, BaseModel):
@@ -12,43 +18,133 @@ class TextClassifierModel(LoggingMixin, PerformanceMixin, BaseModel):
     This class provides an implementaion of the BaseModel for text classification model.   
     """
     
-    def __init__(self):
+    def __init__(self, precision="fp32", backend="eager", model_path=None):
         """
         This loads the text classifier model with its own name and description.
+        precision is "fp32", "int8" (dynamic quantization of Linear layers) or "bf16".
+        backend is "eager", "torchscript" or "onnx"; exported graphs are cached on disk.
+        model_path is a local directory with a DistilBERT checkpoint to use instead of the hub one.
       
         """
     
         super().__init__(
             "distilbert-base-uncased-finetuned-sst-2-english",
-            "Text sentiment classification model using DistilBERT"
+            "Text sentiment classification model using DistilBERT",
+            model_path=model_path
         )
         self._classifier = None
         self._tokenizer = None
+        self._precision = validate_precision(precision)
+        self._runner = None
+        self._select_backend(backend)
+    
+    @property
+    def precision(self):
+        """
+        This is the getter for the precision mode applied when the model is loaded.
+        """
+        return self._precision
     
     # ... rest of the class remains the same ...
 
     def load_model(self):
         """
-         This method loads the text classification model from Hugging Face.
+         This method loads the text classification model from Hugging Face,
+         or from a local directory or pinned snapshot without touching the network.
         """
         try:
-            self.log_info(f"Loading model: {self._model_name}")
+            from transformers import pipeline, AutoModelForSequenceClassification, AutoTokenizer
+            
+            source = self.model_source
+            self.log_info(f"Loading model: {source}")
+            self._start_load_report(source)
+            options = self.pretrained_options(source)
+            tokenizer_options = {name: value for name, value in options.items()
+                                 if name in ("revision", "local_files_only")}
             self._classifier = pipeline(
                 "sentiment-analysis",
-                model=self._model_name,
-                tokenizer=self._model_name
+                model=AutoModelForSequenceClassification.from_pretrained(source, **options),
+                tokenizer=AutoTokenizer.from_pretrained(source, **tokenizer_options)
             )
+            self._precision, fallback_reason = resolve_precision(self._precision)
+            if fallback_reason:
+                self.log_info(fallback_reason)
+            self._classifier.model = apply_precision(self._classifier.model, self._precision)
+            self._load_backend()
             self._is_loaded = True
-            self.log_info("Text classification model loaded successfully")
+            report = self._finish_load_report()
+            self.log_info(f"Text classification model loaded successfully in {report['seconds']}s "
+                          f"(RSS {report['rss_before_mb']} -> {report['rss_after_mb']} MB)")
         except Exception as e:
             self.log_error(f"Failed to load text classification model: {str(e)}")
             self._is_loaded = False
     
+    def save_pretrained(self, directory):
+        """
+        It saves the loaded model (as safetensors) and tokenizer to directory.
+        """
+        self._classifier.model.save_pretrained(directory, safe_serialization=True)
+        self._classifier.tokenizer.save_pretrained(directory)
+    
+    def supported_backends(self):
+        """
+        It returns the backends DistilBERT can be exported to.
+        """
+        return BACKENDS
+    
+    def _load_backend(self):
+        """
+        It prepares the requested backend runner, falling back to eager if it cannot load.
+        """
+        self._runner = None
+        self._active_backend = "eager"
+        if self._backend == "eager":
+            return
+        try:
+            self._runner = load_runner(self._backend, self._classifier.model,
+                                       self._classifier.tokenizer, self.cache_fingerprint())
+            self._active_backend = self._backend
+            self.log_info(f"Using {self._backend} backend")
+        except Exception as e:
+            self.log_error(f"Could not load {self._backend} backend, falling back to eager: {str(e)}")
+    
+    def _forward(self, inputs):
+        """
+        It runs tokenized inputs through the active backend and returns float logits.
+        """
+        if self._runner is not None:
+            return self._runner(inputs)
+        return self._classifier.model(**inputs).logits.float()
+    
+    def unload_model(self):
+        """
+         This method drops the pipeline so the model weights can be freed.
+        """
+        self._classifier = None
+        self._runner = None
+        super().unload_model()
+        self.log_info("Text classification model unloaded")
+    
+    def _run_warm_up(self):
+        """
+        It runs one short sentence through the pipeline to warm up the kernels.
+        """
+        self._classifier("Warm-up sentence for the sentiment model.")
+    
+    def memory_footprint(self):
+        """
+        It returns the size in bytes of the loaded model parameters and buffers.
+        """
+        if self._classifier is None:
+            return 0
+        return module_size_bytes(self._classifier.model)
+    
     @execution_timer
     @validate_input_type(str)
     def process_input(self, input_text):
         """
         It processed the input text and returns analysis results.
+        Texts longer than the model's 512-token limit are scored in document mode instead of being cut off.
 
         """
         if not self._is_loaded:
@@ -60,16 +156,229 @@ class TextClassifierModel(LoggingMixin, PerformanceMixin, BaseModel):
             return {"error": "Input text cannot be empty"}
         
         try:
-            result = self._classifier(input_text)
+            tokenizer = self._classifier.tokenizer
+            metrics = get_metrics_registry()
+            # One untruncated tokenization serves both the length check and the forward pass; it is
+            # what the pipeline's own preprocess step would produce.
+            with metrics.stage_timer(self._model_name, "preprocess"):
+                model_inputs = tokenizer(input_text, return_tensors="pt")
+            if model_inputs["input_ids"].shape[-1] > tokenizer.model_max_length:
+                return self._classify_document(input_text)
+            if self._runner is not None:
+                return self._classify_with_backend(input_text, model_inputs)
+            
+            # The pipeline's remaining stages are called one by one so each can be timed.
+            with metrics.stage_timer(self._model_name, "forward"):
+                model_outputs = self._classifier.forward(model_inputs)
+            with metrics.stage_timer(self._model_name, "decode"):
+                result = self._classifier.postprocess(model_outputs)
+                if isinstance(result, list):
+                    result = result[0]
             return {
                 "text": input_text,
-                "sentiment": result[0]['label'],
-                "confidence": result[0]['score']
+                "sentiment": result['label'],
+                "confidence": result['score']
             }
         except Exception as e:
             self.log_error(f"Error processing text input: {str(e)}")
             return {"error": f"Processing failed: {str(e)}"}
     
+    @execution_timer
+    @validate_input_type(str)
+    def process_document(self, input_text, window_tokens=None, stride=64, batch_size=16, return_windows=False):
+        """
+        It scores a document of any length with overlapping token windows.
+
+        The text is tokenized once and split into windows of window_tokens (default: the model maximum)
+        that overlap by stride tokens. All windows run as a few batched forward passes, and the
+        window probabilities are averaged, weighted by window length, into a document-level label.
+        Set return_windows to include each window's character span and scores.
+        """
+        if not self._is_loaded:
+            self.load_model()
+        
+        self.track_call()
+        
+        if not input_text.strip():
+            return {"error": "Input text cannot be empty"}
+        
+        try:
+            return self._classify_document(input_text, window_tokens, stride, batch_size, return_windows)
+        except Exception as e:
+            self.log_error(f"Error processing document input: {str(e)}")
+            return {"error": f"Processing failed: {str(e)}"}
+    
+    def _classify_document(self, input_text, window_tokens=None, stride=64, batch_size=16, return_windows=False):
+        """
+        It runs the sliding-window scoring behind process_document.
+        """
+        import torch
+        
+        tokenizer = self._classifier.tokenizer
+        id2label = self._classifier.model.config.id2label
+        window_tokens = min(window_tokens or tokenizer.model_max_length, tokenizer.model_max_length)
+        
+        metrics = get_metrics_registry()
+        with metrics.stage_timer(self._model_name, "preprocess"):
+            encodings = tokenizer(
+                input_text,
+                max_length=window_tokens,
+                stride=stride,
+                truncation=True,
+                padding="longest",
+                return_overflowing_tokens=True,
+                return_offsets_mapping=True,
+                return_tensors="pt"
+            )
+            offsets = encodings.pop("offset_mapping")
+            encodings.pop("overflow_to_sample_mapping", None)
+        
+        window_scores = []
+        num_windows = encodings["input_ids"].shape[0]
+        with metrics.stage_timer(self._model_name, "forward", items=num_windows), torch.no_grad():
+            for start in range(0, num_windows, batch_size):
+                inputs = {key: value[start:start + batch_size] for key, value in encodings.items()}
+                window_scores.append(torch.softmax(self._forward(inputs), dim=-1))
+        scores = torch.cat(window_scores)
+        
+        # Weight each window by its real (unpadded) token count so short tail windows count less.
+        weights = encodings["attention_mask"].sum(dim=-1).float()
+        document_scores = (scores * weights.unsqueeze(-1)).sum(dim=0) / weights.sum()
+        confidence, label_id = document_scores.max(dim=-1)
+        
+        result = {
+            "text": input_text,
+            "sentiment": id2label[int(label_id)],
+            "confidence": float(confidence),
+            "num_windows": int(scores.shape[0])
+        }
+        if return_windows:
+            result["windows"] = []
+            for index in range(scores.shape[0]):
+                spans = [(int(a), int(b)) for a, b in offsets[index].tolist() if b > a]
+                window_confidence, window_label = scores[index].max(dim=-1)
+                result["windows"].append({
+                    "char_start": spans[0][0] if spans else 0,
+                    "char_end": spans[-1][1] if spans else 0,
+                    "sentiment": id2label[int(window_label)],
+                    "confidence": float(window_confidence)
+                })
+        return result
+    
+    @execution_timer
+    @validate_input_type(list)
+    def process_batch(self, texts, batch_size=32):
+        """
+        It processes a list of texts in length-bucketed batches and returns one result per text.
+
+        Texts are sorted by token length and split into groups of batch_size, so each
+        group is padded only to its own longest member and runs in a single forward pass.
+        Texts longer than the model maximum are scored with sliding windows, like process_input does.
+        Results come back in input order with the same shape process_input returns.
+        """
+        if not self._is_loaded:
+            self.load_model()
+
+        import torch
+
+        results = [None] * len(texts)
+        pending = []
+        for index, text in enumerate(texts):
+            self.track_call()
+            if not isinstance(text, str):
+                results[index] = {"error": f"Expected str, got {type(text).__name__}"}
+            elif not text.strip():
+                results[index] = {"error": "Input text cannot be empty"}
+            else:
+                pending.append(index)
+
+        if not pending:
+            return results
+
+        metrics = get_metrics_registry()
+        try:
+            tokenizer = self._classifier.tokenizer
+            model = self._classifier.model
+            # Tokenizing and padding are timed together as the batch's one preprocess stage.
+            with metrics.stage_timer(self._model_name, "preprocess", items=len(pending)):
+                encodings = tokenizer([texts[i] for i in pending])
+                lengths = [len(ids) for ids in encodings["input_ids"]]
+                # Sort by token length so each bucket holds inputs of similar size.
+                order = sorted((i for i, length in enumerate(lengths) if length <= tokenizer.model_max_length),
+                               key=lambda i: lengths[i])
+                buckets = []
+                for start in range(0, len(order), batch_size):
+                    bucket = order[start:start + batch_size]
+                    features = [{key: encodings[key][i] for key in encodings.keys()} for i in bucket]
+                    buckets.append((bucket, tokenizer.pad(features, padding="longest", return_tensors="pt")))
+        except Exception as e:
+            self.log_error(f"Error tokenizing text batch: {str(e)}")
+            for index in pending:
+                results[index] = {"error": f"Processing failed: {str(e)}"}
+            return results
+
+        # Texts longer than the model maximum are scored as documents, as process_input does.
+        for i, length in enumerate(lengths):
+            if length > tokenizer.model_max_length:
+                index = pending[i]
+                try:
+                    results[index] = self._classify_document(texts[index])
+                except Exception as e:
+                    self.log_error(f"Error processing document input: {str(e)}")
+                    results[index] = {"error": f"Processing failed: {str(e)}"}
+
+        for bucket, inputs in buckets:
+            try:
+                with metrics.stage_timer(self._model_name, "forward", items=len(bucket)), torch.no_grad():
+                    logits = self._forward(inputs)
+                with metrics.stage_timer(self._model_name, "decode", items=len(bucket)):
+                    scores = torch.softmax(logits, dim=-1)
+                    confidences, label_ids = scores.max(dim=-1)
+                    for position, i in enumerate(bucket):
+                        index = pending[i]
+                        results[index] = {
+                            "text": texts[index],
+                            "sentiment": model.config.id2label[int(label_ids[position])],
+                            "confidence": float(confidences[position])
+                        }
+            except Exception as e:
+                self.log_error(f"Error processing text batch: {str(e)}")
+                for i in bucket:
+                    results[pending[i]] = {"error": f"Processing failed: {str(e)}"}
+
+        return results
+
+    def _classify_with_backend(self, input_text, inputs=None):
+        """
+        It classifies one text through the exported backend instead of the pipeline.
+        inputs is the text already tokenized, when the caller has it.
+        """
+        import torch
+        
+        if inputs is None:
+            inputs = self._classifier.tokenizer(input_text, truncation=True, return_tensors="pt")
+        with torch.no_grad():
+            scores = torch.softmax(self._forward(inputs), dim=-1)[0]
+        confidence, label_id = scores.max(dim=-1)
+        return {
+            "text": input_text,
+            "sentiment": self._classifier.model.config.id2label[int(label_id)],
+            "confidence": float(confidence)
+        }
+    
+    def cache_fingerprint(self):
+        """
+        It adds the precision mode, since quantized outputs can differ slightly from fp32.
+        """
+        return f"{super().cache_fingerprint()}:{self._precision}"
+    
+    def content_hash(self, input_text):
+        """
+        It hashes the text with surrounding and repeated whitespace collapsed.
+        """
+        normalized = " ".join(input_text.split())
+        return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+    
     def get_model_info(self):
        
         return {
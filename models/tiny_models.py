@@ -0,0 +1,77 @@
+import os
+import string
+
+# Tiny randomly initialized checkpoints with the same architectures as the real models. Their
+# outputs are meaningless, but they load and run through exactly the same code paths, which is what
+# the offline benchmarks need. Nothing here touches the network.
+
+SPECIAL_TOKENS = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]", "[DEC]"]
+
+
+def _write_vocab(directory):
+    """
+    It writes a WordPiece vocabulary that can spell any lowercase ASCII text to directory/vocab.txt
+    and returns the token to id mapping.
+    """
+    characters = string.ascii_lowercase + string.digits + string.punctuation
+    tokens = SPECIAL_TOKENS + list(characters) + [f"##{c}" for c in string.ascii_lowercase + string.digits]
+    with open(os.path.join(directory, "vocab.txt"), "w", encoding="utf-8") as f:
+        f.write("\n".join(tokens) + "\n")
+    return {token: index for index, token in enumerate(tokens)}
+
+
+def build_tiny_text_model(directory, seed=0):
+    """
+    It saves a tiny DistilBERT sentiment checkpoint (2 layers, 64 wide, labels NEGATIVE/POSITIVE)
+    to directory, for TextClassifierModel(model_path=directory). Returns directory.
+    """
+    import torch
+    from transformers import DistilBertConfig, DistilBertForSequenceClassification, DistilBertTokenizerFast
+
+    os.makedirs(directory, exist_ok=True)
+    vocab = _write_vocab(directory)
+    torch.manual_seed(seed)
+    config = DistilBertConfig(
+        vocab_size=len(vocab), dim=64, hidden_dim=128, n_layers=2, n_heads=2,
+        max_position_embeddings=512, pad_token_id=vocab["[PAD]"],
+        id2label={0: "NEGATIVE", 1: "POSITIVE"}, label2id={"NEGATIVE": 0, "POSITIVE": 1}
+    )
+    DistilBertForSequenceClassification(config).eval().save_pretrained(directory)
+    # Loading from the directory reads vocab.txt the same way across transformers versions. The
+    # DistilBERT tokenizer matters: DistilBERT's forward() takes no token_type_ids.
+    DistilBertTokenizerFast.from_pretrained(directory, do_lower_case=True, model_max_length=512,
+                                            local_files_only=True).save_pretrained(directory)
+    return directory
+
+
+def build_tiny_caption_model(directory, seed=0, image_size=64):
+    """
+    It saves a tiny BLIP captioning checkpoint (2-layer vision and text towers, 32 wide) to directory,
+    for ImageCaptionerModel(model_path=directory). Returns directory.
+    """
+    import torch
+    from transformers import (BertTokenizerFast, BlipConfig, BlipForConditionalGeneration,
+                              BlipImageProcessor, BlipProcessor)
+
+    os.makedirs(directory, exist_ok=True)
+    vocab = _write_vocab(directory)
+    torch.manual_seed(seed)
+    config = BlipConfig(
+        vision_config={
+            "hidden_size": 32, "intermediate_size": 64, "num_hidden_layers": 2,
+            "num_attention_heads": 2, "image_size": image_size, "patch_size": 16
+        },
+        text_config={
+            "vocab_size": len(vocab), "hidden_size": 32, "encoder_hidden_size": 32,
+            "intermediate_size": 64, "num_hidden_layers": 2, "num_attention_heads": 2,
+            "max_position_embeddings": 64, "pad_token_id": vocab["[PAD]"],
+            "bos_token_id": vocab["[DEC]"], "sep_token_id": vocab["[SEP]"], "eos_token_id": vocab["[SEP]"]
+        },
+        projection_dim=32
+    )
+    BlipForConditionalGeneration(config).eval().save_pretrained(directory)
+    tokenizer = BertTokenizerFast.from_pretrained(directory, do_lower_case=True, model_max_length=64,
+                                                  bos_token="[DEC]", local_files_only=True)
+    image_processor = BlipImageProcessor(size={"height": image_size, "width": image_size})
+    BlipProcessor(image_processor=image_processor, tokenizer=tokenizer).save_pretrained(directory)
+    return directory
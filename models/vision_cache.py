@@ -0,0 +1,104 @@
+import threading
+from collections import OrderedDict
+
+
+class VisionFeatureCache:
+    """
+    A bounded LRU cache of vision-encoder outputs keyed by image content hash.
+
+    Captioning the same image again (with another prompt, other generation settings or on a retry)
+    can then skip image decoding and the vision encoder and run only the text decoder. The cache is
+    bounded by both entry count and tensor bytes, and counts hits, misses and evictions.
+    """
+
+    def __init__(self, max_entries=64, max_bytes=256 * 1024 * 1024):
+        """
+        It sets up an empty cache. max_entries=0 disables caching; lookups then always miss.
+        """
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        """
+        This is True when the cache can hold at least one entry.
+        """
+        return self._max_entries > 0
+
+    def get(self, key):
+        """
+        It returns the cached embeddings for key, or None, and counts the hit or miss.
+        """
+        with self._lock:
+            embeds = self._entries.get(key) if key is not None else None
+            if embeds is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return embeds
+
+    def put(self, key, embeds):
+        """
+        It stores one image's embeddings, evicting the least recently used entries to stay in bounds.
+        Tensors larger than the whole byte budget are not cached.
+        """
+        size = self._tensor_bytes(embeds)
+        if key is None or not self.enabled or size > self._max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._tensor_bytes(self._entries.pop(key))
+            self._entries[key] = embeds
+            self._bytes += size
+            while len(self._entries) > self._max_entries or self._bytes > self._max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= self._tensor_bytes(evicted)
+                self._evictions += 1
+
+    def clear(self):
+        """
+        It drops every entry, e.g. when the model that produced them is unloaded. Counters are kept.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def get_stats(self):
+        """
+        It returns the hit, miss and eviction counters, the hit rate and the current size.
+        """
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "entries": len(self._entries),
+                "bytes": self._bytes
+            }
+
+    @staticmethod
+    def _tensor_bytes(tensor):
+        return tensor.element_size() * tensor.nelement()
+
+    def __getstate__(self):
+        # Worker processes get an empty cache with the same bounds; the lock cannot be pickled.
+        state = self.__dict__.copy()
+        state.update(_entries=OrderedDict(), _bytes=0, _hits=0, _misses=0, _evictions=0)
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
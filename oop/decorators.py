@@ -1,17 +1,28 @@
 import time
 from functools import wraps
+from utlis.metrics import get_metrics_registry
 
 def execution_timer(func):
     """
-     Decorator that times and prints the execution time of a method.
+     Decorator that times a method and records it as the end_to_end stage in the metrics registry.
      This decorator is laid over procedures that take time-consuming tasks such as model inference.
+     The model name comes from the instance, items from the length of a list input, and an
+     exception or a result containing "error" counts as an error.
      """
     @wraps(func)
-    def wrapper(*args, **kwargs):
-        start_time = time.time()
-        result = func(*args, **kwargs)
-        end_time = time.time()
-        print(f"Execution time for {func.__name__}: {end_time - start_time:.4f} seconds")
+    def wrapper(self, *args, **kwargs):
+        model_name = getattr(self, "model_name", type(self).__name__)
+        items = len(args[0]) if args and isinstance(args[0], list) else 1
+        start_time = time.perf_counter()
+        try:
+            result = func(self, *args, **kwargs)
+        except Exception:
+            get_metrics_registry().observe(model_name, "end_to_end", time.perf_counter() - start_time,
+                                           items, error=True)
+            raise
+        error = isinstance(result, dict) and "error" in result
+        get_metrics_registry().observe(model_name, "end_to_end", time.perf_counter() - start_time,
+                                       items, error=error)
         return result
     return wrapper
 
@@ -35,7 +46,9 @@ def validate_input_type(expected_type):
         @wraps(func)
         def wrapper(self, input_data, *args, **kwargs):
             if not isinstance(input_data, expected_type):
-                raise TypeError(f"Expected {expected_type.__name__}, got {type(input_data).__name__}")
+                expected_names = " or ".join(t.__name__ for t in expected_type) \
+                    if isinstance(expected_type, tuple) else expected_type.__name__
+                raise TypeError(f"Expected {expected_names}, got {type(input_data).__name__}")
             return func(self, input_data, *args, **kwargs)
         return wrapper
     return decorator
\ No newline at end of file
@@ -33,6 +33,9 @@ class PerformanceMixin:
         # This allows classes like BaseModel (which requires specific args) to receive them.
         super().__init__(*args, **kwargs)
         self._call_count = 0 # Initialize the call counter attribute
+        self._cache_hits = 0
+        self._cache_misses = 0
+        self._cache_evictions = 0
     
     def track_call(self):
         """
@@ -46,4 +49,32 @@ class PerformanceMixin:
         Returns the number of times tracking methods have been called.
         This method provides access to the internal call counter for performance analysis.
         """
-        return self._call_count
\ No newline at end of file
+        return self._call_count
+    
+    def track_cache_hit(self):
+        """
+        Increments the counter of results served from a result cache.
+        """
+        self._cache_hits += 1
+    
+    def track_cache_miss(self):
+        """
+        Increments the counter of lookups that had to run the model.
+        """
+        self._cache_misses += 1
+    
+    def track_cache_eviction(self, count=1):
+        """
+        Increments the counter of entries dropped from a result cache to stay within its bounds.
+        """
+        self._cache_evictions += count
+    
+    def get_cache_stats(self):
+        """
+        Returns the cache hit, miss and eviction counters for performance analysis.
+        """
+        return {
+            "hits": self._cache_hits,
+            "misses": self._cache_misses,
+            "evictions": self._cache_evictions
+        }
@@ -0,0 +1,178 @@
+import json
+import time
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from server.micro_batcher import MicroBatcher, DeadlineExceeded, QueueFull
+from server.scheduler import ThreadBudget, PRIORITY_NORMAL, parse_priority
+from utlis.metrics import get_metrics_registry
+
+
+class InferenceServer:
+    """
+    A local HTTP service that shares one loaded copy of each model between many clients.
+    Requests for the same model are micro-batched into a single process_batch call.
+
+    Each model has its own queue and dispatch thread, so slow captions do not hold up text requests,
+    and the two share a fixed budget of torch threads. A full queue answers 503.
+
+    Endpoints:
+        POST /classify  {"text": "...", "deadline_ms": 500, "priority": "interactive"}
+        POST /caption   {"image_path": "...", "deadline_ms": 5000, "priority": "batch"}
+        GET  /health
+        GET  /metrics          (JSON)
+        GET  /metrics/prometheus
+    """
+
+    def __init__(self, text_model, image_model, host="127.0.0.1", port=8000,
+                 max_batch_size=16, max_wait_ms=10, default_deadline_ms=30000,
+                 max_queue_size=256, thread_budget=None):
+        """
+        It creates one micro-batcher per model and binds the HTTP server (localhost by default).
+        thread_budget is the number of torch threads the models share (default: all cores).
+        """
+        self._models = {"classify": text_model, "caption": image_model}
+        self._thread_budget = ThreadBudget(thread_budget)
+        self._batchers = {
+            route: MicroBatcher(route, model.process_batch, max_batch_size, max_wait_ms,
+                                max_queue_size=max_queue_size, thread_budget=self._thread_budget)
+            for route, model in self._models.items()
+        }
+        self._input_fields = {"classify": "text", "caption": "image_path"}
+        self._default_deadline_ms = default_deadline_ms
+        self._started_at = time.time()
+        self._httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self._httpd.daemon_threads = True
+
+    @property
+    def address(self):
+        """
+        This is the getter for the (host, port) the server is bound to.
+        """
+        return self._httpd.server_address
+
+    def serve_forever(self):
+        """
+        It serves requests until shutdown() is called.
+        """
+        self._httpd.serve_forever()
+
+    def shutdown(self):
+        """
+        It stops the HTTP server and the batchers.
+        """
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        for batcher in self._batchers.values():
+            batcher.stop()
+
+    def health(self):
+        """
+        It returns the liveness status and which models are loaded.
+        """
+        return {
+            "status": "ok",
+            "uptime_seconds": round(time.time() - self._started_at, 3),
+            "models": {route: model.is_loaded for route, model in self._models.items()}
+        }
+
+    def metrics(self):
+        """
+        It returns batching counters, per-model call counts, per-stage latency and, for the captioner,
+        vision-feature cache hit rates.
+        """
+        stages = get_metrics_registry().snapshot()
+        report = {
+            route: {
+                "model_name": self._models[route].model_name,
+                "call_count": self._models[route].get_call_count(),
+                "batching": batcher.get_stats(),
+                "thread_share": self._thread_budget.share(route),
+                "stages": stages.get(self._models[route].model_name, {})
+            }
+            for route, batcher in self._batchers.items()
+        }
+        for route, model in self._models.items():
+            if hasattr(model, "get_vision_cache_stats"):
+                report[route]["vision_cache"] = model.get_vision_cache_stats()
+        return report
+
+    def infer(self, route, payload):
+        """
+        It submits one request to the route's batcher and waits for it within its deadline.
+        Returns an HTTP status code and a JSON-serialisable body.
+        """
+        field = self._input_fields[route]
+        if not isinstance(payload, dict) or not isinstance(payload.get(field), str):
+            return 400, {"error": f"Request body must be a JSON object with a string '{field}' field"}
+
+        deadline_ms = payload.get("deadline_ms", self._default_deadline_ms)
+        try:
+            deadline_ms = float(deadline_ms)
+        except (TypeError, ValueError):
+            return 400, {"error": "deadline_ms must be a number"}
+
+        try:
+            priority = parse_priority(payload.get("priority", PRIORITY_NORMAL))
+        except ValueError as e:
+            return 400, {"error": str(e)}
+
+        deadline = time.monotonic() + deadline_ms / 1000.0
+        try:
+            future = self._batchers[route].submit(payload[field], deadline, priority)
+        except QueueFull as e:
+            return 503, {"error": str(e)}
+        try:
+            result = future.result(timeout=max(deadline - time.monotonic(), 0))
+        except (DeadlineExceeded, FutureTimeoutError):
+            future.cancel()
+            return 504, {"error": "Deadline exceeded"}
+        except Exception as e:
+            return 500, {"error": f"Processing failed: {str(e)}"}
+
+        return (422 if "error" in result else 200), result
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == "/health":
+                    self._send(200, server.health())
+                elif self.path == "/metrics":
+                    self._send(200, server.metrics())
+                elif self.path == "/metrics/prometheus":
+                    self._send_text(200, get_metrics_registry().to_prometheus())
+                else:
+                    self._send(404, {"error": "Not found"})
+
+            def do_POST(self):
+                route = self.path.strip("/")
+                if route not in server._batchers:
+                    self._send(404, {"error": "Not found"})
+                    return
+                try:
+                    length = int(self.headers.get("Content-Length", 0))
+                    payload = json.loads(self.rfile.read(length) or b"{}")
+                except ValueError:
+                    self._send(400, {"error": "Invalid JSON body"})
+                    return
+                self._send(*server.infer(route, payload))
+
+            def _send(self, status, body):
+                self._send_bytes(status, json.dumps(body).encode("utf-8"), "application/json")
+
+            def _send_text(self, status, text):
+                self._send_bytes(status, text.encode("utf-8"), "text/plain; version=0.0.4")
+
+            def _send_bytes(self, status, data, content_type):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,163 @@
+import itertools
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+
+class DeadlineExceeded(Exception):
+    """
+    Raised for a request whose deadline passed before its batch could run.
+    """
+
+
+class QueueFull(Exception):
+    """
+    Raised when a queue is full, so the caller can back off or reject the request.
+    """
+
+
+class MicroBatcher:
+    """
+    Collects requests that arrive within a short window and runs them as one batch.
+    A batch is dispatched as soon as it reaches max_batch_size or max_wait_ms has passed since its
+    first request, whichever comes first. Queued requests are taken in priority order.
+    """
+
+    def __init__(self, name, process_batch, max_batch_size=16, max_wait_ms=10, max_queue_size=None,
+                 thread_budget=None):
+        """
+        It sets up the request queue and starts the dispatch thread.
+        process_batch must take a list of inputs and return a list of results in the same order.
+        max_queue_size bounds the queued requests (None for no limit). thread_budget is an optional
+        scheduler.ThreadBudget each batch draws its torch threads from, under this batcher's name.
+        """
+        self._name = name
+        self._process_batch = thread_budget.wrap(name, process_batch) if thread_budget else process_batch
+        self._max_batch_size = max_batch_size
+        self._max_wait = max_wait_ms / 1000.0
+        self._max_queue_size = max_queue_size
+        self._queue = queue.PriorityQueue()
+        self._sequence = itertools.count()
+        self._stopped = threading.Event()
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "requests": 0,
+            "batches": 0,
+            "batched_items": 0,
+            "expired": 0,
+            "rejected": 0,
+            "errors": 0,
+            "busy_seconds": 0.0
+        }
+        self._thread = threading.Thread(target=self._run, name=f"batcher-{name}", daemon=True)
+        self._thread.start()
+
+    @property
+    def name(self):
+        """
+        This is the getter for the batcher name.
+        """
+        return self._name
+
+    def submit(self, item, deadline=None, priority=1):
+        """
+        It queues one input and returns a Future for its result.
+        deadline is an absolute time.monotonic() value after which the request is dropped.
+        priority is a scheduler priority class; lower values are batched first.
+        Raises QueueFull when max_queue_size requests are already waiting.
+        """
+        with self._stats_lock:
+            if self._max_queue_size is not None and self._queue.qsize() >= self._max_queue_size:
+                self._stats["rejected"] += 1
+                raise QueueFull(f"The {self._name} queue is full ({self._max_queue_size} requests)")
+            self._stats["requests"] += 1
+        future = Future()
+        self._queue.put((priority, next(self._sequence), (item, deadline, future)))
+        return future
+
+    def stop(self):
+        """
+        It stops the dispatch thread after the current batch.
+        """
+        self._stopped.set()
+        self._queue.put((float("-inf"), next(self._sequence), None))
+        self._thread.join()
+
+    def get_stats(self):
+        """
+        It returns request, batch and timing counters for the metrics endpoint.
+        """
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["queue_depth"] = self._queue.qsize()
+        stats["mean_batch_size"] = stats["batched_items"] / stats["batches"] if stats["batches"] else 0.0
+        stats["max_batch_size"] = self._max_batch_size
+        stats["max_wait_ms"] = self._max_wait * 1000.0
+        stats["max_queue_size"] = self._max_queue_size
+        return stats
+
+    def _next_entry(self, timeout=None):
+        return self._queue.get(timeout=timeout)[2]
+
+    def _collect_batch(self):
+        first = self._next_entry()
+        if first is None:
+            return None
+
+        batch = [first]
+        window_end = time.monotonic() + self._max_wait
+        while len(batch) < self._max_batch_size:
+            remaining = window_end - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                entry = self._next_entry(timeout=remaining)
+            except queue.Empty:
+                break
+            if entry is None:
+                self._stopped.set()
+                break
+            batch.append(entry)
+        return batch
+
+    def _run(self):
+        while not self._stopped.is_set():
+            batch = self._collect_batch()
+            if batch is None:
+                break
+
+            now = time.monotonic()
+            live = []
+            for item, deadline, future in batch:
+                if not future.set_running_or_notify_cancel():
+                    # The caller gave up waiting; count it as expired and skip it.
+                    with self._stats_lock:
+                        self._stats["expired"] += 1
+                elif deadline is not None and now > deadline:
+                    future.set_exception(DeadlineExceeded("Deadline exceeded before processing"))
+                    with self._stats_lock:
+                        self._stats["expired"] += 1
+                else:
+                    live.append((item, future))
+
+            if live:
+                self._dispatch(live)
+
+    def _dispatch(self, live):
+        start_time = time.perf_counter()
+        try:
+            results = self._process_batch([item for item, _ in live])
+            for (_, future), result in zip(live, results):
+                future.set_result(result)
+        except Exception as e:
+            for _, future in live:
+                if not future.done():
+                    future.set_exception(e)
+            with self._stats_lock:
+                self._stats["errors"] += len(live)
+
+        with self._stats_lock:
+            self._stats["batches"] += 1
+            self._stats["batched_items"] += len(live)
+            self._stats["busy_seconds"] += time.perf_counter() - start_time
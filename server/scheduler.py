@@ -0,0 +1,244 @@
+import heapq
+import itertools
+import os
+import threading
+import time
+from concurrent.futures import Future
+
+from server.micro_batcher import DeadlineExceeded, QueueFull
+
+# Priority classes; lower values run first.
+PRIORITY_INTERACTIVE = 0
+PRIORITY_NORMAL = 1
+PRIORITY_BATCH = 2
+PRIORITIES = {"interactive": PRIORITY_INTERACTIVE, "normal": PRIORITY_NORMAL, "batch": PRIORITY_BATCH}
+
+
+def parse_priority(value):
+    """
+    It turns a priority class name ("interactive", "normal", "batch") or number into a priority value.
+    """
+    if isinstance(value, str):
+        if value not in PRIORITIES:
+            raise ValueError(f"Unknown priority '{value}', expected one of {', '.join(PRIORITIES)}")
+        return PRIORITIES[value]
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    raise ValueError("priority must be a class name or an integer")
+
+
+class ThreadBudget:
+    """
+    Splits a fixed number of CPU threads between the models that are running at the same time.
+
+    Each call gets total_threads * weight / (sum of the weights of the lanes running right now), at
+    least one thread, and sets it with torch.set_num_threads on the calling thread. With torch's
+    default OpenMP backend that count applies to the calling thread only, so a caption and a text
+    call running together split the cores instead of each taking all of them. Shares are worked out
+    when a call starts.
+    """
+
+    def __init__(self, total_threads=None, weights=None):
+        """
+        total_threads defaults to the number of cores. weights maps lane names to relative shares.
+        """
+        self._total_threads = total_threads or os.cpu_count() or 1
+        self._weights = dict(weights or {})
+        self._running = {}
+        self._lock = threading.Lock()
+
+    @property
+    def total_threads(self):
+        """
+        This is the getter for the number of threads shared between lanes.
+        """
+        return self._total_threads
+
+    def share(self, lane):
+        """
+        It returns the thread count lane would get if it started a call now.
+        """
+        with self._lock:
+            return self._share_locked(lane)
+
+    def _share_locked(self, lane):
+        weight = self._weights.get(lane, 1)
+        running_weight = weight + sum(self._weights.get(name, 1) * count
+                                      for name, count in self._running.items() if name != lane)
+        return max(1, int(self._total_threads * weight / running_weight))
+
+    def acquire(self, lane):
+        """
+        It marks lane as running, applies its share to the calling thread and returns the share.
+        """
+        with self._lock:
+            threads = self._share_locked(lane)
+            self._running[lane] = self._running.get(lane, 0) + 1
+        _set_torch_threads(threads)
+        return threads
+
+    def release(self, lane):
+        """
+        It marks one call of lane as finished.
+        """
+        with self._lock:
+            self._running[lane] -= 1
+            if not self._running[lane]:
+                del self._running[lane]
+
+    def wrap(self, lane, func):
+        """
+        It returns func wrapped so each call runs within lane's share of the thread budget.
+        """
+        def budgeted(*args, **kwargs):
+            self.acquire(lane)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.release(lane)
+        return budgeted
+
+
+def _set_torch_threads(threads):
+    try:
+        import torch
+    except ImportError:
+        return
+    torch.set_num_threads(threads)
+
+
+class _Lane:
+    """
+    One model's queue and the thread that works through it, highest priority and earliest deadline first.
+    """
+
+    def __init__(self, name, budget, max_queue_size):
+        self.name = name
+        self._budget = budget
+        self._max_queue_size = max_queue_size
+        self._heap = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._stopped = False
+        self._stats = {"submitted": 0, "completed": 0, "rejected": 0, "expired": 0, "errors": 0}
+        self._thread = threading.Thread(target=self._run, name=f"lane-{name}", daemon=True)
+        self._thread.start()
+
+    def submit(self, func, item, priority, deadline):
+        future = Future()
+        # Requests without a deadline sort after those with one in the same priority class.
+        order = (priority, deadline if deadline is not None else float("inf"), next(self._sequence))
+        with self._condition:
+            if len(self._heap) >= self._max_queue_size:
+                self._stats["rejected"] += 1
+                raise QueueFull(f"The {self.name} queue is full ({self._max_queue_size} requests)")
+            heapq.heappush(self._heap, (order, func, item, deadline, future))
+            self._stats["submitted"] += 1
+            self._condition.notify()
+        return future
+
+    def stop(self):
+        with self._condition:
+            self._stopped = True
+            pending, self._heap = self._heap, []
+            self._condition.notify()
+        for _, _, _, _, future in pending:
+            future.cancel()
+        self._thread.join()
+
+    def get_stats(self):
+        with self._condition:
+            stats = dict(self._stats)
+            stats["queue_depth"] = len(self._heap)
+        stats["max_queue_size"] = self._max_queue_size
+        stats["thread_share"] = self._budget.share(self.name)
+        return stats
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._heap and not self._stopped:
+                    self._condition.wait()
+                if self._stopped:
+                    return
+                _, func, item, deadline, future = heapq.heappop(self._heap)
+
+            if not future.set_running_or_notify_cancel():
+                continue
+            if deadline is not None and time.monotonic() > deadline:
+                future.set_exception(DeadlineExceeded("Deadline exceeded before processing"))
+                self._count("expired")
+                continue
+
+            self._budget.acquire(self.name)
+            try:
+                future.set_result(func(item))
+                self._count("completed")
+            except Exception as e:
+                future.set_exception(e)
+                self._count("errors")
+            finally:
+                self._budget.release(self.name)
+
+    def _count(self, key):
+        with self._condition:
+            self._stats[key] += 1
+
+
+class ModelScheduler:
+    """
+    Runs model calls on one queue and thread per model, so a seconds-long caption never holds up a
+    millisecond text request queued behind it.
+
+    Within a model's queue, lower priority values run first and, within a class, earlier deadlines.
+    Requests whose deadline has passed are dropped with DeadlineExceeded instead of run; submit
+    raises QueueFull once a queue holds max_queue_size requests. Calls draw their torch threads from
+    a shared ThreadBudget.
+    """
+
+    def __init__(self, thread_budget=None, max_queue_size=64):
+        """
+        thread_budget is a ThreadBudget (default: all cores, equal weights).
+        """
+        self._budget = thread_budget or ThreadBudget()
+        self._max_queue_size = max_queue_size
+        self._lanes = {}
+        self._lock = threading.Lock()
+
+    @property
+    def thread_budget(self):
+        """
+        This is the getter for the thread budget shared by the lanes.
+        """
+        return self._budget
+
+    def submit(self, lane, func, item, priority=PRIORITY_NORMAL, deadline=None):
+        """
+        It queues func(item) on the lane's thread and returns a Future for the result.
+        deadline is an absolute time.monotonic() value after which the request is dropped.
+        Raises QueueFull when the lane's queue is full.
+        """
+        return self._lane(lane).submit(func, item, priority, deadline)
+
+    def _lane(self, name):
+        with self._lock:
+            if name not in self._lanes:
+                self._lanes[name] = _Lane(name, self._budget, self._max_queue_size)
+            return self._lanes[name]
+
+    def get_stats(self):
+        """
+        It returns queue depth, thread share and request counters for each lane.
+        """
+        with self._lock:
+            lanes = list(self._lanes.values())
+        return {lane.name: lane.get_stats() for lane in lanes}
+
+    def stop(self):
+        """
+        It stops every lane thread and cancels the requests still queued.
+        """
+        with self._lock:
+            lanes = list(self._lanes.values())
+        for lane in lanes:
+            lane.stop()
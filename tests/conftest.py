@@ -0,0 +1,46 @@
+import os
+import sys
+
+import pytest
+
+# The packages live at the repository root, which has no setup.py, so make them importable.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope="session")
+def tiny_text_dir(tmp_path_factory):
+    """
+    A tiny DistilBERT checkpoint saved once per test session.
+    """
+    pytest.importorskip("torch")
+    pytest.importorskip("transformers")
+    from models.tiny_models import build_tiny_text_model
+
+    return build_tiny_text_model(str(tmp_path_factory.mktemp("tiny-text")))
+
+
+@pytest.fixture(scope="session")
+def tiny_caption_dir(tmp_path_factory):
+    """
+    A tiny BLIP checkpoint saved once per test session.
+    """
+    pytest.importorskip("torch")
+    pytest.importorskip("transformers")
+    pytest.importorskip("PIL")
+    from models.tiny_models import build_tiny_caption_model
+
+    return build_tiny_caption_model(str(tmp_path_factory.mktemp("tiny-caption")))
+
+
+@pytest.fixture
+def image_files(tmp_path):
+    """
+    Three small JPEG files with different content.
+    """
+    image_module = pytest.importorskip("PIL.Image")
+    paths = []
+    for index, color in enumerate([(200, 30, 30), (30, 200, 30), (30, 30, 200)]):
+        path = tmp_path / f"image{index}.jpg"
+        image_module.new("RGB", (80, 60), color=color).save(path, "JPEG")
+        paths.append(str(path))
+    return paths
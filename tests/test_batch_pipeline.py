@@ -0,0 +1,19 @@
+from utlis.batch_pipeline import batched, read_text_inputs
+
+
+def test_jsonl_lines_without_text_become_empty_inputs(tmp_path):
+    path = tmp_path / "inputs.jsonl"
+    path.write_text('{"text": "first"}\n{"label": "no text"}\nnot json\n[1, 2]\n{"text": 3}\n',
+                    encoding="utf-8")
+    assert list(read_text_inputs(str(path), "jsonl")) == ["first", "", "", "", "3"]
+    assert list(read_text_inputs(str(path), "jsonl", offset=4)) == ["3"]
+
+
+def test_auto_format_keeps_plain_lines(tmp_path):
+    path = tmp_path / "inputs.txt"
+    path.write_text('plain line\n{"text": "from json"}\n{not json\n', encoding="utf-8")
+    assert list(read_text_inputs(str(path))) == ["plain line", "from json", "{not json"]
+
+
+def test_batched_does_not_pad_the_last_batch():
+    assert list(batched(range(5), 2)) == [[0, 1], [2, 3], [4]]
@@ -0,0 +1,36 @@
+import pytest
+
+pytest.importorskip("tkinter")
+
+from gui.batch_view import BatchResultStore
+
+
+@pytest.fixture
+def store():
+    store = BatchResultStore()
+    prefix = "/photos/" + "x" * BatchResultStore.INPUT_KEY_CHARS
+    rows = [
+        {"input": prefix + "/c.jpg", "caption": "a cat"},
+        {"input": "b text", "sentiment": "NEGATIVE", "confidence": 0.7},
+        {"input": prefix + "/a.jpg", "caption": "a dog"},
+        {"input": "a text", "sentiment": "POSITIVE", "confidence": 0.9},
+        {"input": prefix + "/b.jpg", "error": "Processing failed"},
+    ]
+    for row in rows:
+        store.append(row)
+    yield store
+    store.close()
+
+
+def test_input_sort_orders_rows_whose_prefixes_tie(store):
+    assert list(store.select(sort_by="input")) == [2, 4, 0, 3, 1]
+    assert list(store.select(sort_by="input", descending=True)) == [1, 3, 0, 4, 2]
+    assert all(len(key) <= BatchResultStore.INPUT_KEY_CHARS for key in store._input_keys)
+
+
+def test_filters(store):
+    assert list(store.select(label="POSITIVE")) == [3]
+    assert list(store.select(min_confidence=0.8)) == [3]
+    assert list(store.select(contains="DOG")) == [2]
+    assert list(store.select(label="ERROR")) == [4]
+    assert store.labels() == ["ERROR", "NEGATIVE", "OK", "POSITIVE"]
@@ -0,0 +1,31 @@
+import pytest
+
+from models.benchmark import _check_results, compare_to_baseline
+
+
+class _Model:
+    model_name = "stub"
+
+
+def test_error_results_invalidate_the_run():
+    _check_results(_Model(), [{"sentiment": "POSITIVE"}])
+    with pytest.raises(RuntimeError, match="boom"):
+        _check_results(_Model(), [{"sentiment": "POSITIVE"}, {"error": "boom"}])
+
+
+def test_compare_to_baseline_direction():
+    baseline = {"metrics": {"text.single_latency_ms.threads1": 10.0, "text.items_per_sec.batch8.threads1": 100.0}}
+    current = {"metrics": {"text.single_latency_ms.threads1": 13.0, "text.items_per_sec.batch8.threads1": 70.0}}
+    regressed = {r["metric"] for r in compare_to_baseline(current, baseline, threshold=0.2)}
+    assert regressed == {"text.single_latency_ms.threads1", "text.items_per_sec.batch8.threads1"}
+    faster = {"metrics": {"text.single_latency_ms.threads1": 5.0, "text.items_per_sec.batch8.threads1": 200.0}}
+    assert compare_to_baseline(faster, baseline, threshold=0.2) == []
+
+
+def test_tiny_text_model_classifies(tiny_text_dir):
+    from models.text_classifier import TextClassifierModel
+
+    model = TextClassifierModel(model_path=tiny_text_dir)
+    result = model.process_input("a tiny test sentence")
+    assert "error" not in result
+    assert result["sentiment"] in ("NEGATIVE", "POSITIVE")
@@ -0,0 +1,95 @@
+import hashlib
+import os
+import shutil
+
+import pytest
+
+pytest.importorskip("PIL")
+
+from models.caption_sync import CaptionManifest, sync_directory
+
+
+class _FakeCaptioner:
+    """
+    Captions an image with its file name and the prompt, failing for names in fail.
+    """
+
+    model_name = "fake-captioner"
+
+    def __init__(self, fingerprint="v1", fail=()):
+        self.fingerprint = fingerprint
+        self.fail = set(fail)
+        self.captioned = []
+
+    def cache_fingerprint(self):
+        return self.fingerprint
+
+    def content_hash(self, path):
+        with open(path, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+
+    def process_batch(self, paths, prompt=None, **options):
+        self.captioned.extend(paths)
+        return [{"error": "model failed"} if os.path.basename(path) in self.fail
+                else {"image_path": path, "caption": f"{prompt or ''}{os.path.basename(path)}"}
+                for path in paths]
+
+
+def _sync(model, root, manifest, **options):
+    return sync_directory(model, str(root), manifest, batch_size=2, scan_workers=2, **options)
+
+
+def test_counts_across_runs(tmp_path, image_files):
+    root = os.path.dirname(image_files[0])
+    (tmp_path / "broken.jpg").write_bytes(b"not an image")
+    manifest = CaptionManifest(str(tmp_path / "manifest.db"))
+    model = _FakeCaptioner()
+
+    first = _sync(model, root, manifest)
+    assert (first["scanned"], first["captioned"], first["invalid"]) == (4, 3, 1)
+
+    second = _sync(model, root, manifest)
+    assert (second["unchanged"], second["captioned"]) == (4, 0)
+
+    shutil.copy(image_files[0], tmp_path / "copy.jpg")
+    os.remove(image_files[2])
+    third = _sync(model, root, manifest)
+    assert (third["reused"], third["deleted"], third["captioned"]) == (1, 1, 0)
+    manifest.close()
+
+
+def test_failed_images_are_retried(tmp_path, image_files):
+    root = os.path.dirname(image_files[0])
+    manifest = CaptionManifest(str(tmp_path / "manifest.db"))
+    assert _sync(_FakeCaptioner(fail={"image1.jpg"}), root, manifest)["errors"] == 1
+    retry = _sync(_FakeCaptioner(), root, manifest)
+    assert (retry["unchanged"], retry["captioned"]) == (2, 1)
+    manifest.close()
+
+
+def test_new_revision_or_options_recaption(tmp_path, image_files):
+    root = os.path.dirname(image_files[0])
+    manifest = CaptionManifest(str(tmp_path / "manifest.db"))
+    _sync(_FakeCaptioner(), root, manifest)
+
+    assert _sync(_FakeCaptioner(fingerprint="v2"), root, manifest)["captioned"] == 3
+    assert _sync(_FakeCaptioner(fingerprint="v2"), root, manifest, num_beams=3)["captioned"] == 3
+    assert _sync(_FakeCaptioner(fingerprint="v2"), root, manifest, num_beams=3)["unchanged"] == 3
+    manifest.close()
+
+
+def test_prompt_recaptions_and_copies_do_not_reuse_unprompted_captions(tmp_path, image_files):
+    root = os.path.dirname(image_files[0])
+    manifest = CaptionManifest(str(tmp_path / "manifest.db"))
+    _sync(_FakeCaptioner(), root, manifest)
+
+    prompted = _FakeCaptioner()
+    results = []
+    stats = _sync(prompted, root, manifest, on_result=results.append, prompt="a photo of ")
+    assert stats["captioned"] == 3
+    assert all(result["caption"].startswith("a photo of ") for result in results)
+
+    shutil.copy(image_files[0], tmp_path / "copy.jpg")
+    copied = _sync(_FakeCaptioner(), root, manifest, prompt="a drawing of ")
+    assert (copied["reused"], copied["captioned"]) == (0, 4)
+    manifest.close()
@@ -0,0 +1,89 @@
+import pytest
+
+from models.cascade import CascadeModel, HashedNgramClassifier, distill_first_stage
+
+_POSITIVE = ["a good film", "really good acting", "good fun", "a good story", "good and warm"]
+_NEGATIVE = ["a bad film", "really bad acting", "bad fun", "a bad story", "bad and cold"]
+
+
+class _Teacher:
+    """
+    A full model that calls a text POSITIVE when it says "good"; every call is recorded.
+    """
+
+    model_name = "teacher"
+
+    def __init__(self):
+        self.batches = []
+
+    def cache_fingerprint(self):
+        return "teacher@1"
+
+    def _classify(self, text):
+        if not isinstance(text, str) or not text.strip():
+            return {"error": "Input text cannot be empty"}
+        label = "POSITIVE" if "good" in text else "NEGATIVE"
+        return {"text": text, "sentiment": label, "confidence": 0.99}
+
+    def process_input(self, text, **kwargs):
+        self.batches.append([text])
+        return self._classify(text)
+
+    def process_batch(self, texts, **kwargs):
+        self.batches.append(list(texts))
+        return [self._classify(text) for text in texts]
+
+
+@pytest.fixture
+def first_stage():
+    classifier, report = distill_first_stage(_Teacher(), (_POSITIVE + _NEGATIVE) * 10, epochs=10,
+                                             holdout=0.2, num_features=1 << 12)
+    assert report["labels"] == ["NEGATIVE", "POSITIVE"]
+    assert report["holdout_texts"] == 20
+    return classifier
+
+
+def test_distilled_stage_follows_the_teacher(first_stage, tmp_path):
+    assert first_stage.predict("good")[0] == "POSITIVE"
+    assert first_stage.predict("bad")[0] == "NEGATIVE"
+    path = tmp_path / "stage.json"
+    first_stage.save(path)
+    loaded = HashedNgramClassifier.load(path)
+    assert loaded.fingerprint() == first_stage.fingerprint()
+    assert loaded.predict("a good story") == first_stage.predict("a good story")
+
+
+def test_distill_needs_both_labels():
+    with pytest.raises(ValueError):
+        distill_first_stage(_Teacher(), _POSITIVE)
+
+
+def test_confident_texts_skip_the_full_model(first_stage):
+    teacher = _Teacher()
+    cascade = CascadeModel(teacher, first_stage, threshold=0.6, audit_rate=0.0)
+    results = cascade.process_batch(["a good film", "bad and cold", "", 42])
+    assert [result.get("stage") for result in results[:2]] == ["fast", "fast"]
+    assert all("error" in result for result in results[2:])
+    assert teacher.batches == [["", 42]]
+
+    strict = CascadeModel(teacher, first_stage, threshold=1.0, audit_rate=0.0)
+    assert strict.process_input("a good film")["stage"] == "full"
+    stats = strict.get_cascade_stats()
+    assert (stats["fast_answers"], stats["full_answers"]) == (0, 1)
+
+
+def test_audits_are_counted(first_stage):
+    cascade = CascadeModel(_Teacher(), first_stage, threshold=0.6, audit_rate=1.0)
+    results = cascade.process_batch(["a good film", "bad and cold"])
+    assert all(result["audit"]["agrees"] for result in results)
+    stats = cascade.get_cascade_stats()
+    assert (stats["audited"], stats["disagreements"], stats["fast_share"]) == (2, 0, 1.0)
+
+
+def test_fingerprint_and_validation(first_stage):
+    cascade = CascadeModel(_Teacher(), first_stage, threshold=0.9)
+    assert cascade.cache_fingerprint().startswith("teacher@1:cascade-")
+    assert cascade.cache_fingerprint() != CascadeModel(_Teacher(), first_stage, threshold=0.8).cache_fingerprint()
+    assert cascade.model_name == "teacher"
+    with pytest.raises(ValueError):
+        CascadeModel(_Teacher(), first_stage, threshold=0.4)
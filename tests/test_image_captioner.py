@@ -0,0 +1,36 @@
+import pytest
+
+pytest.importorskip("PIL")
+
+from models.image_captioner import ImageCaptionerModel
+
+
+def test_failed_load_gives_per_item_errors(tmp_path, image_files):
+    model = ImageCaptionerModel(model_path=str(tmp_path / "no-such-checkpoint"))
+    results = model.process_batch(image_files + ["missing.jpg"])
+    assert len(results) == 4
+    assert all("not loaded" in result["error"] for result in results)
+    assert "not loaded" in model.process_input(image_files[0])["error"]
+
+
+def test_process_batch_keeps_order_and_per_item_errors(tiny_caption_dir, image_files, tmp_path):
+    bad = tmp_path / "bad.jpg"
+    bad.write_bytes(b"not an image")
+    model = ImageCaptionerModel(model_path=tiny_caption_dir)
+    paths = [image_files[0], str(bad), image_files[1], "missing.jpg", image_files[2]]
+    results = model.process_batch(paths, batch_size=2, max_new_tokens=4)
+    assert [("error" in result) for result in results] == [False, True, False, True, False]
+    assert [result["image_path"] for result in results if "error" not in result] == image_files
+
+
+
+def test_load_image_accepts_non_jpeg_formats(tmp_path):
+    from PIL import Image
+    from utlis.helpers import load_image
+
+    for extension in ("webp", "tiff", "png"):
+        path = str(tmp_path / f"image.{extension}")
+        Image.new("RGB", (1600, 1200), "blue").save(path)
+        image, message = load_image(path)
+        assert image is not None, message
+        assert image.mode == "RGB" and image.size == (534, 400)
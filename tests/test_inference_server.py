@@ -0,0 +1,76 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+from server.inference_server import InferenceServer
+
+
+class _StubModel:
+    """
+    Echoes its inputs so the server and batcher can be exercised without torch.
+    """
+
+    def __init__(self, name, field, output):
+        self.model_name = name
+        self.is_loaded = True
+        self.batches = []
+        self._field = field
+        self._output = output
+
+    def process_batch(self, items):
+        self.batches.append(list(items))
+        return [{"error": "bad input"} if item == "bad" else {self._field: item, self._output: item.upper()}
+                for item in items]
+
+    def get_call_count(self):
+        return sum(len(batch) for batch in self.batches)
+
+
+@pytest.fixture
+def server():
+    text = _StubModel("stub-text", "text", "sentiment")
+    image = _StubModel("stub-image", "image_path", "caption")
+    instance = InferenceServer(text, image, port=0, max_wait_ms=20)
+    thread = threading.Thread(target=instance.serve_forever, daemon=True)
+    thread.start()
+    yield instance
+    instance.shutdown()
+
+
+def _post(server, route, body):
+    host, port = server.address
+    request = urllib.request.Request(f"http://{host}:{port}/{route}", data=json.dumps(body).encode("utf-8"),
+                                     headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(request, timeout=5) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def test_classify_round_trip(server):
+    assert _post(server, "classify", {"text": "hello"}) == (200, {"text": "hello", "sentiment": "HELLO"})
+
+
+def test_per_item_error_and_bad_request(server):
+    assert _post(server, "caption", {"image_path": "bad"})[0] == 422
+    assert _post(server, "classify", {"nope": 1})[0] == 400
+    assert _post(server, "classify", {"text": "x", "priority": "urgent"})[0] == 400
+
+
+def test_concurrent_requests_are_batched(server):
+    results = [None] * 8
+
+    def send(index):
+        results[index] = _post(server, "classify", {"text": f"t{index}"})
+
+    threads = [threading.Thread(target=send, args=(index,)) for index in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert all(status == 200 and body["text"] == f"t{index}" for index, (status, body) in enumerate(results))
+    assert server.metrics()["classify"]["batching"]["requests"] == 8
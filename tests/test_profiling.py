@@ -0,0 +1,16 @@
+import pytest
+
+from utlis import profiling
+
+
+def test_parse_profile_spec():
+    assert profiling.parse_profile_spec("text:5, image") == [("text", 5), ("image", 1)]
+    for bad in ("text:x", "text:0", "image:-2"):
+        with pytest.raises(ValueError):
+            profiling.parse_profile_spec(bad)
+
+
+def test_malformed_environment_value_is_ignored(monkeypatch, capsys):
+    monkeypatch.setenv(profiling.PROFILE_ENV_VAR, "text:many")
+    profiling.arm_from_environment({"text": object})
+    assert "Ignoring" in capsys.readouterr().out
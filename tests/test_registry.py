@@ -0,0 +1,82 @@
+import pytest
+
+from models.registry import ModelRegistry
+
+
+class _FakeModel:
+    """
+    A model with a fixed footprint whose loads and unloads are recorded.
+    """
+
+    size = 100
+
+    def __init__(self, name):
+        self.model_name = name
+        self.is_loaded = False
+        self.loads = 0
+
+    def load_model(self):
+        self.is_loaded = True
+        self.loads += 1
+
+    def unload_model(self):
+        self.is_loaded = False
+
+    def memory_footprint(self):
+        return self.size if self.is_loaded else 0
+
+
+def _registry(budget=None, names=("a", "b", "c")):
+    registry = ModelRegistry(memory_budget_bytes=budget)
+    for name in names:
+        registry.register(lambda name=name: _FakeModel(name), role=f"role-{name}")
+    return registry
+
+
+def test_roles_do_not_depend_on_registration_order():
+    registry = _registry(names=("c", "a", "b"))
+    assert registry.name_for("role-a") == "a"
+    assert registry.name_for("role-c") == "c"
+    with pytest.raises(KeyError):
+        registry.name_for("missing")
+
+
+def test_least_recently_used_model_is_evicted_over_budget():
+    registry = _registry(budget=250)
+    registry.get("a")
+    registry.get("b")
+    registry.get("a")  # b is now least recently used
+    registry.get("c")
+    assert set(registry.resident_bytes()) == {"a", "c"}
+    assert not registry.peek("b").is_loaded
+    assert registry.get_stats()["resident_bytes"] == 200
+
+
+def test_get_reloads_a_model_unloaded_elsewhere():
+    registry = _registry()
+    model = registry.get("a")
+    model.unload_model()
+    assert registry.get("a").is_loaded
+    assert model.loads == 2
+
+
+def test_pinned_models_are_not_evicted():
+    registry = _registry(budget=150)
+    with registry.using("a") as model:
+        registry.get("b")  # Would evict a, but a is in use
+        assert model.is_loaded
+        assert registry.get_stats()["pinned"] == {"a": 1}
+        assert not registry.unload("a")
+    assert registry.get_stats()["pinned"] == {}
+    registry.get("c")
+    assert set(registry.resident_bytes()) == {"c"}
+
+
+def test_idle_eviction_skips_pinned_models():
+    registry = _registry()
+    registry.get("a")
+    registry.pin("b")
+    registry.get("b")
+    assert registry.evict_idle(idle_timeout=-1) == ["a"]
+    registry.unpin("b")
+    assert registry.evict_idle(idle_timeout=-1) == ["b"]
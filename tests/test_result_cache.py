@@ -0,0 +1,104 @@
+import pytest
+
+from models.result_cache import CachedModel, ResultCache
+
+
+class _CountingModel:
+    """
+    A model whose calls and cache counters are recorded; "fail" gives an error result.
+    """
+
+    model_name = "counting"
+
+    def __init__(self):
+        self.calls = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def cache_fingerprint(self):
+        return "counting@1"
+
+    def content_hash(self, text):
+        return " ".join(text.split())
+
+    def process_input(self, text, **options):
+        self.calls += 1
+        if text == "fail":
+            return {"error": "failed"}
+        return {"text": text, "options": sorted(options)}
+
+    def track_cache_hit(self):
+        self.hits += 1
+
+    def track_cache_miss(self):
+        self.misses += 1
+
+    def track_cache_eviction(self, count=1):
+        self.evictions += count
+
+
+def test_keys_depend_on_every_part():
+    key = ResultCache.make_key("model", "fp", "hash")
+    assert key == ResultCache.make_key("model", "fp", "hash")
+    assert key != ResultCache.make_key("model", "fp2", "hash")
+    assert key != ResultCache.make_key("model2", "fp", "hash")
+    assert key != ResultCache.make_key("model", "fp", "hash2")
+
+
+def test_memory_lru_evicts_least_recently_used():
+    evicted = []
+    cache = ResultCache(max_entries=2, on_evict=evicted.append)
+    cache.put("a", {"value": 1})
+    cache.put("b", {"value": 2})
+    cache.get("a")
+    cache.put("c", {"value": 3})
+    assert cache.get("b") is None
+    assert cache.get("a") == {"value": 1}
+    assert len(cache) == 2 and evicted == [1]
+
+
+def test_disk_store_survives_clear_and_is_bounded(tmp_path):
+    cache = ResultCache(disk_dir=str(tmp_path), max_disk_bytes=10 ** 6)
+    cache.put("a", {"value": 1})
+    cache.clear()
+    assert cache.get("a") == {"value": 1}
+
+    small = ResultCache(disk_dir=str(tmp_path / "small"), max_disk_bytes=40)
+    for key in "abcd":
+        small.put(key, {"value": "x" * 10})
+    assert len(list((tmp_path / "small").glob("*.json"))) < 4
+
+
+def test_cached_model_keys_include_options_and_skip_errors():
+    model = _CountingModel()
+    cached = CachedModel(model)
+    cached.process_input("some  text")
+    assert cached.process_input("some text") == {"text": "some text", "options": []}
+    assert model.calls == 1 and (model.hits, model.misses) == (1, 1)
+
+    cached.process_input("some text", max_new_tokens=5)
+    assert model.calls == 2
+    assert cached.cache_key("x", {"a": 1}) != cached.cache_key("x")
+
+    cached.process_input("fail")
+    cached.process_input("fail")
+    assert model.calls == 4
+    assert cached.model_name == "counting"
+
+
+def test_hits_name_the_current_input_and_are_copies():
+    cached = CachedModel(_CountingModel())
+    cached.process_input("some text")
+    hit = cached.process_input("  some   text ")
+    assert hit["text"] == "  some   text "
+    hit["extra"] = True
+    assert "extra" not in cached.process_input("some text")
+
+
+def test_disk_writes_under_budget_do_not_rescan(tmp_path, monkeypatch):
+    cache = ResultCache(disk_dir=str(tmp_path), max_disk_bytes=10 ** 6)
+    monkeypatch.setattr(cache, "_disk_files", lambda: pytest.fail("rescanned the cache directory"))
+    for key in "abc":
+        cache.put(key, {"value": key})
+    assert ResultCache(disk_dir=str(tmp_path))._disk_bytes == cache._disk_bytes > 0
@@ -0,0 +1,93 @@
+import csv
+import hashlib
+import json
+import os
+import shutil
+
+from models.results_store import ResultsStore, revision_key
+from utlis.batch_pipeline import run_inference
+
+
+class _FileModel:
+    """
+    Reads each input file, like the image captioner, and reports missing files as per-item errors.
+    """
+
+    model_name = "file-model"
+
+    def __init__(self):
+        self.processed = []
+
+    def cache_fingerprint(self):
+        return "file-model@v1"
+
+    def content_hash(self, path):
+        with open(path, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+
+    def process_batch(self, paths, **options):
+        self.processed.extend(paths)
+        results = []
+        for path in paths:
+            if os.path.exists(path):
+                results.append({"image_path": path, "caption": os.path.basename(path)})
+            else:
+                results.append({"error": f"File not found: {path}"})
+        return results
+
+
+def test_round_trip_survives_reopen(tmp_path):
+    path = str(tmp_path / "results.db")
+    store = ResultsStore(path, batch_size=2)
+    store.record("m", "r1", "h1", "text one", {"sentiment": "POSITIVE", "confidence": 0.9}, 1.5)
+    store.record("m", "r1", "h2", "text two", {"sentiment": "NEGATIVE", "confidence": 0.8}, 2.5)
+    store.record("m", "r2", "h1", "text one", {"sentiment": "NEGATIVE", "confidence": 0.7})
+    assert store.lookup("m", "r2", "h1")["sentiment"] == "NEGATIVE"  # Still buffered
+    store.close()
+
+    store = ResultsStore(path)
+    assert store.lookup("m", "r1", "h1") == {"sentiment": "POSITIVE", "confidence": 0.9}
+    assert store.lookup("m", "r1", "missing") is None
+    assert store.count() == 3
+    assert store.count(label="NEGATIVE") == 2
+
+    csv_path = str(tmp_path / "out.csv")
+    assert store.export(csv_path, model_name="m", label="POSITIVE") == 1
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    assert rows[0]["input_ref"] == "text one"
+
+    jsonl_path = str(tmp_path / "out.jsonl")
+    assert store.export(jsonl_path, chunk_size=1) == 3
+    with open(jsonl_path, encoding="utf-8") as f:
+        assert [json.loads(line)["input_hash"] for line in f] == ["h1", "h2", "h1"]
+    store.close()
+
+
+def test_revision_key_includes_options():
+    model = _FileModel()
+    assert revision_key(model) == "file-model@v1"
+    assert revision_key(model, {"num_beams": 3}) != revision_key(model, {"num_beams": 1})
+
+
+def test_stored_run_answers_repeats_and_survives_unreadable_inputs(tmp_path, image_files):
+    store = ResultsStore(str(tmp_path / "results.db"))
+    missing = str(tmp_path / "missing.jpg")
+    model = _FileModel()
+
+    first = list(run_inference(model, [[image_files[0], missing, image_files[1]]], store=store))
+    assert "error" in first[1]
+    assert [result["caption"] for result in (first[0], first[2])] == ["image0.jpg", "image1.jpg"]
+
+    model.processed.clear()
+    second = list(run_inference(model, [[image_files[0], missing, image_files[1]]], store=store))
+    assert second[0] == first[0] and second[2] == first[2]
+    assert model.processed == [missing]  # Only the unreadable input ran again
+
+    copy = str(tmp_path / "copy.jpg")
+    shutil.copyfile(image_files[0], copy)
+    model.processed.clear()
+    (copied,) = run_inference(model, [[copy]], store=store)
+    assert model.processed == []
+    assert copied["image_path"] == copy and copied["caption"] == "image0.jpg"
+    store.close()
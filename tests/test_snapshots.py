@@ -0,0 +1,39 @@
+import importlib.util
+
+from models import snapshots
+
+
+def test_local_source_loads_offline_with_safetensors(tmp_path):
+    (tmp_path / "model.safetensors").write_bytes(b"")
+    options = snapshots.pretrained_options(str(tmp_path), "main")
+    assert options["local_files_only"] is True
+    assert options["use_safetensors"] is True
+    assert "revision" not in options
+
+
+def test_low_cpu_mem_usage_needs_accelerate(monkeypatch, tmp_path):
+    real_find_spec = importlib.util.find_spec
+    monkeypatch.setattr(importlib.util, "find_spec",
+                        lambda name, *args: None if name == "accelerate" else real_find_spec(name, *args))
+    assert "low_cpu_mem_usage" not in snapshots.pretrained_options(str(tmp_path), "main")
+    assert "low_cpu_mem_usage" not in snapshots.pretrained_options("some/model", "main")
+
+
+def test_hub_source_is_pinned_to_revision(monkeypatch):
+    monkeypatch.delenv("HIT137_OFFLINE", raising=False)
+    monkeypatch.delenv("HF_HUB_OFFLINE", raising=False)
+    options = snapshots.pretrained_options("some/model", "abc123")
+    assert options["revision"] == "abc123"
+    assert "local_files_only" not in options
+    monkeypatch.setenv("HIT137_OFFLINE", "1")
+    assert snapshots.pretrained_options("some/model", "abc123")["local_files_only"] is True
+
+
+def test_tiny_checkpoints_load_from_local_directory(tiny_text_dir, tiny_caption_dir):
+    from models.text_classifier import TextClassifierModel
+    from models.image_captioner import ImageCaptionerModel
+
+    for model in (TextClassifierModel(model_path=tiny_text_dir), ImageCaptionerModel(model_path=tiny_caption_dir)):
+        model.load_model()
+        assert model.is_loaded
+        assert model.load_report["source"] == model.model_path
@@ -0,0 +1,66 @@
+import functools
+
+import pytest
+
+from models.text_classifier import TextClassifierModel
+
+
+def test_short_and_long_inputs(tiny_text_dir):
+    model = TextClassifierModel(model_path=tiny_text_dir)
+    short = model.process_input("short text")
+    assert "error" not in short and "num_windows" not in short
+    long = model.process_input("word " * 600)
+    assert long["num_windows"] > 1
+    assert model.process_input("   ") == {"error": "Input text cannot be empty"}
+
+
+def test_process_batch_keeps_order_and_per_item_errors(tiny_text_dir):
+    model = TextClassifierModel(model_path=tiny_text_dir)
+    texts = ["first text", "", "second text", 7, "word " * 600]
+    results = model.process_batch(texts, batch_size=2)
+    assert [("error" in result) for result in results] == [False, True, False, True, False]
+    assert [result["text"] for result in results if "error" not in result] == [texts[0], texts[2], texts[4]]
+    assert results[4]["num_windows"] == model.process_input(texts[4])["num_windows"] > 1
+    single = model.process_input("first text")
+    assert results[0]["sentiment"] == single["sentiment"]
+    assert results[0]["confidence"] == pytest.approx(single["confidence"], abs=1e-4)
+
+
+def test_int8_precision_agrees_with_fp32(tiny_text_dir):
+    from models.precision import evaluate_precision_modes
+
+    samples = ["first text", "second text", "a third, longer text"]
+    tiny_model = functools.partial(TextClassifierModel, model_path=tiny_text_dir)
+    report = evaluate_precision_modes(tiny_model, samples, modes=("fp32", "int8"))
+    assert report["fp32"]["errors"] == 0 and report["int8"]["errors"] == 0
+    assert report["fp32"]["agreement_with_fp32"] == 1.0
+
+
+def test_bf16_fallback_reason_is_returned(monkeypatch):
+    from models import precision
+
+    monkeypatch.setattr(precision, "bf16_supported", lambda: False)
+    assert precision.resolve_precision("bf16") == ("fp32", "bf16 is not supported on this CPU, using fp32 instead")
+    assert precision.resolve_precision("int8") == ("int8", None)
+
+
+def test_torchscript_backend_matches_eager(tiny_text_dir, tmp_path, monkeypatch):
+    from models.backends import check_backend_parity
+
+    monkeypatch.setenv("HIT137_BACKEND_CACHE", str(tmp_path))
+    tiny_model = functools.partial(TextClassifierModel, model_path=tiny_text_dir)
+    report = check_backend_parity(tiny_model, ["first text", "second text"], backends=("torchscript",))
+    assert report["torchscript"]["passed"], report
+
+
+def test_process_batch_records_one_preprocess_stage(tiny_text_dir):
+    from utlis.metrics import get_metrics_registry
+
+    model = TextClassifierModel(model_path=tiny_text_dir)
+    model.load_model()
+    metrics = get_metrics_registry()
+    metrics.reset()
+    model.process_batch(["one", "two words", "three short words"], batch_size=1)
+    stages = metrics.snapshot()[model.model_name]
+    assert (stages["preprocess"]["count"], stages["preprocess"]["items"]) == (1, 3)
+    assert (stages["forward"]["count"], stages["forward"]["items"]) == (3, 3)
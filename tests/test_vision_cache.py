@@ -0,0 +1,50 @@
+from models.vision_cache import VisionFeatureCache
+
+
+class _Tensor:
+    """
+    Stands in for a tensor of a given byte size.
+    """
+
+    def __init__(self, size):
+        self.size = size
+
+    def element_size(self):
+        return 4
+
+    def nelement(self):
+        return self.size // 4
+
+
+def test_entry_and_byte_bounds():
+    cache = VisionFeatureCache(max_entries=2, max_bytes=100)
+    cache.put("a", _Tensor(40))
+    cache.put("b", _Tensor(40))
+    cache.get("a")
+    cache.put("c", _Tensor(40))
+    assert cache.get("b") is None and cache.get("a") is not None
+    cache.put("d", _Tensor(80))
+    cache.put("huge", _Tensor(200))
+    stats = cache.get_stats()
+    assert len(cache) == 1 and stats["bytes"] == 80
+    assert cache.get("huge") is None
+    assert stats["evictions"] == 3 and stats["hits"] == 2
+
+
+def test_disabled_cache_and_missing_keys_always_miss():
+    cache = VisionFeatureCache(max_entries=0)
+    cache.put("a", _Tensor(4))
+    assert cache.get("a") is None and cache.get(None) is None
+    assert not cache.enabled and cache.get_stats()["misses"] == 2
+
+
+def test_vision_cache_skips_the_encoder_on_repeats(tiny_caption_dir, image_files):
+    from models.image_captioner import ImageCaptionerModel
+
+    model = ImageCaptionerModel(model_path=tiny_caption_dir)
+    first = model.process_input(image_files[0], max_new_tokens=4)
+    again = model.process_input(image_files[0], max_new_tokens=4)
+    prompted = model.process_batch([image_files[0]], max_new_tokens=4, prompt="a picture of")[0]
+    assert (first["vision_cache_hit"], again["vision_cache_hit"], prompted["vision_cache_hit"]) == (False, True, True)
+    assert again["caption"] == first["caption"]
+    assert model.get_vision_cache_stats()["hits"] == 2
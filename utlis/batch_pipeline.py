@@ -0,0 +1,189 @@
+import glob
+import json
+import os
+import sys
+import time
+from itertools import islice
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".jpe", ".mpo", ".png", ".bmp", ".gif", ".webp", ".tif", ".tiff",
+                    ".ppm", ".pgm", ".pbm", ".pnm", ".tga", ".ico")
+
+
+def read_text_inputs(source, input_format="auto", offset=0):
+    """
+    It streams texts from a JSONL or plain text file (or "-" for stdin), one per line.
+    JSONL lines must be objects with a "text" field. The first offset inputs are skipped.
+    """
+    handle = sys.stdin if source == "-" else open(source, "r", encoding="utf-8")
+    try:
+        lines = (line.rstrip("\n") for line in handle)
+        for line in islice(lines, offset, None):
+            yield _parse_text_line(line, input_format)
+    finally:
+        if handle is not sys.stdin:
+            handle.close()
+
+
+def _parse_text_line(line, input_format):
+    if input_format == "text":
+        return line
+    if input_format == "jsonl" or line.lstrip().startswith("{"):
+        try:
+            record = json.loads(line)
+            if isinstance(record, dict) and "text" in record:
+                return str(record["text"])
+        except ValueError:
+            pass
+        if input_format == "jsonl":
+            return ""  # Malformed or missing "text": the model reports it as an empty input
+    return line
+
+
+def read_image_inputs(source, offset=0):
+    """
+    It streams image paths from a directory tree or a glob pattern, in a stable sorted order.
+    The first offset paths are skipped, so an interrupted run can be resumed.
+    """
+    if os.path.isdir(source):
+        paths = _walk_images(source)
+    else:
+        paths = (path for path in sorted(glob.iglob(source, recursive=True))
+                 if path.lower().endswith(IMAGE_EXTENSIONS))
+    return islice(paths, offset, None)
+
+
+def _walk_images(root):
+    for directory, subdirs, files in os.walk(root):
+        subdirs.sort()
+        for name in sorted(files):
+            if name.lower().endswith(IMAGE_EXTENSIONS):
+                yield os.path.join(directory, name)
+
+
+def batched(items, batch_size):
+    """
+    It groups a stream of items into lists of at most batch_size without reading ahead further.
+    """
+    iterator = iter(items)
+    while True:
+        batch = list(islice(iterator, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def run_inference(model, batches, store=None, **options):
+    """
+    It runs each batch through the model's process_batch and yields results one at a time.
+    options are passed on to process_batch (e.g. generation settings).
+    With a ResultsStore, inputs already stored for this model and options are answered from it,
+    and new results are recorded in it.
+    """
+    for batch in batches:
+        if store is None:
+            yield from model.process_batch(batch, **options)
+        else:
+            yield from _run_stored_batch(model, batch, store, options)
+
+
+def _run_stored_batch(model, batch, store, options):
+    from models.results_store import input_reference, revision_key, with_input
+
+    revision = revision_key(model, options)
+    hashes = [_content_hash_or_none(model, item) for item in batch]
+    results = [store.lookup(model.model_name, revision, input_hash) if input_hash is not None else None
+               for input_hash in hashes]
+    results = [with_input(result, item) if result is not None else None for item, result in zip(batch, results)]
+    missing = [index for index, result in enumerate(results) if result is None]
+    if missing:
+        start_time = time.perf_counter()
+        computed = model.process_batch([batch[index] for index in missing], **options)
+        latency_ms = round((time.perf_counter() - start_time) * 1000.0 / len(missing), 3)
+        for index, result in zip(missing, computed):
+            results[index] = result
+            if "error" not in result and hashes[index] is not None:
+                store.record(model.model_name, revision, hashes[index], input_reference(batch[index]),
+                             result, latency_ms)
+    return results
+
+
+def _content_hash_or_none(model, item):
+    """
+    It returns the item's content hash, or None when it cannot be read (e.g. a missing image file);
+    the model then reports that item's error like it would without a store.
+    """
+    try:
+        return model.content_hash(item)
+    except OSError:
+        return None
+
+
+def run_each(process, items, **options):
+    """
+    It calls process on one item at a time, for modes that do their own batching per item.
+    """
+    for item in items:
+        yield process(item, **options)
+
+
+def run_streaming(model, items, on_token, **options):
+    """
+    It runs items one at a time through process_input, passing each generated piece to on_token.
+    """
+    for item in items:
+        yield model.process_input(item, on_token=on_token, **options)
+
+
+def write_jsonl(results, destination, append=False, stats=None):
+    """
+    It writes each result as one JSON line to the destination file (or "-" for stdout).
+    Stdout means the real process stdout, so model log prints can be redirected elsewhere.
+    """
+    handle = sys.__stdout__ if destination == "-" else open(destination, "a" if append else "w", encoding="utf-8")
+    try:
+        for result in results:
+            handle.write(json.dumps(result, ensure_ascii=False) + "\n")
+            if stats is not None:
+                stats.record(result)
+        handle.flush()
+    finally:
+        if handle is not sys.__stdout__:
+            handle.close()
+
+
+def count_lines(path):
+    """
+    It counts the lines already written to an output file, used to resume from where it stopped.
+    """
+    if path == "-" or not os.path.exists(path):
+        return 0
+    with open(path, "rb") as f:
+        return sum(1 for _ in f)
+
+
+class ThroughputStats:
+    """
+    Collects item and error counts over a run and formats a throughput summary.
+    """
+
+    def __init__(self):
+        self._start_time = time.perf_counter()
+        self._items = 0
+        self._errors = 0
+
+    def record(self, result):
+        """
+        It counts one written result.
+        """
+        self._items += 1
+        if "error" in result:
+            self._errors += 1
+
+    def summary(self):
+        """
+        It returns the run summary as a single line of text.
+        """
+        elapsed = time.perf_counter() - self._start_time
+        rate = self._items / elapsed if elapsed > 0 else 0.0
+        return (f"Processed {self._items} items ({self._errors} errors) "
+                f"in {elapsed:.2f} seconds: {rate:.2f} items/sec")
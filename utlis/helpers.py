@@ -1,6 +1,21 @@
+import io
 import os
 from PIL import Image
 
+EXIF_ORIENTATION_TAG = 0x0112
+EXIF_TRANSPOSE_METHODS = {
+    2: Image.Transpose.FLIP_LEFT_RIGHT,
+    3: Image.Transpose.ROTATE_180,
+    4: Image.Transpose.FLIP_TOP_BOTTOM,
+    5: Image.Transpose.TRANSPOSE,
+    6: Image.Transpose.ROTATE_270,
+    7: Image.Transpose.TRANSVERSE,
+    8: Image.Transpose.ROTATE_90
+}
+
+# Largest image accepted for decoding; anything bigger is rejected before pixels are read.
+MAX_IMAGE_PIXELS = 100_000_000
+
 def validate_image_file(file_path):
     """
     It validates that the provided file path points to a valid image file.
@@ -15,6 +30,50 @@ def validate_image_file(file_path):
     except Exception as e:
         return False, f"Invalid image file: {str(e)}"
 
+def load_image(source, target_size=384, max_pixels=MAX_IMAGE_PIXELS):
+    """
+    It validates and decodes an image in one pass, returning (image, message).
+    The image is None when the source is not a usable image.
+
+    source can be a file path or the raw image bytes. JPEGs are decoded with Pillow's draft mode
+    straight to the smallest scale that is still at least target_size on each side, so large photos
+    are never decoded at full resolution. Other formats are decoded in full (draft mode only applies
+    to JPEG) and then reduced by an integer factor, which keeps the image handed on small.
+    EXIF orientation is applied and the result is RGB.
+    """
+    if isinstance(source, (bytes, bytearray)):
+        fp = io.BytesIO(source)
+    elif isinstance(source, str):
+        if not os.path.exists(source):
+            return None, "File does not exist"
+        fp = source
+    else:
+        return None, f"Unsupported image source type: {type(source).__name__}"
+    
+    try:
+        with Image.open(fp) as img:
+            width, height = img.size
+            if width * height > max_pixels:
+                return None, f"Image too large: {width}x{height} exceeds {max_pixels} pixels"
+            
+            orientation = img.getexif().get(EXIF_ORIENTATION_TAG, 1)
+            if img.format in ("JPEG", "MPO"):
+                img.draft("RGB", (target_size, target_size))
+            img.load()  # Decodes now, so truncated or corrupt files fail here
+            
+            image = img if img.mode == "RGB" else img.convert("RGB")
+            factor = min(image.width // target_size, image.height // target_size)
+            if factor > 1:
+                image = image.reduce(factor)
+            
+            # Orientation is applied after reducing, so the rotation works on the small image.
+            method = EXIF_TRANSPOSE_METHODS.get(orientation)
+            if method is not None:
+                image = image.transpose(method)
+            return (image.copy() if image is img else image), "Valid image file"
+    except Exception as e:
+        return None, f"Invalid image file: {str(e)}"
+
 def format_model_output(result):
     """
     It formats the model output to display on the GUI.
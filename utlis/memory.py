@@ -0,0 +1,59 @@
+import os
+import sys
+
+# Memory measurements used by load reports, the registry budget and the benchmarks. This module has
+# no image dependencies, so the text model can use it without Pillow installed.
+
+
+def current_rss_bytes():
+    """
+    It returns the resident set size of this process in bytes, or 0 if it cannot be read.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        import resource
+        # ru_maxrss is the peak, in kilobytes on Linux and bytes on macOS.
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+    except (ImportError, OSError):
+        return 0
+
+
+def peak_rss_bytes():
+    """
+    It returns the highest resident set size this process has reached, in bytes, or 0 if unknown.
+    """
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+    except (ImportError, OSError):
+        return 0
+
+
+def module_size_bytes(module):
+    """
+    It returns the number of bytes held by a torch module's parameters and buffers.
+    The state dict is used so dynamically quantized (packed) Linear weights are counted too.
+    """
+    total = 0
+    pending = list(module.state_dict().values())
+    while pending:
+        value = pending.pop()
+        if isinstance(value, (tuple, list)):
+            pending.extend(value)
+        elif hasattr(value, "element_size"):
+            total += value.numel() * value.element_size()
+    return total
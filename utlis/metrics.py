@@ -0,0 +1,177 @@
+import bisect
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+STAGES = ("preprocess", "forward", "decode", "end_to_end")
+
+# Prometheus histogram bucket upper bounds, in seconds.
+BUCKET_BOUNDS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class LatencyHistogram:
+    """
+    Latency statistics for one model stage: bucket counts for export, plus a bounded window of
+    recent samples used for the percentiles.
+    """
+
+    def __init__(self, window=2048):
+        self._bucket_counts = [0] * (len(BUCKET_BOUNDS) + 1)
+        self._recent = deque(maxlen=window)
+        self._count = 0
+        self._items = 0
+        self._errors = 0
+        self._total_seconds = 0.0
+        self._first_seen = None
+        self._last_seen = None
+
+    def observe(self, seconds, items=1, error=False):
+        """
+        It records one timed call that handled the given number of items.
+        """
+        now = time.time()
+        if self._first_seen is None:
+            self._first_seen = now - seconds
+        self._last_seen = now
+        self._bucket_counts[bisect.bisect_left(BUCKET_BOUNDS, seconds)] += 1
+        self._recent.append(seconds)
+        self._count += 1
+        self._items += items
+        self._total_seconds += seconds
+        if error:
+            self._errors += 1
+
+    def percentile(self, fraction):
+        """
+        It returns the latency at the given fraction (0-1) of the recent samples, in seconds.
+        """
+        if not self._recent:
+            return 0.0
+        ordered = sorted(self._recent)
+        return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)]
+
+    def snapshot(self):
+        """
+        It returns the counters and percentiles as a plain dict (times in milliseconds).
+        """
+        elapsed = (self._last_seen - self._first_seen) if self._count else 0.0
+        return {
+            "count": self._count,
+            "items": self._items,
+            "errors": self._errors,
+            "mean_ms": round(self._total_seconds * 1000.0 / self._count, 3) if self._count else 0.0,
+            "p50_ms": round(self.percentile(0.50) * 1000.0, 3),
+            "p95_ms": round(self.percentile(0.95) * 1000.0, 3),
+            "p99_ms": round(self.percentile(0.99) * 1000.0, 3),
+            "items_per_sec": round(self._items / elapsed, 3) if elapsed > 0 else 0.0
+        }
+
+    def prometheus_lines(self, name, labels):
+        """
+        It returns the Prometheus histogram lines for this stage.
+        """
+        lines = []
+        cumulative = 0
+        for bound, count in zip(BUCKET_BOUNDS, self._bucket_counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {self._count}')
+        lines.append(f"{name}_sum{{{labels}}} {self._total_seconds}")
+        lines.append(f"{name}_count{{{labels}}} {self._count}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Collects per-model, per-stage latency histograms, item throughput and error counts.
+    Stages are preprocess, forward, decode and end_to_end.
+    """
+
+    def __init__(self):
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def observe(self, model_name, stage, seconds, items=1, error=False):
+        """
+        It records one timed stage of a model call.
+        """
+        with self._lock:
+            key = (model_name, stage)
+            if key not in self._histograms:
+                self._histograms[key] = LatencyHistogram()
+            self._histograms[key].observe(seconds, items, error)
+
+    @contextmanager
+    def stage_timer(self, model_name, stage, items=1):
+        """
+        A context manager that times the enclosed block as one stage; an exception counts as an error.
+        """
+        start_time = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.observe(model_name, stage, time.perf_counter() - start_time, items, error=True)
+            raise
+        self.observe(model_name, stage, time.perf_counter() - start_time, items)
+
+    def snapshot(self):
+        """
+        It returns {model_name: {stage: stats}} for every stage observed so far.
+        """
+        with self._lock:
+            result = {}
+            for (model_name, stage), histogram in sorted(self._histograms.items()):
+                result.setdefault(model_name, {})[stage] = histogram.snapshot()
+            return result
+
+    def reset(self):
+        """
+        It clears all recorded metrics.
+        """
+        with self._lock:
+            self._histograms.clear()
+
+    def to_prometheus(self):
+        """
+        It renders all histograms in the Prometheus text exposition format.
+        """
+        name = "hit137_stage_latency_seconds"
+        lines = [f"# HELP {name} Model stage latency in seconds.", f"# TYPE {name} histogram"]
+        error_lines = ["# HELP hit137_stage_errors_total Model stage calls that failed.",
+                       "# TYPE hit137_stage_errors_total counter"]
+        item_lines = ["# HELP hit137_stage_items_total Items processed by a model stage.",
+                      "# TYPE hit137_stage_items_total counter"]
+        with self._lock:
+            for (model_name, stage), histogram in sorted(self._histograms.items()):
+                labels = f'model="{_escape_label(model_name)}",stage="{stage}"'
+                lines.extend(histogram.prometheus_lines(name, labels))
+                stats = histogram.snapshot()
+                error_lines.append(f"hit137_stage_errors_total{{{labels}}} {stats['errors']}")
+                item_lines.append(f"hit137_stage_items_total{{{labels}}} {stats['items']}")
+        return "\n".join(lines + error_lines + item_lines) + "\n"
+
+    def export(self, path):
+        """
+        It writes the metrics to path: Prometheus text for .prom/.txt files, otherwise a JSON snapshot.
+        """
+        with open(path, "w", encoding="utf-8") as f:
+            if path.endswith((".prom", ".txt")):
+                f.write(self.to_prometheus())
+            else:
+                json.dump(self.snapshot(), f, indent=2)
+
+
+def _escape_label(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+
+_registry = MetricsRegistry()
+
+
+def get_metrics_registry():
+    """
+    It returns the process-wide metrics registry fed by the model decorators.
+    """
+    return _registry
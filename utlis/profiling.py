@@ -0,0 +1,193 @@
+import os
+import re
+import threading
+import time
+
+PROFILE_ENV_VAR = "HIT137_PROFILE"
+PROFILE_DIR_ENV_VAR = "HIT137_PROFILE_DIR"
+DEFAULT_PROFILE_DIR = "profiles"
+
+
+def default_profile_dir():
+    """
+    It returns the directory profiles are written to (HIT137_PROFILE_DIR or ./profiles).
+    """
+    return os.environ.get(PROFILE_DIR_ENV_VAR, DEFAULT_PROFILE_DIR)
+
+
+def input_size_tag(input_data):
+    """
+    It describes the size of a model input for profile file names, e.g. "1532chars" or "2048576B".
+    """
+    if isinstance(input_data, (bytes, bytearray)):
+        return f"{len(input_data)}B"
+    if isinstance(input_data, list):
+        return f"{len(input_data)}items"
+    if isinstance(input_data, str):
+        if os.path.isfile(input_data):
+            return f"{os.path.getsize(input_data)}B"
+        return f"{len(input_data)}chars"
+    return "unknown"
+
+
+class ProfilingController:
+    """
+    Profiles the next N calls of a model method with cProfile and torch.profiler.
+
+    Arming swaps the method on the model class for a profiling wrapper, and the original is put back
+    after the last profiled call, so nothing extra runs while profiling is off. Each profiled call
+    writes a .pstats file (Python call stats) and a .trace.json Chrome trace with operator-level CPU
+    timings, named after the model, the call number and the input size.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._armed = {}  # (class, method name) -> remaining calls, original function, output dir
+
+    def arm(self, model, calls=1, output_dir=None, method="process_input"):
+        """
+        It profiles the next calls invocations of method on model's class (a model class or instance).
+        """
+        cls = model if isinstance(model, type) else type(model)
+        output_dir = output_dir or default_profile_dir()
+        with self._lock:
+            key = (cls, method)
+            if key in self._armed:
+                self._armed[key]["remaining"] += calls
+                return
+            original = cls.__dict__.get(method) or getattr(cls, method)
+            self._armed[key] = {"remaining": calls, "original": original, "output_dir": output_dir, "count": 0}
+            setattr(cls, method, self._make_wrapper(key, original))
+        print(f"[INFO] Profiling the next {calls} {method} call(s) of {cls.__name__} into {output_dir}")
+
+    def disarm(self, model, method="process_input"):
+        """
+        It stops profiling and restores the original method.
+        """
+        cls = model if isinstance(model, type) else type(model)
+        with self._lock:
+            self._restore((cls, method))
+
+    def is_armed(self, model, method="process_input"):
+        """
+        It returns True while calls of method on model's class are being profiled.
+        """
+        cls = model if isinstance(model, type) else type(model)
+        return (cls, method) in self._armed
+
+    def _restore(self, key):
+        entry = self._armed.pop(key, None)
+        if entry is not None:
+            setattr(key[0], key[1], entry["original"])
+
+    def _make_wrapper(self, key, original):
+        controller = self
+
+        def profiled(model, input_data, *args, **kwargs):
+            with controller._lock:
+                entry = controller._armed.get(key)
+                if entry is None or entry["remaining"] <= 0:
+                    entry = None
+                else:
+                    entry["remaining"] -= 1
+                    entry["count"] += 1
+                    call_number = entry["count"]
+                    if entry["remaining"] == 0:
+                        controller._restore(key)
+            if entry is None:
+                return original(model, input_data, *args, **kwargs)
+            return controller._profile_call(model, original, input_data, args, kwargs,
+                                            entry["output_dir"], call_number)
+
+        profiled.__name__ = original.__name__
+        profiled.__doc__ = original.__doc__
+        return profiled
+
+    def _profile_call(self, model, original, input_data, args, kwargs, output_dir, call_number):
+        import cProfile
+
+        os.makedirs(output_dir, exist_ok=True)
+        model_name = re.sub(r"[^A-Za-z0-9_.-]+", "_", getattr(model, "model_name", type(model).__name__))
+        stem = os.path.join(output_dir, f"{model_name}-{time.strftime('%Y%m%d-%H%M%S')}-"
+                                        f"pid{os.getpid()}-call{call_number}-{input_size_tag(input_data)}")
+
+        torch_profiler = self._start_torch_profiler()
+        python_profiler = cProfile.Profile()
+        python_profiler.enable()
+        try:
+            return original(model, input_data, *args, **kwargs)
+        finally:
+            python_profiler.disable()
+            python_profiler.dump_stats(f"{stem}.pstats")
+            if torch_profiler is not None:
+                torch_profiler.__exit__(None, None, None)
+                torch_profiler.export_chrome_trace(f"{stem}.trace.json")
+            print(f"[INFO] Wrote profile {stem}.pstats")
+
+    @staticmethod
+    def _start_torch_profiler():
+        try:
+            import torch.profiler
+        except ImportError:
+            return None
+        profiler = torch.profiler.profile(
+            activities=[torch.profiler.ProfilerActivity.CPU],
+            record_shapes=True
+        )
+        profiler.__enter__()
+        return profiler
+
+
+_controller = ProfilingController()
+
+
+def get_profiler():
+    """
+    It returns the process-wide profiling controller.
+    """
+    return _controller
+
+
+def parse_profile_spec(spec):
+    """
+    It parses "text:5,image:2" into [("text", 5), ("image", 2)]. A missing count means one call.
+    Raises ValueError for a count that is not a positive whole number.
+    """
+    targets = []
+    for part in filter(None, (piece.strip() for piece in spec.split(","))):
+        name, _, count = part.partition(":")
+        calls = int(count) if count.strip() else 1
+        if calls < 1:
+            raise ValueError(f"profile call count must be at least 1, got {calls}")
+        targets.append((name.strip(), calls))
+    return targets
+
+
+def arm_from_spec(spec, model_classes, output_dir=None, method="process_input"):
+    """
+    It arms profiling for each "key:count" in spec, where key is a name in model_classes
+    (e.g. "text" or "image").
+    """
+    for name, calls in parse_profile_spec(spec):
+        cls = model_classes.get(name)
+        if cls is None:
+            print(f"[ERROR] Unknown model to profile: {name}")
+            continue
+        _controller.arm(cls, calls, output_dir, method)
+
+
+def arm_from_environment(model_classes, method="process_input"):
+    """
+    It arms profiling from the HIT137_PROFILE environment variable, if it is set.
+    A malformed value is reported and ignored, so it cannot stop the GUI from starting.
+    """
+    spec = os.environ.get(PROFILE_ENV_VAR)
+    if spec:
+        try:
+            parsed = parse_profile_spec(spec)
+        except ValueError as e:
+            print(f"[WARNING] Ignoring {PROFILE_ENV_VAR}={spec!r}: {str(e)} (expected e.g. text:5,image:2)")
+            return
+        # Only the models this process uses are armed; the rest of the spec is for other commands.
+        targets = [f"{name}:{calls}" for name, calls in parsed if name in model_classes]
+        arm_from_spec(",".join(targets), model_classes, method=method)